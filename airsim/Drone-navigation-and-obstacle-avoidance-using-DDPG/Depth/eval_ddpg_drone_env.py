@@ -34,6 +34,10 @@ class AirSimDroneEnv(AirSimEnv):
         self.total_step = 0
         self.step_num = 0
 
+        # per-step snapshot of the simulator state, see refresh_state()
+        self.multirotor_state = None
+        self.collision_info = None
+
         self.yaw = 0
         self.vxy_speed = 0
         self.yaw_speed = 0
@@ -95,28 +99,28 @@ class AirSimDroneEnv(AirSimEnv):
                                         drivetrain=airsim.DrivetrainType.MaxDegreeOfFreedom,
                                         yaw_mode=airsim.YawMode(is_rate=True, yaw_or_rate=math.degrees(self.yaw_speed))).join()
 
+    def refresh_state(self):
+        # One getMultirotorState + one collision query per step, pipelined on the
+        # connection; every helper below (position, attitude, velocity, crash check)
+        # reads this snapshot.
+        self.multirotor_state, self.collision_info = self.drone.gather(
+            self.drone.getMultirotorStateAsync(), self.drone.simGetCollisionInfoAsync())
+
     def get_attitude(self):
-        self.state_current_attitude = self.drone.simGetVehiclePose().orientation
+        self.state_current_attitude = self.multirotor_state.kinematics_estimated.orientation
         return airsim.to_eularian_angles(self.state_current_attitude)
 
 
     def get_depth_image(self):
 
-        responses = self.drone.simGetImages([
-            airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)
-        ])
+        requests = [airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)]
+        depth_img = self.drone.simGetImagesNumpy(requests)[0]
 
-        while responses[0].width == 0:
+        while depth_img is None:
             print("get_image_fail...")
-            responses = self.drone.simGetImages([
-            airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)
-        ])
-
-        depth_img = airsim.list_to_2d_float_array(
-            responses[0].image_data_float, responses[0].width,
-            responses[0].height)
+            depth_img = self.drone.simGetImagesNumpy(requests)[0]
 
-        depth_meter = depth_img * 100
+        depth_meter = depth_img[:, :, 0] * 100
 
         return depth_meter
 
@@ -175,7 +179,7 @@ class AirSimDroneEnv(AirSimEnv):
         return state_norm
 
     def get_velocity(self):
-        states = self.drone.getMultirotorState()
+        states = self.multirotor_state
         lin_velocity = states.kinematics_estimated.linear_velocity
         ang_velocity = states.kinematics_estimated.angular_velocity
 
@@ -205,8 +209,9 @@ class AirSimDroneEnv(AirSimEnv):
         return yaw_error
 
     def step(self, action):
-        self.drone.simPrintLogMessage("Position:",str(self.drone.simGetVehiclePose()))
+        self.drone.simPrintLogMessage("Position:",str(self.multirotor_state.kinematics_estimated.position))
         self.set_action(action)
+        self.refresh_state()
         observation=self._get_obs()
         done=self.is_done()
         reward= self.cal_reward(done)
@@ -249,8 +254,7 @@ class AirSimDroneEnv(AirSimEnv):
 
     def is_crashed(self):
         crashed_flag = False
-        collision_info = self.drone.simGetCollisionInfo()
-        if collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
+        if self.collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
 
             crashed_flag = True
 
@@ -264,7 +268,7 @@ class AirSimDroneEnv(AirSimEnv):
         return math.sqrt(pow(relative_pose_x, 2) + pow(relative_pose_y, 2))
 
     def get_position(self):
-        position = self.drone.simGetVehiclePose().position
+        position = self.multirotor_state.kinematics_estimated.position
         return [position.x_val, position.y_val, -position.z_val]
 
 
@@ -336,6 +340,7 @@ class AirSimDroneEnv(AirSimEnv):
 
         self.drone.takeoffAsync().join()
         self.drone.moveToZAsync(-self.start_position[2], 2).join()
+        self.refresh_state()
 
         self.episode_num += 1
         self.step_num = 0
@@ -10,12 +10,70 @@ import time
 import math
 import logging
 
+def _image_responses(responses_raw):
+    return [ImageResponse.from_msgpack(response_raw) for response_raw in responses_raw]
+
+def _image_arrays(responses_raw):
+    return [image_response_to_array(response_raw) for response_raw in responses_raw]
+
+class RpcFuture:
+    """
+    Pending reply of a request sent with `VehicleClient.call_async()` or one of the non-blocking
+    sensor APIs (`getLidarDataAsync()`, `simGetImagesAsync()`, ...)
+
+    `get()` waits for the reply and returns it decoded the same way as the blocking API,
+    `join()` only waits for it, like the futures returned by the movement APIs
+    """
+    def __init__(self, future, decode = None):
+        self._future = future
+        self._decode = decode
+
+    def join(self):
+        self._future.join()
+
+    def get(self):
+        result = self._future.get()
+        return result if self._decode is None else self._decode(result)
+
 class VehicleClient:
     def __init__(self, ip = "", port = 41451, timeout_value = 3600):
         if (ip == ""):
             ip = "127.0.0.1"
         self.client = msgpackrpc.Client(msgpackrpc.Address(ip, port), timeout = timeout_value, pack_encoding = 'utf-8', unpack_encoding = 'utf-8')
 
+#----------------------------------- Pipelined requests ---------------------------------------------
+    def call_async(self, method, *args):
+        """
+        Send an RPC request without waiting for the reply
+
+        Requests sent back to back are pipelined on the same connection, so reading several
+        sensors this way and then calling `gather()` costs roughly as much as the slowest single call
+
+        Args:
+            method (str): Name of the RPC method, e.g. 'getLidarData'
+            *args: Arguments of the RPC method
+
+        Returns:
+            RpcFuture: `get()` returns the raw (msgpack decoded) reply
+        """
+        return self._call_async(None, method, *args)
+
+    def _call_async(self, decode, method, *args):
+        return RpcFuture(self.client.call_async(method, *args), decode)
+
+    @staticmethod
+    def gather(*futures):
+        """
+        Wait for all the given futures and return their results in the same order
+
+        Example::
+
+            lidar, images, state = client.gather(client.getLidarDataAsync(),
+                                                 client.simGetImagesNumpyAsync(requests),
+                                                 client.getMultirotorStateAsync())
+        """
+        return [future.get() for future in futures]
+
 #----------------------------------- Common vehicle APIs ---------------------------------------------
     def reset(self):
         """
@@ -293,6 +351,15 @@ class VehicleClient:
 #camera control
 #simGetImage returns compressed png in array of bytes
 #image_type uses one of the ImageType members
+    def simGetImagesAsync(self, requests, vehicle_name = '', external = False):
+        """
+        Non-blocking `simGetImages()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `simGetImages()`
+        """
+        return self._call_async(_image_responses, 'simGetImages', requests, vehicle_name, external)
+
     def simGetImages(self, requests, vehicle_name = '', external = False):
         """
         Get multiple images
@@ -307,8 +374,35 @@ class VehicleClient:
         Returns:
             list[ImageResponse]:
         """
-        responses_raw = self.client.call('simGetImages', requests, vehicle_name, external)
-        return [ImageResponse.from_msgpack(response_raw) for response_raw in responses_raw]
+        return self.simGetImagesAsync(requests, vehicle_name, external).get()
+
+    def simGetImagesNumpyAsync(self, requests, vehicle_name = '', external = False):
+        """
+        Non-blocking `simGetImagesNumpy()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `simGetImagesNumpy()`
+        """
+        return self._call_async(_image_arrays, 'simGetImages', requests, vehicle_name, external)
+
+    def simGetImagesNumpy(self, requests, vehicle_name = '', external = False):
+        """
+        Get multiple images as numpy arrays, without building ImageResponse objects
+
+        Uncompressed uint8 images are returned as read-only `np.frombuffer` views of the
+        received payload, so call `.copy()` before modifying them in place
+
+        Args:
+            requests (list[ImageRequest]): Images required
+            vehicle_name (str, optional): Name of vehicle associated with the camera
+            external (bool, optional): Whether the camera is an External Camera
+
+        Returns:
+            list[numpy.ndarray]: (H, W, C) uint8 for uncompressed images, (H, W, 1) float32 for
+            `pixels_as_float` requests, 1-D uint8 encoded bytes for compressed images, None for
+            an image that could not be captured
+        """
+        return self.simGetImagesNumpyAsync(requests, vehicle_name, external).get()
 
 
 
@@ -437,6 +531,15 @@ class VehicleClient:
         responses_raw = self.client.call('simGetMeshPositionVertexBuffers')
         return [MeshPositionVertexBuffersResponse.from_msgpack(response_raw) for response_raw in responses_raw]
 
+    def simGetCollisionInfoAsync(self, vehicle_name = ''):
+        """
+        Non-blocking `simGetCollisionInfo()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `simGetCollisionInfo()`
+        """
+        return self._call_async(CollisionInfo.from_msgpack, 'simGetCollisionInfo', vehicle_name)
+
     def simGetCollisionInfo(self, vehicle_name = ''):
         """
         Args:
@@ -445,7 +548,7 @@ class VehicleClient:
         Returns:
             CollisionInfo:
         """
-        return CollisionInfo.from_msgpack(self.client.call('simGetCollisionInfo', vehicle_name))
+        return self.simGetCollisionInfoAsync(vehicle_name).get()
 
     def simSetVehiclePose(self, pose, ignore_collision, vehicle_name = ''):
         """
@@ -460,6 +563,15 @@ class VehicleClient:
         """
         self.client.call('simSetVehiclePose', pose, ignore_collision, vehicle_name)
 
+    def simGetVehiclePoseAsync(self, vehicle_name = ''):
+        """
+        Non-blocking `simGetVehiclePose()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `simGetVehiclePose()`
+        """
+        return self._call_async(Pose.from_msgpack, 'simGetVehiclePose', vehicle_name)
+
     def simGetVehiclePose(self, vehicle_name = ''):
         """
         The position inside the returned Pose is in the frame of the vehicle's starting point
@@ -470,8 +582,7 @@ class VehicleClient:
         Returns:
             Pose:
         """
-        pose = self.client.call('simGetVehiclePose', vehicle_name)
-        return Pose.from_msgpack(pose)
+        return self.simGetVehiclePoseAsync(vehicle_name).get()
 
     def simSetTraceLine(self, color_rgba, thickness=1.0, vehicle_name = ''):
         """
@@ -792,6 +903,15 @@ class VehicleClient:
 #TODO : below str() conversion is only needed for legacy reason and should be removed in future
         self.client.call('simSetCameraFov', str(camera_name), fov_degrees, vehicle_name, external)
 
+    def simGetGroundTruthKinematicsAsync(self, vehicle_name = ''):
+        """
+        Non-blocking `simGetGroundTruthKinematics()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `simGetGroundTruthKinematics()`
+        """
+        return self._call_async(KinematicsState.from_msgpack, 'simGetGroundTruthKinematics', vehicle_name)
+
     def simGetGroundTruthKinematics(self, vehicle_name = ''):
         """
         Get Ground truth kinematics of the vehicle
@@ -804,8 +924,7 @@ class VehicleClient:
         Returns:
             KinematicsState: Ground truth of the vehicle
         """
-        kinematics_state = self.client.call('simGetGroundTruthKinematics', vehicle_name)
-        return KinematicsState.from_msgpack(kinematics_state)
+        return self.simGetGroundTruthKinematicsAsync(vehicle_name).get()
     simGetGroundTruthKinematics.__annotations__ = {'return': KinematicsState}
 
     def simSetKinematics(self, state, ignore_collision, vehicle_name = ''):
@@ -839,6 +958,15 @@ class VehicleClient:
 
 
 #sensor APIs
+    def getImuDataAsync(self, imu_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getImuData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getImuData()`
+        """
+        return self._call_async(ImuData.from_msgpack, 'getImuData', imu_name, vehicle_name)
+
     def getImuData(self, imu_name = '', vehicle_name = ''):
         """
         Args:
@@ -848,7 +976,16 @@ class VehicleClient:
         Returns:
             ImuData:
         """
-        return ImuData.from_msgpack(self.client.call('getImuData', imu_name, vehicle_name))
+        return self.getImuDataAsync(imu_name, vehicle_name).get()
+
+    def getBarometerDataAsync(self, barometer_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getBarometerData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getBarometerData()`
+        """
+        return self._call_async(BarometerData.from_msgpack, 'getBarometerData', barometer_name, vehicle_name)
 
     def getBarometerData(self, barometer_name = '', vehicle_name = ''):
         """
@@ -859,7 +996,16 @@ class VehicleClient:
         Returns:
             BarometerData:
         """
-        return BarometerData.from_msgpack(self.client.call('getBarometerData', barometer_name, vehicle_name))
+        return self.getBarometerDataAsync(barometer_name, vehicle_name).get()
+
+    def getMagnetometerDataAsync(self, magnetometer_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getMagnetometerData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getMagnetometerData()`
+        """
+        return self._call_async(MagnetometerData.from_msgpack, 'getMagnetometerData', magnetometer_name, vehicle_name)
 
     def getMagnetometerData(self, magnetometer_name = '', vehicle_name = ''):
         """
@@ -870,7 +1016,16 @@ class VehicleClient:
         Returns:
             MagnetometerData:
         """
-        return MagnetometerData.from_msgpack(self.client.call('getMagnetometerData', magnetometer_name, vehicle_name))
+        return self.getMagnetometerDataAsync(magnetometer_name, vehicle_name).get()
+
+    def getGpsDataAsync(self, gps_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getGpsData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getGpsData()`
+        """
+        return self._call_async(GpsData.from_msgpack, 'getGpsData', gps_name, vehicle_name)
 
     def getGpsData(self, gps_name = '', vehicle_name = ''):
         """
@@ -881,7 +1036,16 @@ class VehicleClient:
         Returns:
             GpsData:
         """
-        return GpsData.from_msgpack(self.client.call('getGpsData', gps_name, vehicle_name))
+        return self.getGpsDataAsync(gps_name, vehicle_name).get()
+
+    def getDistanceSensorDataAsync(self, distance_sensor_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getDistanceSensorData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getDistanceSensorData()`
+        """
+        return self._call_async(DistanceSensorData.from_msgpack, 'getDistanceSensorData', distance_sensor_name, vehicle_name)
 
     def getDistanceSensorData(self, distance_sensor_name = '', vehicle_name = ''):
         """
@@ -892,7 +1056,16 @@ class VehicleClient:
         Returns:
             DistanceSensorData:
         """
-        return DistanceSensorData.from_msgpack(self.client.call('getDistanceSensorData', distance_sensor_name, vehicle_name))
+        return self.getDistanceSensorDataAsync(distance_sensor_name, vehicle_name).get()
+
+    def getLidarDataAsync(self, lidar_name = '', vehicle_name = ''):
+        """
+        Non-blocking `getLidarData()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getLidarData()`
+        """
+        return self._call_async(LidarData.from_msgpack, 'getLidarData', lidar_name, vehicle_name)
 
     def getLidarData(self, lidar_name = '', vehicle_name = ''):
         """
@@ -903,7 +1076,7 @@ class VehicleClient:
         Returns:
             LidarData:
         """
-        return LidarData.from_msgpack(self.client.call('getLidarData', lidar_name, vehicle_name))
+        return self.getLidarDataAsync(lidar_name, vehicle_name).get()
 
     def simGetLidarSegmentation(self, lidar_name = '', vehicle_name = ''):
         """
@@ -1555,6 +1728,15 @@ class MultirotorClient(VehicleClient, object):
         self.client.call('setPositionControllerGains', *(position_gains.to_lists()+(vehicle_name,)))
 
 #query vehicle state
+    def getMultirotorStateAsync(self, vehicle_name = ''):
+        """
+        Non-blocking `getMultirotorState()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getMultirotorState()`
+        """
+        return self._call_async(MultirotorState.from_msgpack, 'getMultirotorState', vehicle_name)
+
     def getMultirotorState(self, vehicle_name = ''):
         """
         The position inside the returned MultirotorState is in the frame of the vehicle's starting point
@@ -1565,7 +1747,7 @@ class MultirotorClient(VehicleClient, object):
         Returns:
             MultirotorState:
         """
-        return MultirotorState.from_msgpack(self.client.call('getMultirotorState', vehicle_name))
+        return self.getMultirotorStateAsync(vehicle_name).get()
     getMultirotorState.__annotations__ = {'return': MultirotorState}
 #query rotor states
     def getRotorStates(self, vehicle_name = ''):
@@ -1582,6 +1764,197 @@ class MultirotorClient(VehicleClient, object):
         return RotorStates.from_msgpack(self.client.call('getRotorStates', vehicle_name))
     getRotorStates.__annotations__ = {'return': RotorStates}
 
+#----------------------------------- Multi-vehicle APIs ---------------------------------------------
+class VehicleFutures(dict):
+    """
+    Futures of one request fanned out to several vehicles, keyed by vehicle name
+
+    `join()` waits for all of them, `get()` returns {vehicle_name: result}
+    """
+    def join(self):
+        for future in self.values():
+            future.join()
+
+    def get(self):
+        return dict((vehicle_name, future.get()) for vehicle_name, future in self.items())
+
+class MultirotorClientPool(object):
+    """
+    Pool of `MultirotorClient` connections for multi-vehicle (swarm) scripts
+
+    Every vehicle is routed to a dedicated connection (round-robin when `pool_size` is smaller
+    than the number of vehicles), so requests for different vehicles are sent on separate
+    sockets and served concurrently by the simulator instead of queueing behind each other.
+    The batched helpers send one request per vehicle before waiting for any reply.
+
+    Example::
+
+        pool = airsim.MultirotorClientPool(["Drone1", "Drone2"])
+        pool.enableApiControl(True)
+        pool.takeoffAsync().join()
+        pool.moveByVelocityAsync({"Drone1": (1, 0, 0), "Drone2": (0, 1, 0)}, 5).join()
+        states = pool.getMultirotorStates()
+
+    For any other API, use the connection of the vehicle: `pool.client("Drone1").getLidarData(vehicle_name = "Drone1")`
+
+    Args:
+        vehicle_names (list[str]): Vehicles driven through the pool, as named in settings.json
+        ip (str, optional): Simulator address
+        port (int, optional): RPC port
+        timeout_value (int, optional): RPC timeout in seconds
+        pool_size (int, optional): Number of connections, defaults to one per vehicle
+    """
+    def __init__(self, vehicle_names, ip = "", port = 41451, timeout_value = 3600, pool_size = None):
+        self.vehicle_names = list(vehicle_names)
+        if not self.vehicle_names:
+            raise ValueError("MultirotorClientPool needs at least one vehicle name")
+        if pool_size is None:
+            pool_size = len(self.vehicle_names)
+        pool_size = max(1, min(int(pool_size), len(self.vehicle_names)))
+
+        self.clients = [MultirotorClient(ip, port, timeout_value) for _ in range(pool_size)]
+        self._routes = dict((vehicle_name, self.clients[i % pool_size]) for i, vehicle_name in enumerate(self.vehicle_names))
+
+    def client(self, vehicle_name):
+        """
+        Returns:
+            MultirotorClient: Connection dedicated to `vehicle_name`
+        """
+        return self._routes[vehicle_name]
+
+    def _fan_out(self, send, vehicle_names):
+        if vehicle_names is None:
+            vehicle_names = self.vehicle_names
+        return VehicleFutures((vehicle_name, send(self.client(vehicle_name), vehicle_name)) for vehicle_name in vehicle_names)
+
+    def confirmConnection(self):
+        """
+        Checks state of connection every 1 sec and reports it in Console so user can see the progress for connection.
+        """
+        self.clients[0].confirmConnection()
+
+    def reset(self):
+        """
+        Reset all vehicles to their original starting state
+        """
+        self.clients[0].reset()
+
+    def close(self):
+        """
+        Close all the connections of the pool
+        """
+        for client in self.clients:
+            client.client.close()
+
+    def enableApiControl(self, is_enabled, vehicle_names = None):
+        """
+        Enables or disables API control for several vehicles
+
+        Args:
+            is_enabled (bool): True to enable, False to disable API control
+            vehicle_names (list[str], optional): Vehicles to send this command to, defaults to all vehicles of the pool
+        """
+        self._fan_out(lambda client, vehicle_name: client.call_async('enableApiControl', is_enabled, vehicle_name), vehicle_names).get()
+
+    def armDisarm(self, arm, vehicle_names = None):
+        """
+        Arms or disarms several vehicles
+
+        Args:
+            arm (bool): True to arm, False to disarm the vehicles
+            vehicle_names (list[str], optional): Vehicles to send this command to, defaults to all vehicles of the pool
+
+        Returns:
+            dict[str, bool]: Success of the command for each vehicle
+        """
+        return self._fan_out(lambda client, vehicle_name: client.call_async('armDisarm', arm, vehicle_name), vehicle_names).get()
+
+    def getMultirotorStates(self, vehicle_names = None):
+        """
+        Get the state of several vehicles, see `MultirotorClient.getMultirotorState()`
+
+        Args:
+            vehicle_names (list[str], optional): Vehicles to get the state of, defaults to all vehicles of the pool
+
+        Returns:
+            dict[str, MultirotorState]:
+        """
+        return self._fan_out(lambda client, vehicle_name: client.getMultirotorStateAsync(vehicle_name), vehicle_names).get()
+
+    def simGetCollisionInfos(self, vehicle_names = None):
+        """
+        Args:
+            vehicle_names (list[str], optional): Vehicles to get the collision info of, defaults to all vehicles of the pool
+
+        Returns:
+            dict[str, CollisionInfo]:
+        """
+        return self._fan_out(lambda client, vehicle_name: client.simGetCollisionInfoAsync(vehicle_name), vehicle_names).get()
+
+    def takeoffAsync(self, timeout_sec = 20, vehicle_names = None):
+        """
+        Takeoff several vehicles
+
+        Args:
+            timeout_sec (int, optional): Timeout for the vehicles to reach desired altitude
+            vehicle_names (list[str], optional): Vehicles to send this command to, defaults to all vehicles of the pool
+
+        Returns:
+            VehicleFutures: future. call .join() to wait for all vehicles to complete the command
+        """
+        return self._fan_out(lambda client, vehicle_name: client.takeoffAsync(timeout_sec, vehicle_name), vehicle_names)
+
+    def landAsync(self, timeout_sec = 60, vehicle_names = None):
+        """
+        Land several vehicles
+
+        Args:
+            timeout_sec (int, optional): Timeout for the vehicles to land
+            vehicle_names (list[str], optional): Vehicles to send this command to, defaults to all vehicles of the pool
+
+        Returns:
+            VehicleFutures: future. call .join() to wait for all vehicles to complete the command
+        """
+        return self._fan_out(lambda client, vehicle_name: client.landAsync(timeout_sec, vehicle_name), vehicle_names)
+
+    def hoverAsync(self, vehicle_names = None):
+        """
+        Returns:
+            VehicleFutures: future. call .join() to wait for all vehicles to complete the command
+        """
+        return self._fan_out(lambda client, vehicle_name: client.hoverAsync(vehicle_name), vehicle_names)
+
+    def moveByVelocityAsync(self, velocities, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode()):
+        """
+        Move several vehicles, each with its own velocity, see `MultirotorClient.moveByVelocityAsync()`
+
+        Args:
+            velocities (dict[str, tuple]): (vx, vy, vz) in m/s for each vehicle to move
+            duration (float): Desired amount of time (seconds), to send this command for
+            drivetrain (DrivetrainType, optional):
+            yaw_mode (YawMode, optional):
+
+        Returns:
+            VehicleFutures: future. call .join() to wait for all vehicles to complete the command
+        """
+        return self._fan_out(lambda client, vehicle_name: client.moveByVelocityAsync(velocities[vehicle_name][0], velocities[vehicle_name][1], velocities[vehicle_name][2],
+            duration, drivetrain, yaw_mode, vehicle_name), list(velocities))
+
+    def moveToPositionAsync(self, positions, velocity, timeout_sec = 3e+38, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(),
+        lookahead = -1, adaptive_lookahead = 1):
+        """
+        Move several vehicles, each to its own position, see `MultirotorClient.moveToPositionAsync()`
+
+        Args:
+            positions (dict[str, tuple]): (x, y, z) in NED coordinates for each vehicle to move
+            velocity (float): Speed in m/s
+
+        Returns:
+            VehicleFutures: future. call .join() to wait for all vehicles to complete the command
+        """
+        return self._fan_out(lambda client, vehicle_name: client.moveToPositionAsync(positions[vehicle_name][0], positions[vehicle_name][1], positions[vehicle_name][2],
+            velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name), list(positions))
+
 #----------------------------------- Car APIs ---------------------------------------------
 class CarClient(VehicleClient, object):
     def __init__(self, ip = "", port = 41451, timeout_value = 3600):
@@ -1597,6 +1970,15 @@ class CarClient(VehicleClient, object):
         """
         self.client.call('setCarControls', controls, vehicle_name)
 
+    def getCarStateAsync(self, vehicle_name = ''):
+        """
+        Non-blocking `getCarState()`: sends the request and returns at once
+
+        Returns:
+            RpcFuture: `get()` returns the same value as `getCarState()`
+        """
+        return self._call_async(CarState.from_msgpack, 'getCarState', vehicle_name)
+
     def getCarState(self, vehicle_name = ''):
         """
         The position inside the returned CarState is in the frame of the vehicle's starting point
@@ -1607,8 +1989,7 @@ class CarClient(VehicleClient, object):
         Returns:
             CarState:
         """
-        state_raw = self.client.call('getCarState', vehicle_name)
-        return CarState.from_msgpack(state_raw)
+        return self.getCarStateAsync(vehicle_name).get()
 
     def getCarControls(self, vehicle_name=''):
         """
@@ -3,6 +3,7 @@ import airsim
 import gym
 from gym import spaces
 from airgym.envs.airsim_env import AirSimEnv
+from airgym.envs.lidar_sectors import LidarSectorBinner
 import logging
 import math
 logger = logging.getLogger()
@@ -14,7 +15,7 @@ class AirSimDroneEnv(AirSimEnv):
 
 
 
-    def __init__(self, target_z=-20):
+    def __init__(self, target_z=-20, lidar_reduce="mean"):
         super().__init__()
         self.drone = airsim.MultirotorClient(ip="127.0.0.1",port=41453)
         self.drone.confirmConnection()
@@ -31,6 +32,10 @@ class AirSimDroneEnv(AirSimEnv):
         self.total_step = 0
         self.step_num = 0
 
+        # per-step snapshot of the simulator state, see refresh_state()
+        self.multirotor_state = None
+        self.collision_info = None
+
         self.yaw = 0
         self.vxy_speed = 0
         self.yaw_speed = 0
@@ -52,6 +57,9 @@ class AirSimDroneEnv(AirSimEnv):
 
         self.previous_dist = 0
         self.max_depth = 10
+        # left / front / right sectors; lidar_reduce: "mean", "min" or a percentile
+        self.lidar_binner = LidarSectorBinner(edges=(-90, -30, 30, 90), reduce=lidar_reduce,
+                                              empty_distance=self.max_depth)
         self.dt=0.1
         self.max_episode_steps = 1000
 
@@ -95,8 +103,15 @@ class AirSimDroneEnv(AirSimEnv):
                                         drivetrain=airsim.DrivetrainType.MaxDegreeOfFreedom,
                                         yaw_mode=airsim.YawMode(is_rate=True, yaw_or_rate=math.degrees(self.yaw_speed))).join()
 
+    def refresh_state(self):
+        # One getMultirotorState + one collision query per step, pipelined on the
+        # connection; every helper below (position, attitude, velocity, crash check)
+        # reads this snapshot.
+        self.multirotor_state, self.collision_info = self.drone.gather(
+            self.drone.getMultirotorStateAsync(), self.drone.simGetCollisionInfoAsync())
+
     def get_attitude(self):
-        self.state_current_attitude = self.drone.simGetVehiclePose().orientation
+        self.state_current_attitude = self.multirotor_state.kinematics_estimated.orientation
         return airsim.to_eularian_angles(self.state_current_attitude)
 
 
@@ -107,49 +122,26 @@ class AirSimDroneEnv(AirSimEnv):
             pts=np.array(lidar_data.point_cloud, dtype=np.dtype('f4'))
             pts=np.reshape(pts, (int(pts.shape[0]/3), 3))
             return pts
-        return np.zeros(3)
+        return np.zeros((0, 3), dtype=np.float32)
 
     def filter_directional_points(self, points):
-        front, left, right = [], [], []
-        for point in points:
-            ang = np.rad2deg(np.arctan2(point[1], point[0]))
-            if -30 <= ang < 30:
-                front.append(point)
-            elif -90 <= ang < -30:
-                left.append(point)
-            elif 30 <= ang < 90:
-                right.append(point)
-
-        return np.array(front), np.array(left), np.array(right)
-
-    def obstacles_check(self,segmented_points):
-        obstacle_directions = {}
-
-        for key in segmented_points:
-            if len(segmented_points[key]) == 0:
-                obstacle_directions[key]=10
-                continue
-            distances=np.sqrt(np.sum(segmented_points[key][:, :2]**2, axis=1))
-            obstacle_directions[key] = np.mean(distances)
-        return obstacle_directions
+        left, front, right = self.lidar_binner.split(points)
+        return front, left, right
+
+    def obstacles_check(self, points):
+        left, front, right = self.lidar_binner.distances(points)
+        return {'front': front, 'left': left, 'right': right}
 
     def get_depth_image(self):
 
-        responses = self.drone.simGetImages([
-            airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)
-        ])
+        requests = [airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)]
+        depth_img = self.drone.simGetImagesNumpy(requests)[0]
 
-        while responses[0].width == 0:
+        while depth_img is None:
             print("get_image_fail...")
-            responses = self.drone.simGetImages([
-            airsim.ImageRequest("0", airsim.ImageType.DepthVis, True)
-        ])
-
-        depth_img = airsim.list_to_2d_float_array(
-            responses[0].image_data_float, responses[0].width,
-            responses[0].height)
+            depth_img = self.drone.simGetImagesNumpy(requests)[0]
 
-        depth_meter = depth_img * 100
+        depth_meter = depth_img[:, :, 0] * 100
 
         return depth_meter
 
@@ -182,8 +174,7 @@ class AirSimDroneEnv(AirSimEnv):
 
 
         lidar_points = self.get_lidar_data()
-        front, left, right = self.filter_directional_points(lidar_points)
-        obstacles = self.obstacles_check({'front': front, 'left': left, 'right': right})
+        obstacles = self.obstacles_check(lidar_points)
 
         # print("LIDARR DATA WITHOUT NORM",obstacles)
 
@@ -224,7 +215,7 @@ class AirSimDroneEnv(AirSimEnv):
         return state_norm
 
     def get_velocity(self):
-        states = self.drone.getMultirotorState()
+        states = self.multirotor_state
         lin_velocity = states.kinematics_estimated.linear_velocity
         ang_velocity = states.kinematics_estimated.angular_velocity
 
@@ -255,8 +246,9 @@ class AirSimDroneEnv(AirSimEnv):
         return yaw_error
 
     def step(self, action):
-        self.drone.simPrintLogMessage("Position:",str(self.drone.simGetVehiclePose()))
+        self.drone.simPrintLogMessage("Position:",str(self.multirotor_state.kinematics_estimated.position))
         self.set_action(action)
+        self.refresh_state()
         observation=self._get_obs()
         done=self.is_done()
         reward= self.cal_reward(done)
@@ -300,8 +292,7 @@ class AirSimDroneEnv(AirSimEnv):
 
     def is_crashed(self):
         crashed_flag = False
-        collision_info = self.drone.simGetCollisionInfo()
-        if collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
+        if self.collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
 
             crashed_flag = True
 
@@ -315,7 +306,7 @@ class AirSimDroneEnv(AirSimEnv):
         return math.sqrt(pow(relative_pose_x, 2) + pow(relative_pose_y, 2))
 
     def get_position(self):
-        position = self.drone.simGetVehiclePose().position
+        position = self.multirotor_state.kinematics_estimated.position
         return [position.x_val, position.y_val, -position.z_val]
 
 
@@ -387,6 +378,7 @@ class AirSimDroneEnv(AirSimEnv):
 
         self.drone.takeoffAsync().join()
         self.drone.moveToZAsync(-self.start_position[2], 2).join()
+        self.refresh_state()
 
         self.episode_num += 1
         self.step_num = 0
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class LidarSectorBinner:
+    """Bin a LiDAR point cloud into horizontal angular sectors.
+
+    Sectors are given by ascending edges in degrees (``atan2(y, x)`` in the
+    vehicle frame, 0 = straight ahead); a point belongs to sector ``i`` when
+    ``edges[i] <= angle < edges[i + 1]``, points outside the edges are ignored.
+    The whole ``(N, 3)`` cloud is processed with one ``arctan2`` call.
+
+    reduce selects the per-sector obstacle distance (horizontal range):
+    "mean", "min", or a number giving that percentile (e.g. 5 for a min that
+    ignores a few stray returns). Empty sectors report ``empty_distance``.
+    """
+
+    def __init__(self, edges=(-90, -45, 45, 90), reduce="mean", empty_distance=10.0):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError("edges must be at least two strictly increasing angles in degrees")
+        if reduce not in ("mean", "min") and not isinstance(reduce, (int, float)):
+            raise ValueError("reduce must be 'mean', 'min' or a percentile")
+        self.reduce = reduce
+        self.empty_distance = empty_distance
+
+    @classmethod
+    def uniform(cls, num_sectors, fov=180.0, **kwargs):
+        """num_sectors equal sectors spanning fov degrees centred on the heading."""
+        return cls(np.linspace(-fov / 2, fov / 2, num_sectors + 1), **kwargs)
+
+    @property
+    def num_sectors(self):
+        return len(self.edges) - 1
+
+    def assign(self, points):
+        """Return (sector index, horizontal distance) of the points that fall in a sector."""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        angles = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+        sectors = np.searchsorted(self.edges, angles, side="right") - 1
+        inside = (sectors >= 0) & (sectors < self.num_sectors)
+        distances = np.hypot(points[inside, 0], points[inside, 1])
+        return sectors[inside], distances
+
+    def split(self, points):
+        """The points of each sector, as a list of (M_i, 3) arrays."""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        angles = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+        sectors = np.searchsorted(self.edges, angles, side="right") - 1
+        return [points[sectors == i] for i in range(self.num_sectors)]
+
+    def distances(self, points):
+        """Per-sector obstacle distance, shape (num_sectors,)."""
+        sectors, distances = self.assign(points)
+        counts = np.bincount(sectors, minlength=self.num_sectors)
+        result = np.full(self.num_sectors, self.empty_distance, dtype=np.float64)
+        hit = counts > 0
+
+        if self.reduce == "mean":
+            sums = np.bincount(sectors, weights=distances, minlength=self.num_sectors)
+            result[hit] = sums[hit] / counts[hit]
+        elif self.reduce == "min":
+            minima = np.full(self.num_sectors, np.inf)
+            np.minimum.at(minima, sectors, distances)
+            result[hit] = minima[hit]
+        else:
+            order = np.argsort(sectors, kind="stable")
+            groups = np.split(distances[order], np.cumsum(counts)[:-1])
+            for i in np.flatnonzero(hit):
+                result[i] = np.percentile(groups[i], self.reduce)
+        return result
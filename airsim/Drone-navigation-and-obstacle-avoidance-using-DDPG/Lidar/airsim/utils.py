@@ -7,18 +7,45 @@ import inspect
 import types
 import re
 import logging
+import array as _array
 
 from .types import *
 
 
+# np.frombuffer returns a read-only view of the received bytes (no copy); use .copy() to modify it
 def string_to_uint8_array(bstr):
-    return np.fromstring(bstr, np.uint8)
+    return np.frombuffer(bstr, np.uint8)
     
 def string_to_float_array(bstr):
-    return np.fromstring(bstr, np.float32)
+    return np.frombuffer(bstr, np.float32)
+    
+def float_list_to_array(flst):
+    # msgpack decodes float images to a list of Python floats; array.array parses it about twice as fast as np.asarray
+    if isinstance(flst, np.ndarray):
+        return flst.astype(np.float32, copy=False).ravel()
+    return np.frombuffer(_array.array('f', flst), np.float32)
     
 def list_to_2d_float_array(flst, width, height):
-    return np.reshape(np.asarray(flst, np.float32), (height, width))
+    return np.reshape(float_list_to_array(flst), (height, width))
+
+def image_response_to_array(response):
+    """
+    Convert an ImageResponse, or the raw msgpack dict of one, to a numpy array
+
+    Uncompressed uint8 images become read-only (H, W, C) views of the received buffer,
+    float images (H, W, 1) float32 arrays and compressed images 1-D uint8 views of the
+    encoded bytes (decode with cv2.imdecode). Returns None for an empty response.
+    """
+    field = response.get if isinstance(response, dict) else lambda name: getattr(response, name)
+    width, height = field('width'), field('height')
+    if width == 0 or height == 0:
+        return None
+    if field('pixels_as_float'):
+        return float_list_to_array(field('image_data_float')).reshape(height, width, 1)
+    data = string_to_uint8_array(field('image_data_uint8'))
+    if field('compress'):
+        return data
+    return data.reshape(height, width, -1)
     
 def get_pfm_array(response):
     return list_to_2d_float_array(response.image_data_float, response.width, response.height)
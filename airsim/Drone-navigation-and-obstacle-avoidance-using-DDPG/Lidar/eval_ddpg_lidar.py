@@ -3,6 +3,7 @@ import airsim
 import gym
 from gym import spaces
 from airgym.envs.airsim_env import AirSimEnv
+from airgym.envs.lidar_sectors import LidarSectorBinner
 import logging
 import math
 import time
@@ -14,7 +15,7 @@ class AirSimDroneEnv(AirSimEnv):
 
 
 
-    def __init__(self, target_z=-20):
+    def __init__(self, target_z=-20, lidar_reduce="mean"):
         super().__init__()
         self.drone = airsim.MultirotorClient(ip="127.0.0.1",port=41453)
         self.drone.confirmConnection()
@@ -35,6 +36,10 @@ class AirSimDroneEnv(AirSimEnv):
         self.total_step = 0
         self.step_num = 0
 
+        # per-step snapshot of the simulator state, see refresh_state()
+        self.multirotor_state = None
+        self.collision_info = None
+
         self.yaw = 0
         self.vxy_speed = 0
         self.yaw_speed = 0
@@ -54,6 +59,9 @@ class AirSimDroneEnv(AirSimEnv):
 
         self.previous_dist = 0
         self.max_depth = 10
+        # left / front / right sectors; lidar_reduce: "mean", "min" or a percentile
+        self.lidar_binner = LidarSectorBinner(edges=(-90, -45, 45, 90), reduce=lidar_reduce,
+                                              empty_distance=self.max_depth)
         self.dt=0.1
 
         self.max_episode_steps = 1500
@@ -96,8 +104,15 @@ class AirSimDroneEnv(AirSimEnv):
                                         yaw_mode=airsim.YawMode(is_rate=True, yaw_or_rate=math.degrees(self.yaw_speed))).join()
 
 
+    def refresh_state(self):
+        # One getMultirotorState + one collision query per step, pipelined on the
+        # connection; every helper below (position, attitude, velocity, crash check)
+        # reads this snapshot.
+        self.multirotor_state, self.collision_info = self.drone.gather(
+            self.drone.getMultirotorStateAsync(), self.drone.simGetCollisionInfoAsync())
+
     def get_attitude(self):
-        self.state_current_attitude = self.drone.simGetVehiclePose().orientation
+        self.state_current_attitude = self.multirotor_state.kinematics_estimated.orientation
         return airsim.to_eularian_angles(self.state_current_attitude)
 
 
@@ -107,38 +122,15 @@ class AirSimDroneEnv(AirSimEnv):
             pts=np.array(lidar_data.point_cloud, dtype=np.dtype('f4'))
             pts=np.reshape(pts, (int(pts.shape[0]/3), 3))
             return pts
-        return np.zeros(3)
+        return np.zeros((0, 3), dtype=np.float32)
 
     def filter_directional_points(self, points):
-        front, left, right = [], [], []
-        for point in points:
-
-            try:
-                ang = np.rad2deg(np.arctan2(point[1], point[0]))
-                if -45 <= ang < 45:
-                    front.append(point)
-                elif -90 <= ang < -45:
-                    left.append(point)
-                elif 45 <= ang < 90:
-                    right.append(point)
-
-            except IndexError:
-                print("Index Error")
-                print(points,point,ang = np.rad2deg(np.arctan2(point[1], point[0])))
-
-            finally:
-                return np.array(front), np.array(left), np.array(right)
-
-    def obstacles_check(self,segmented_points):
-        obstacle_directions = {}
+        left, front, right = self.lidar_binner.split(points)
+        return front, left, right
 
-        for key in segmented_points:
-            if len(segmented_points[key]) == 0:
-                obstacle_directions[key]=10
-                continue
-            distances=np.sqrt(np.sum(segmented_points[key][:, :-1]**2, axis=1))
-            obstacle_directions[key] = np.mean(distances)
-        return obstacle_directions
+    def obstacles_check(self, points):
+        left, front, right = self.lidar_binner.distances(points)
+        return {'front': front, 'left': left, 'right': right}
 
 
 
@@ -151,8 +143,7 @@ class AirSimDroneEnv(AirSimEnv):
 
 
         lidar_points = self.get_lidar_data()
-        front, left, right = self.filter_directional_points(lidar_points)
-        obstacles = self.obstacles_check({'front': front, 'left': left, 'right': right})
+        obstacles = self.obstacles_check(lidar_points)
 
         # print("LIDARR DATA WITHOUT NORM",obstacles)
 
@@ -196,7 +187,7 @@ class AirSimDroneEnv(AirSimEnv):
 
 
     def get_velocity(self):
-        states = self.drone.getMultirotorState()
+        states = self.multirotor_state
         lin_velocity = states.kinematics_estimated.linear_velocity
         ang_velocity = states.kinematics_estimated.angular_velocity
 
@@ -226,8 +217,9 @@ class AirSimDroneEnv(AirSimEnv):
 
 
     def step(self, action):
-        self.drone.simPrintLogMessage("Position:",str(self.drone.simGetVehiclePose()))
+        self.drone.simPrintLogMessage("Position:",str(self.multirotor_state.kinematics_estimated.position))
         self.set_action(action)
+        self.refresh_state()
         observation=self._get_obs()
         done=self.is_done()
         reward= self.cal_reward(done)
@@ -270,8 +262,7 @@ class AirSimDroneEnv(AirSimEnv):
 
     def is_crashed(self):
         is_crashed = False
-        collision_info = self.drone.simGetCollisionInfo()
-        if collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
+        if self.collision_info.has_collided or self.min_distance_to_obstacles < self.crash_distance:
             is_crashed = True
             # print("self.min_distance_to_obstacles",self.min_distance_to_obstacles)
         return is_crashed
@@ -287,7 +278,7 @@ class AirSimDroneEnv(AirSimEnv):
         return math.sqrt(pow(relative_pose_x, 2) + pow(relative_pose_y, 2))
 
     def get_position(self):
-        position = self.drone.simGetVehiclePose().position
+        position = self.multirotor_state.kinematics_estimated.position
         return [position.x_val, position.y_val, -position.z_val]
 
 
@@ -358,6 +349,7 @@ class AirSimDroneEnv(AirSimEnv):
 
         self.drone.takeoffAsync().join()
         self.drone.moveToZAsync(-self.start_position[2], 2).join()
+        self.refresh_state()
 
         self.episode_num += 1
         self.step_num = 0
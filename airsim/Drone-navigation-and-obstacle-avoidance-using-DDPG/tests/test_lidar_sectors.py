@@ -0,0 +1,91 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(variant):
+    # Load the module by path: importing airgym.envs pulls in gym and airsim.
+    path = os.path.join(ROOT, variant, "airgym", "envs", "lidar_sectors.py")
+    spec = importlib.util.spec_from_file_location("lidar_sectors_" + variant.replace("+", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.LidarSectorBinner
+
+
+@pytest.fixture(params=["Lidar", "Lidar+Depth"])
+def binner_cls(request):
+    return _load(request.param)
+
+
+def _reference(points, edges, reduce, empty_distance):
+    """Per-point loop equivalent of LidarSectorBinner.distances."""
+    groups = [[] for _ in range(len(edges) - 1)]
+    for x, y, _ in np.asarray(points, dtype=np.float32):
+        angle = np.degrees(np.arctan2(y, x))
+        for i in range(len(edges) - 1):
+            if edges[i] <= angle < edges[i + 1]:
+                groups[i].append(np.hypot(x, y))
+                break
+    result = []
+    for group in groups:
+        if not group:
+            result.append(empty_distance)
+        elif reduce == "mean":
+            result.append(np.mean(group))
+        elif reduce == "min":
+            result.append(np.min(group))
+        else:
+            result.append(np.percentile(group, reduce))
+    return np.array(result)
+
+
+@pytest.mark.parametrize("reduce", ["mean", "min", 5])
+def test_distances_match_reference(binner_cls, reduce):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-20, 20, (500, 3))
+    binner = binner_cls(edges=(-90, -45, -10, 10, 45, 90), reduce=reduce, empty_distance=25.0)
+    expected = _reference(points, binner.edges, reduce, 25.0)
+    np.testing.assert_allclose(binner.distances(points), expected, rtol=1e-5)
+
+
+def test_known_points(binner_cls):
+    binner = binner_cls()
+    points = [
+        [3, 4, 0],    # 53 deg -> sector 2, distance 5
+        [1, 0, -2],   # straight ahead -> sector 1, distance 1
+        [3, 0, 5],    # straight ahead -> sector 1, distance 3
+        [-1, 0, 0],   # behind -> ignored
+    ]
+    sectors, distances = binner.assign(points)
+    np.testing.assert_array_equal(sectors, [2, 1, 1])
+    np.testing.assert_allclose(distances, [5, 1, 3])
+    np.testing.assert_allclose(binner.distances(points), [10.0, 2.0, 5.0])
+    split = binner.split(points)
+    assert [len(s) for s in split] == [0, 2, 1]
+
+
+def test_empty_cloud(binner_cls):
+    binner = binner_cls.uniform(4, reduce="min", empty_distance=7.0)
+    assert binner.num_sectors == 4
+    np.testing.assert_array_equal(binner.distances(np.zeros((0, 3))), [7.0] * 4)
+    # AirSim returns a flat list of floats; an empty scan is an empty list
+    np.testing.assert_array_equal(binner.distances([]), [7.0] * 4)
+
+
+def test_uniform_edges(binner_cls):
+    np.testing.assert_allclose(binner_cls.uniform(3, fov=90).edges, [-45, -15, 15, 45])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"edges": (0,)},
+    {"edges": (10, 0, 20)},
+    {"edges": (0, 0, 10)},
+    {"reduce": "median"},
+])
+def test_invalid_arguments(binner_cls, kwargs):
+    with pytest.raises(ValueError):
+        binner_cls(**kwargs)
@@ -28,40 +28,29 @@ import tempfile
 }
 """
 
-# connect to the AirSim simulator
-client = airsim.MultirotorClient()
-client.confirmConnection()
-client.enableApiControl(True, "Drone1")
-client.enableApiControl(True, "Drone2")
-client.armDisarm(True, "Drone1")
-client.armDisarm(True, "Drone2")
+# connect to the AirSim simulator, one connection per drone
+pool = airsim.MultirotorClientPool(["Drone1", "Drone2"])
+pool.confirmConnection()
+pool.enableApiControl(True)
+pool.armDisarm(True)
 
 airsim.wait_key('Press any key to takeoff')
-f1 = client.takeoffAsync(vehicle_name="Drone1")
-f2 = client.takeoffAsync(vehicle_name="Drone2")
-f1.join()
-f2.join()
-
-state1 = client.getMultirotorState(vehicle_name="Drone1")
-s = pprint.pformat(state1)
-print("state: %s" % s)
-state2 = client.getMultirotorState(vehicle_name="Drone2")
-s = pprint.pformat(state2)
-print("state: %s" % s)
+pool.takeoffAsync().join()
+
+for vehicle_name, state in pool.getMultirotorStates().items():
+    s = pprint.pformat(state)
+    print("%s state: %s" % (vehicle_name, s))
 
 airsim.wait_key('Press any key to move vehicles')
-f1 = client.moveToPositionAsync(-5, 5, -10, 5, vehicle_name="Drone1")
-f2 = client.moveToPositionAsync(5, -5, -10, 5, vehicle_name="Drone2")
-f1.join()
-f2.join()
+pool.moveToPositionAsync({"Drone1": (-5, 5, -10), "Drone2": (5, -5, -10)}, 5).join()
 
 airsim.wait_key('Press any key to take images')
 # get camera images from the car
-responses1 = client.simGetImages([
+responses1 = pool.client("Drone1").simGetImages([
     airsim.ImageRequest("0", airsim.ImageType.DepthVis),  #depth visualization image
     airsim.ImageRequest("1", airsim.ImageType.Scene, False, False)], vehicle_name="Drone1")  #scene vision image in uncompressed RGB array
 print('Drone1: Retrieved images: %d' % len(responses1))
-responses2 = client.simGetImages([
+responses2 = pool.client("Drone2").simGetImages([
     airsim.ImageRequest("0", airsim.ImageType.DepthVis),  #depth visualization image
     airsim.ImageRequest("1", airsim.ImageType.Scene, False, False)], vehicle_name="Drone2")  #scene vision image in uncompressed RGB array
 print('Drone2: Retrieved images: %d' % len(responses2))
@@ -92,12 +81,10 @@ for idx, response in enumerate(responses1 + responses2):
 
 airsim.wait_key('Press any key to reset to original state')
 
-client.armDisarm(False, "Drone1")
-client.armDisarm(False, "Drone2")
-client.reset()
+pool.armDisarm(False)
+pool.reset()
 
 # that's enough fun for now. let's quit cleanly
-client.enableApiControl(False, "Drone1")
-client.enableApiControl(False, "Drone2")
+pool.enableApiControl(False)
 
 
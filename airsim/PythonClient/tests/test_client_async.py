@@ -0,0 +1,148 @@
+import functools
+import socket
+import threading
+import types
+
+import numpy as np
+import pytest
+
+msgpackrpc = pytest.importorskip("msgpackrpc")
+import airsim  # noqa: E402
+
+
+def _image(width, height, uint8 = b"", floats = (), compress = False):
+    return {
+        'image_data_uint8': uint8, 'image_data_float': list(floats),
+        'camera_position': airsim.Vector3r().to_msgpack(), 'camera_orientation': airsim.Quaternionr().to_msgpack(),
+        'time_stamp': 0, 'message': '', 'pixels_as_float': bool(floats), 'compress': compress,
+        'width': width, 'height': height, 'image_type': 0,
+    }
+
+
+class _FakeSim(object):
+    """Minimal stand-in for the AirSim RPC server: records calls, answers from canned data"""
+    def __init__(self):
+        self.calls = []
+
+    def _record(self, *call):
+        self.calls.append(call)
+
+    def ping(self):
+        self._record('ping')
+        return True
+
+    def simGetImages(self, requests, vehicle_name, external):
+        self._record('simGetImages', vehicle_name)
+        return [_image(3, 2, bytes(bytearray(range(18)))),
+                _image(2, 2, floats = [0.5, 1.5, 2.5, 3.5]),
+                _image(0, 0)]
+
+    def simGetCollisionInfo(self, vehicle_name):
+        self._record('simGetCollisionInfo', vehicle_name)
+        info = airsim.CollisionInfo()
+        info.has_collided = vehicle_name == 'Drone2'
+        info.object_name = vehicle_name
+        return info.to_msgpack()
+
+    def armDisarm(self, arm, vehicle_name):
+        self._record('armDisarm', vehicle_name)
+        return arm
+
+
+@pytest.fixture(scope = "module")
+def sim():
+    # The simulator (rpclib) sends std::vector<uint8_t> as msgpack bin, which the client decodes to bytes;
+    # msgpackrpc packs bytes as legacy raw unless the packer uses the bin type
+    import msgpack
+    patch = pytest.MonkeyPatch()
+    patch.setattr(msgpackrpc.transport.tcp, 'msgpack', types.SimpleNamespace(
+        Packer = functools.partial(msgpack.Packer, use_bin_type = True), Unpacker = msgpack.Unpacker))
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    fake = _FakeSim()
+    server = msgpackrpc.Server(fake, pack_encoding = 'utf-8', unpack_encoding = 'utf-8')
+    server.listen(msgpackrpc.Address('127.0.0.1', port))
+    thread = threading.Thread(target = server.start)
+    thread.daemon = True
+    thread.start()
+    fake.port = port
+    yield fake
+    server.stop()
+    thread.join(5)
+    patch.undo()
+
+
+@pytest.fixture
+def client(sim):
+    del sim.calls[:]
+    client = airsim.MultirotorClient(port = sim.port, timeout_value = 10)
+    yield client
+    client.client.close()
+
+
+def test_call_async_returns_raw_reply(client):
+    future = client.call_async('ping')
+    assert isinstance(future, airsim.RpcFuture)
+    assert future.get() is True
+
+
+def test_gather_keeps_request_order(client, sim):
+    futures = [client.simGetCollisionInfoAsync('Drone%d' % i) for i in range(1, 4)]
+    futures.insert(1, client.call_async('ping'))
+    first, pong, second, third = client.gather(*futures)
+    assert pong is True
+    assert [info.object_name for info in (first, second, third)] == ['Drone1', 'Drone2', 'Drone3']
+    assert second.has_collided and not first.has_collided
+    assert [call[-1] for call in sim.calls] == ['Drone1', 'Drone2', 'Drone3', 'ping']
+
+
+def test_blocking_and_async_getters_agree(client):
+    info = client.simGetCollisionInfo('Drone2')
+    assert isinstance(info, airsim.CollisionInfo)
+    assert info.__dict__ == client.simGetCollisionInfoAsync('Drone2').get().__dict__
+
+
+def test_sim_get_images_numpy(client):
+    rgb, depth, missing = client.simGetImagesNumpy([airsim.ImageRequest('0', airsim.ImageType.Scene, False, False)])
+    assert rgb.shape == (2, 3, 3) and rgb.dtype == np.uint8
+    np.testing.assert_array_equal(rgb.ravel(), np.arange(18))
+    assert depth.shape == (2, 2, 1) and depth.dtype == np.float32
+    np.testing.assert_array_equal(depth[:, :, 0], [[0.5, 1.5], [2.5, 3.5]])
+    assert missing is None
+
+    responses = client.simGetImages([airsim.ImageRequest('0', airsim.ImageType.Scene)])
+    np.testing.assert_array_equal(airsim.image_response_to_array(responses[0]), rgb)
+    np.testing.assert_array_equal(airsim.get_pfm_array(responses[1]), depth[:, :, 0])
+
+
+def test_image_response_to_array_compressed():
+    encoded = bytes(bytearray([137, 80, 78, 71]))
+    data = airsim.image_response_to_array(_image(640, 480, encoded, compress = True))
+    np.testing.assert_array_equal(data, [137, 80, 78, 71])
+    assert not data.flags.writeable
+
+
+def test_float_list_to_array():
+    np.testing.assert_array_equal(airsim.float_list_to_array([1.0, 2.5]), np.array([1.0, 2.5], np.float32))
+    assert airsim.float_list_to_array(np.ones((2, 2))).dtype == np.float32
+    assert airsim.list_to_2d_float_array(range(6), 3, 2).shape == (2, 3)
+
+
+def test_pool_routes_and_fans_out(sim):
+    del sim.calls[:]
+    pool = airsim.MultirotorClientPool(['Drone1', 'Drone2', 'Drone3'], port = sim.port, timeout_value = 10, pool_size = 2)
+    try:
+        assert len(pool.clients) == 2
+        assert pool.client('Drone1') is pool.client('Drone3') is not pool.client('Drone2')
+        infos = pool.simGetCollisionInfos()
+        assert sorted(infos) == ['Drone1', 'Drone2', 'Drone3']
+        assert [name for name, info in sorted(infos.items()) if info.has_collided] == ['Drone2']
+        assert pool.armDisarm(True, ['Drone2']) == {'Drone2': True}
+    finally:
+        pool.close()
+    with pytest.raises(ValueError):
+        airsim.MultirotorClientPool([])
@@ -1,13 +1,101 @@
 # backend/algorithms/attacks/base.py
+import copy
 from abc import ABC, abstractmethod
 import torch
 
+# 攻击循环支持的计算精度 -> autocast 数据类型（fp32 不使用 autocast）
+ATTACK_PRECISIONS = {"fp32": None, "bf16": torch.bfloat16, "fp16": torch.float16}
+
+
 class BaseAttack(ABC):
     """所有攻击算法的基类"""
     
+    # 执行模式（默认与 fp32 基线一致），通过 set_execution_mode() 修改
+    precision = "fp32"
+    channels_last = False
+    compile_model = False
+    # fp16 下损失的放大倍数，避免输入梯度下溢（攻击只使用梯度符号，无需还原）
+    loss_scale = 1024.0
+    
     def __init__(self, name):
         self.name = name
     
+    def set_execution_mode(self, precision="fp32", channels_last=False, compile_model=False):
+        """
+        设置攻击循环的执行模式
+        
+        参数:
+            precision: 计算精度 (fp32 / bf16 / fp16)，非 fp32 时前向在 autocast 下执行
+            channels_last: 是否使用 channels_last 内存格式
+            compile_model: 是否使用 torch.compile 编译攻击循环中的网络
+        """
+        if precision not in ATTACK_PRECISIONS:
+            raise ValueError(f"不支持的计算精度: {precision}，可选: {', '.join(ATTACK_PRECISIONS)}")
+        self.precision = precision
+        self.channels_last = bool(channels_last)
+        self.compile_model = bool(compile_model)
+        self._compiled = {}
+        return self
+    
+    @property
+    def is_fp32_baseline(self):
+        """当前执行模式是否与 fp32 基线完全一致"""
+        return self.precision == "fp32" and not self.channels_last and not self.compile_model
+    
+    def fp32_reference(self):
+        """返回参数相同、使用 fp32 基线执行模式的攻击副本，用于精度一致性对比"""
+        reference = copy.copy(self)
+        reference.set_execution_mode()
+        return reference
+    
+    def _network(self, model):
+        """
+        返回攻击循环中使用的网络：移动到攻击设备并设为 eval 模式，
+        按执行模式转换内存格式，需要时编译（每个网络只准备一次）
+
+        channels_last 只作用于网络副本：model.model 可能是 ModelManager 缓存的共享模型，
+        原地转换会影响 fp32 基线对比以及同一进程中的后续任务
+        """
+        network = model.model
+        network.to(self.device)
+        network.eval()
+        if not self.channels_last and not self.compile_model:
+            return network
+        prepared = self.__dict__.setdefault("_compiled", {})
+        entry = prepared.get(id(network))
+        if entry is None or entry[0] is not network:
+            attack_network = network
+            if self.channels_last:
+                attack_network = copy.deepcopy(network).to(memory_format=torch.channels_last)
+                # 攻击只需要输入梯度，副本参数不再累积梯度
+                attack_network.requires_grad_(False)
+            if self.compile_model:
+                attack_network = torch.compile(attack_network)
+            entry = (network, attack_network)
+            prepared[id(network)] = entry
+        return entry[1]
+    
+    def _forward(self, network, images):
+        """按执行模式前向计算，返回 fp32 的预测张量"""
+        if self.channels_last:
+            images = images.contiguous(memory_format=torch.channels_last)
+        dtype = ATTACK_PRECISIONS[self.precision]
+        if dtype is None:
+            preds = network(images)
+        else:
+            with torch.autocast(device_type=self.device.type, dtype=dtype):
+                preds = network(images)
+        # 如果模型返回的是元组或列表, 取第一个张量
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        return preds.float()
+    
+    def _backward(self, loss):
+        """反向传播；fp16 下放大损失以避免梯度下溢"""
+        if self.precision == "fp16":
+            loss = loss * self.loss_scale
+        loss.backward()
+    
     @abstractmethod
     def attack(self, model, images, targets=None, **kwargs):
         """
@@ -9,15 +9,20 @@ class FGSMAttack(BaseAttack):
         steps (int): Number of steps for the attack.
         input_size (int or None): If not None, images will be resized to square input_size before attack
             to avoid mismatch with YOLO detection heads. After attack, images will be resized back.
+        precision (str): Attack compute precision (fp32 / bf16 / fp16).
+        channels_last (bool): Run the forward pass in channels_last memory format.
+        compile_model (bool): Compile the network with torch.compile.
     """
 
-    def __init__(self, eps=8/255, steps=1, input_size=640):
+    def __init__(self, eps=8/255, steps=1, input_size=640, precision="fp32", channels_last=False,
+                 compile_model=False):
         super().__init__(name="fgsm")
         self.eps = eps
         self.steps = steps
         self.alpha = eps
         self.input_size = input_size
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.set_execution_mode(precision, channels_last, compile_model)
 
     # Alias so load_attack can find the class even if different name
     # (AdversarialEvaluator's dynamic loader looks for subclass of BaseAttack)
@@ -41,19 +46,16 @@ class FGSMAttack(BaseAttack):
         images.requires_grad = True
 
         # Ensure model on correct device
-        model.model.to(self.device)
-        model.model.eval()
+        network = self._network(model)
 
-        preds = model.model(images)
-        if isinstance(preds, (list, tuple)):
-            preds = preds[0]
+        preds = self._forward(network, images)
         obj_conf = preds[..., 4]  # objectness score
         loss = -obj_conf.mean()
 
         model.model.zero_grad()
         if images.grad is not None:
             images.grad.zero_()
-        loss.backward()
+        self._backward(loss)
 
         grad_sign = images.grad.data.sign()
         adv_images = images.detach() + self.eps * grad_sign
@@ -13,9 +13,19 @@ class PGDAttack(BaseAttack):
         steps: 迭代步数
         random_start: 是否随机初始化
         input_size: 输入图像的固定尺寸
+        early_stop: 是否按样本提前终止，已成功的样本不再参与后续前向/反向计算
+        stop_conf: 成功判据，样本的最大检测置信度低于该值即视为攻击成功
+            （通常取评估时的 conf_threshold），为None时不使用该判据
+        stop_tol: 收敛判据，样本损失（负置信度，攻击使其增大）单步增幅小于该值即视为已饱和，
+            为None时不使用
+        precision: 攻击循环的计算精度 (fp32 / bf16 / fp16)
+        channels_last: 是否使用 channels_last 内存格式
+        compile_model: 是否使用 torch.compile 编译网络
     """
     
-    def __init__(self, eps=8/255, alpha=2/255, steps=10, random_start=True, input_size=640):
+    def __init__(self, eps=8/255, alpha=2/255, steps=10, random_start=True, input_size=640,
+                 early_stop=False, stop_conf=0.25, stop_tol=None, precision="fp32",
+                 channels_last=False, compile_model=False):
         super().__init__(name="PGD")
         self.eps = eps
         self.alpha = alpha
@@ -23,8 +33,28 @@ class PGDAttack(BaseAttack):
         self.random_start = random_start
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.input_size = input_size
+        self.early_stop = early_stop
+        self.stop_conf = stop_conf
+        self.stop_tol = stop_tol
+        # 最近一次 attack() 中每个样本实际执行的迭代步数
+        self.last_steps_run = None
+        self.set_execution_mode(precision, channels_last, compile_model)
     
-    def attack(self, model, images, targets=None, **kwargs):
+    @staticmethod
+    def _max_confidence(preds):
+        """
+        每个样本的最大检测置信度
+        
+        YOLOv8 输出为 (B, 4+nc, N)，取类别得分的最大值；
+        带 objectness 的 (B, N, 5+nc) 格式取第 4 列的最大值。
+        """
+        if preds.dim() == 3 and preds.shape[1] < preds.shape[2]:
+            scores = preds[:, 4:, :]
+        else:
+            scores = preds[..., 4]
+        return scores.flatten(1).amax(dim=1)
+    
+    def attack(self, model, images, targets=None, init_images=None, **kwargs):
         """
         执行PGD攻击 (针对YOLO模型的修改版本)
         
@@ -32,6 +62,8 @@ class PGDAttack(BaseAttack):
             model: 目标模型 (YOLO)
             images: 输入图像 (B, C, H, W)
             targets: 目标标签 (不使用)
+            init_images: 热启动的初始对抗样本 (与 images 同形状，例如较小 eps 的攻击结果)，
+                会被投影到当前 eps 球内并代替随机初始化
             
         返回:
             对抗样本
@@ -46,9 +78,15 @@ class PGDAttack(BaseAttack):
         # 保存原始图像
         ori_images = images.clone().detach()
         
-        # 随机初始化
-        if self.random_start:
-            # 在[-eps, eps]范围内随机初始化
+        if init_images is not None:
+            # 热启动：从已有对抗样本出发，投影到当前 ε-ball
+            init_images = init_images.detach().to(self.device)
+            if init_images.shape[-2:] != images.shape[-2:]:
+                init_images = torch.nn.functional.interpolate(init_images, size=images.shape[-2:], mode="bilinear", align_corners=False)
+            eta = torch.clamp(init_images - ori_images, min=-self.eps, max=self.eps)
+            images = torch.clamp(ori_images + eta, 0, 1).detach()
+        elif self.random_start:
+            # 随机初始化：在[-eps, eps]范围内
             delta = torch.rand_like(images)
             delta = (2 * delta - 1) * self.eps
             # 确保扰动后的图像仍在[0,1]范围内
@@ -56,41 +94,59 @@ class PGDAttack(BaseAttack):
         
         # 使用梯度信息进行标准PGD攻击
         # 将模型设置为评估模式并禁用不必要的梯度
-        model.model.to(self.device)
-        model.model.eval()
+        network = self._network(model)
+        
+        # 仍在迭代的样本下标；提前终止的样本不再参与前向/反向计算
+        active = torch.arange(images.shape[0], device=self.device)
+        steps_run = torch.zeros(images.shape[0], dtype=torch.long)
+        prev_loss = torch.full((images.shape[0],), float("-inf"), device=self.device)
         
         for _ in range(self.steps):
-            images.requires_grad = True
+            if active.numel() == 0:
+                break
+            batch = images[active].clone().requires_grad_(True)
             # 前向传播获取原始预测 (使用模型底层以便保留梯度)
-            preds = model.model(images)
-            # 如果模型返回的是元组或列表, 取第一个张量
-            if isinstance(preds, (list, tuple)):
-                preds = preds[0]
+            preds = self._forward(network, batch)
             
             # 目标: 减少检测置信度 -> 最大化负的 objectness 分数
             # YOLO 输出张量格式: (..., 4) 通常是 objectness 置信度
             obj_conf = preds[..., 4]
             loss = -obj_conf.mean()
             
-            # 反向传播计算梯度
+            # 判断哪些样本已经成功或收敛（按当前图像，在本步更新之前）
+            done = torch.zeros(active.numel(), dtype=torch.bool, device=self.device)
+            if self.early_stop:
+                with torch.no_grad():
+                    if self.stop_conf is not None:
+                        done |= self._max_confidence(preds) < self.stop_conf
+                    if self.stop_tol is not None:
+                        sample_loss = -obj_conf.reshape(active.numel(), -1).mean(dim=1)
+                        done |= (sample_loss - prev_loss[active]) < self.stop_tol
+                        prev_loss[active] = sample_loss
+            
+            # 反向传播计算梯度（各样本的梯度相互独立，掩码不影响剩余样本的更新方向）
             model.model.zero_grad()
-            if images.grad is not None:
-                images.grad.zero_()
-            loss.backward()
+            self._backward(loss)
             
             # 根据梯度方向更新图像 (增加对 None 的健壮性处理)
-            grad = images.grad
+            grad = batch.grad
             if grad is None:
                 # 极端情况下梯度可能为空（例如 forward 被截断或 OOM 被清理），
                 # 这里回退为零梯度，保证攻击流程不断；也可以选择 break。
-                grad = torch.zeros_like(images)
-
-            grad_sign = grad.data.sign()
-            images = images.detach() + self.alpha * grad_sign
+                grad = torch.zeros_like(batch)
+            
+            keep = ~done
+            active = active[keep]
+            if active.numel() == 0:
+                break
+            updated = images[active] + self.alpha * grad[keep].sign()
             
             # 投影到 ε-ball 并裁剪到合法像素范围 [0,1]
-            eta = torch.clamp(images - ori_images, min=-self.eps, max=self.eps)
-            images = torch.clamp(ori_images + eta, 0, 1).detach()
+            eta = torch.clamp(updated - ori_images[active], min=-self.eps, max=self.eps)
+            images[active] = torch.clamp(ori_images[active] + eta, 0, 1).detach()
+            steps_run[active.cpu()] += 1
+        
+        self.last_steps_run = steps_run.tolist()
         
         # 还原到原始分辨率（与原图一致，便于后续可视化差分）
         if self.input_size is not None and images.shape[-2:] != orig_size:
@@ -1,11 +1,69 @@
+import os
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def _get_batch_pool():
+    """防御算法共享的线程池（OpenCV 处理时会释放 GIL）"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            workers = int(os.getenv("SKYGUARD_DEFENSE_THREADS", str(min(8, os.cpu_count() or 1))))
+            _batch_pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        return _batch_pool
+
 
 class BaseDefense(ABC):
     """所有防御算法的基类"""
     
+    # 子类的 _transform_tensor 是否可以直接求导；否则默认使用 BPDA
+    differentiable = False
+    
     def __init__(self, name):
         self.name = name
     
+    def differentiable_forward(self, images, bpda=None):
+        """
+        在计算图中执行防御，使攻击可以端到端地穿过防御求梯度
+        
+        参数:
+            images: (B, C, H, W) 或 (C, H, W) 张量，取值 [0, 1]
+            bpda: 是否使用 BPDA（前向为防御结果，反向按恒等映射传递梯度）；
+                为None时，可求导的防御使用真实梯度，其余使用 BPDA
+                
+        返回:
+            防御后的张量（保留到 images 的梯度）
+        """
+        if bpda is None:
+            bpda = not self.differentiable
+        if not bpda and hasattr(self, "_transform_tensor"):
+            return self._transform_tensor(images)
+        # Straight-through: 前向值等于防御结果，梯度直接传给输入
+        defended = self.defend(images.detach()).to(images.dtype)
+        return images + (defended - images).detach()
+    
+    @staticmethod
+    def map_batch(fn, batch):
+        """
+        对批量中的每张图像并行执行 fn 并堆叠结果
+        
+        参数:
+            fn: 处理单张图像的函数
+            batch: 可迭代的图像序列 (例如 NHWC 数组)
+            
+        返回:
+            堆叠后的 numpy 数组
+        """
+        if len(batch) <= 1:
+            return np.stack([fn(x) for x in batch], axis=0)
+        return np.stack(list(_get_batch_pool().map(fn, batch)), axis=0)
+    
     @abstractmethod
     def defend(self, images, **kwargs):
         """
@@ -49,7 +49,10 @@ class BitDepthReductionDefense(BaseDefense):
         raise ValueError("Unsupported numpy shape; expect HWC/NHWC or CHW/NCHW converted beforehand")
 
     def _defend_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
-        device = tensor.device
-        arr = tensor.detach().cpu().numpy()
-        quant = self._quantize(arr)
-        return torch.from_numpy(quant).to(device).type_as(tensor) 
\ No newline at end of file
+        """Quantize on the tensor's own device without a host round-trip."""
+        if tensor.is_floating_point():
+            # assume float [0,1]; quantize in place on a detached copy
+            return tensor.detach().mul(self.levels).round_().div_(self.levels)
+        # integer tensors hold 0-255 values
+        factor = 255 / self.levels
+        return tensor.detach().double().div_(factor).round_().mul_(factor).type_as(tensor)
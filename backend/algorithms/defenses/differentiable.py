@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+"""Defense + model pipelines that attacks can differentiate through.
+
+Adaptive (white-box) evaluation of an input-transformation defense requires
+the attack to see ``model(defense(x))`` rather than ``model(x)``. The
+:class:`DefendedModel` wrapper exposes exactly the interface the attacks in
+``algorithms.attacks`` use (``.model`` as an ``nn.Module``), so an existing
+attack runs end to end through the defense in one batched graph.
+
+Usage example
+-------------
+>>> from algorithms.attacks.pgd import PGDAttack
+>>> from algorithms.defenses import JPEGCompressionDefense
+>>> from algorithms.defenses.differentiable import DefendedModel
+>>> defended = DefendedModel(yolo, JPEGCompressionDefense(quality=75))  # BPDA
+>>> adv = PGDAttack(eps=8/255)(defended, images)
+>>> results = defended.predict(adv_numpy_image)
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+import torch
+
+from .base import BaseDefense
+
+__all__ = ["DefendedNetwork", "DefendedModel"]
+
+
+class DefendedNetwork(torch.nn.Module):
+    """``nn.Module`` computing ``network(defense(images))`` with gradients.
+
+    Parameters
+    ----------
+    defense : BaseDefense
+        Input-transformation defense.
+    network : torch.nn.Module
+        Underlying detection network (e.g. ``YOLO(...).model``).
+    bpda : bool or None, optional (default=None)
+        Force BPDA (straight-through) gradients (``True``) or the defense's
+        own gradients (``False``). ``None`` picks BPDA only for defenses that
+        are not differentiable (JPEG, bit-depth reduction, median blur).
+    """
+
+    def __init__(self, defense: BaseDefense, network: torch.nn.Module, bpda: Optional[bool] = None):
+        super().__init__()
+        self.defense = defense
+        self.network = network
+        self.bpda = bpda
+
+    def forward(self, images: torch.Tensor, *args: Any, **kwargs: Any):
+        return self.network(self.defense.differentiable_forward(images, bpda=self.bpda), *args, **kwargs)
+
+
+class DefendedModel:
+    """Wrap an Ultralytics ``YOLO`` object so that attacks and inference both see the defense.
+
+    Attributes not defined here (``names``, ``overrides``...) are forwarded to
+    the wrapped model.
+    """
+
+    def __init__(self, yolo: Any, defense: BaseDefense, bpda: Optional[bool] = None):
+        self.yolo = yolo
+        self.defense = defense
+        self.model = DefendedNetwork(defense, yolo.model, bpda=bpda)
+
+    def predict(self, source: Any, **kwargs: Any):
+        """Apply the defense to numpy image(s) and run the wrapped model's ``predict``."""
+        if isinstance(source, np.ndarray):
+            source = np.ascontiguousarray(self.defense(source))
+        elif isinstance(source, (list, tuple)):
+            source = [np.ascontiguousarray(self.defense(s)) if isinstance(s, np.ndarray) else s for s in source]
+        return self.yolo.predict(source, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.yolo, name)
@@ -33,6 +33,9 @@ class GaussianBlurDefense(BaseDefense):
         Sigma; ``0`` lets OpenCV estimate it from *ksize*.
     """
 
+    # Blurring is a linear filter, so gradients flow through it exactly
+    differentiable = True
+
     def __init__(self, ksize: int = 3, sigma: float = 0.0):
         ksize = ksize + 1 if ksize % 2 == 0 else ksize  # ensure odd
         super().__init__(name="gaussian_blur")
@@ -61,25 +64,38 @@ class GaussianBlurDefense(BaseDefense):
         if arr.ndim == 3:  # HWC
             return self._blur_single(arr)
         elif arr.ndim == 4:  # NHWC
-            return np.stack([self._blur_single(x) for x in arr], axis=0)
+            return self.map_batch(self._blur_single, arr)
         else:
             raise ValueError("Unsupported numpy shape; expect HWC or NHWC")
 
+    def _kernel_1d(self) -> torch.Tensor:
+        """1-D Gaussian kernel, taken from OpenCV so both paths blur identically."""
+        kernel = cv2.getGaussianKernel(self.ksize, self.sigma, cv2.CV_32F)
+        return torch.from_numpy(kernel.ravel().copy())
+
     def _defend_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
-        device = tensor.device
-        arr = tensor.detach().cpu().numpy()
-        if arr.ndim == 3:  # CHW
-            img = arr.transpose(1, 2, 0)
-            img_blur = self._blur_single(img)
-            arr_blur = img_blur.transpose(2, 0, 1)
-        elif arr.ndim == 4:  # NCHW
-            imgs = []
-            for x in arr:
-                img = x.transpose(1, 2, 0)
-                img_blur = self._blur_single(img)
-                imgs.append(img_blur.transpose(2, 0, 1))
-            arr_blur = np.stack(imgs, axis=0)
-        else:
+        return self._transform_tensor(tensor.detach())
+
+    def _transform_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Batched separable Gaussian blur on the tensor's own device (differentiable)."""
+        if tensor.ndim not in (3, 4):
             raise ValueError("Unsupported tensor shape; expect CHW or NCHW")
-        blur_tensor = torch.from_numpy(arr_blur).to(device).type_as(tensor)
-        return blur_tensor 
\ No newline at end of file
+        x = tensor.unsqueeze(0) if tensor.ndim == 3 else tensor
+        x = x.float() if not x.is_floating_point() else x
+        channels = x.shape[1]
+        pad = self.ksize // 2
+
+        kernel = self._kernel_1d().to(device=x.device, dtype=x.dtype)
+        kernel_h = kernel.view(1, 1, 1, -1).repeat(channels, 1, 1, 1)
+        kernel_v = kernel.view(1, 1, -1, 1).repeat(channels, 1, 1, 1)
+
+        # cv2 default border is BORDER_REFLECT_101, i.e. torch "reflect"
+        out = torch.nn.functional.pad(x, (pad, pad, 0, 0), mode="reflect")
+        out = torch.nn.functional.conv2d(out, kernel_h, groups=channels)
+        out = torch.nn.functional.pad(out, (0, 0, pad, pad), mode="reflect")
+        out = torch.nn.functional.conv2d(out, kernel_v, groups=channels)
+
+        if not tensor.is_floating_point():
+            out = out.round()
+        out = out.type_as(tensor)
+        return out[0] if tensor.ndim == 3 else out
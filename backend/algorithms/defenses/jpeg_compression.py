@@ -54,25 +54,20 @@ class JPEGCompressionDefense(BaseDefense):
         if arr.ndim == 3:
             return self._jpeg_single(arr)
         elif arr.ndim == 4:
-            return np.stack([self._jpeg_single(x) for x in arr], axis=0)
+            return self.map_batch(self._jpeg_single, arr)
         else:
             raise ValueError("Unsupported numpy shape; expect HWC or NHWC")
 
     def _defend_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
+        """JPEG has no native torch codec; encode the batch on the shared thread pool."""
         device = tensor.device
+        # Convert CHW/NCHW to HWC on the host once for the whole batch
         arr = tensor.detach().cpu().numpy()
-        # Convert CHW/NCHW to HWC
         if arr.ndim == 3:
-            img = arr.transpose(1, 2, 0)
-            out = self._jpeg_single(img)
-            arr_out = out.transpose(2, 0, 1)
+            arr_out = self._jpeg_single(arr.transpose(1, 2, 0)).transpose(2, 0, 1)
         elif arr.ndim == 4:
-            imgs = []
-            for x in arr:
-                img = x.transpose(1, 2, 0)
-                imgs.append(self._jpeg_single(img).transpose(2, 0, 1))
-            arr_out = np.stack(imgs, axis=0)
+            arr_out = self.map_batch(self._jpeg_single, arr.transpose(0, 2, 3, 1)).transpose(0, 3, 1, 2)
         else:
             raise ValueError("Unsupported tensor shape; expect CHW or NCHW")
-        result = torch.from_numpy(arr_out).to(device).type_as(tensor)
-        return result 
\ No newline at end of file
+        result = torch.from_numpy(np.ascontiguousarray(arr_out)).to(device).type_as(tensor)
+        return result
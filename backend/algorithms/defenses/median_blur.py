@@ -43,24 +43,39 @@ class MedianBlurDefense(BaseDefense):
         if arr.ndim == 3:
             return self._blur_single(arr)
         elif arr.ndim == 4:
-            return np.stack([self._blur_single(x) for x in arr], axis=0)
+            return self.map_batch(self._blur_single, arr)
         else:
             raise ValueError("Unsupported numpy shape; expect HWC or NHWC")
 
+    # Upper bound on elements of the unfolded (rows x W x k*k) window tensor
+    max_window_elements = 1 << 26
+
     def _defend_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
-        device = tensor.device
-        arr = tensor.detach().cpu().numpy()
-        if arr.ndim == 3:  # CHW
-            img = arr.transpose(1, 2, 0)
-            img_blur = self._blur_single(img)
-            arr_blur = img_blur.transpose(2, 0, 1)
-        elif arr.ndim == 4:
-            imgs = []
-            for x in arr:
-                img = x.transpose(1, 2, 0)
-                img_blur = self._blur_single(img)
-                imgs.append(img_blur.transpose(2, 0, 1))
-            arr_blur = np.stack(imgs, axis=0)
-        else:
+        return self._transform_tensor(tensor.detach())
+
+    def _transform_tensor(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Batched median filter via ``unfold`` on the tensor's own device.
+
+        The image is processed in horizontal stripes so that the unfolded
+        window tensor stays below ``max_window_elements``. Gradients (if any)
+        flow to the selected median pixel of every window.
+        """
+        if tensor.ndim not in (3, 4):
             raise ValueError("Unsupported tensor shape; expect CHW or NCHW")
-        return torch.from_numpy(arr_blur).to(device).type_as(tensor) 
\ No newline at end of file
+        x = tensor.unsqueeze(0) if tensor.ndim == 3 else tensor
+        k = self.ksize
+        pad = k // 2
+        n, c, h, w = x.shape
+
+        # cv2.medianBlur replicates the border
+        padded = torch.nn.functional.pad(x.float(), (pad, pad, pad, pad), mode="replicate").type_as(x)
+        rows = max(1, self.max_window_elements // max(1, n * c * w * k * k))
+
+        stripes = []
+        for top in range(0, h, rows):
+            bottom = min(h, top + rows)
+            stripe = padded[:, :, top:bottom + 2 * pad, :]
+            windows = stripe.unfold(2, k, 1).unfold(3, k, 1)  # N,C,rows,W,k,k
+            stripes.append(windows.reshape(n, c, bottom - top, w, k * k).median(dim=-1).values)
+        out = torch.cat(stripes, dim=2)
+        return out[0] if tensor.ndim == 3 else out
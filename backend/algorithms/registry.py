@@ -0,0 +1,268 @@
+# backend/algorithms/registry.py
+"""backend/algorithms/registry.py
+
+Registry of the attack and defense algorithms shipped in this package.
+
+Every ``algorithms/attacks/<name>.py`` and ``algorithms/defenses/<name>.py``
+module is discovered once per process by parsing its source, so discovery does
+not import torch/cv2 and the API process can validate requests cheaply. The
+concrete ``BaseAttack`` / ``BaseDefense`` subclass of each module is registered
+under the module name together with its constructor parameters. The class is
+imported on first use and cached; afterwards creating an algorithm is a dict
+lookup plus the constructor call.
+
+Usage example
+-------------
+>>> from algorithms.registry import ATTACKS, DEFENSES
+>>> attack = ATTACKS.create("pgd", eps=8/255, steps=10)
+>>> make_defense = DEFENSES.get("median_blur").factory(ksize=5)
+>>> defense = make_defense()
+"""
+
+from __future__ import annotations
+
+import ast
+import functools
+import importlib
+import numbers
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+class AlgorithmSpec:
+    """One registered algorithm: where its class lives and what its constructor accepts."""
+
+    def __init__(self, kind: str, name: str, module: str, class_name: str,
+                 parameters: Dict[str, Optional[str]], var_kwargs: bool = False,
+                 doc: Optional[str] = None) -> None:
+        self.kind = kind
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        # 参数名 -> 默认值源码（None 表示必填）
+        self.parameters = parameters
+        self.var_kwargs = var_kwargs
+        self.doc = doc
+        self._cls = None
+
+    @property
+    def required(self) -> List[str]:
+        return [p for p, default in self.parameters.items() if default is None]
+
+    @property
+    def cls(self) -> type:
+        """The algorithm class (imported once)."""
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.class_name)
+        return self._cls
+
+    def accepts(self, param: str) -> bool:
+        return self.var_kwargs or param in self.parameters
+
+    def validate(self, params: Dict[str, Any], ignore_unknown: bool = False) -> Dict[str, Any]:
+        """Check *params* against the constructor signature.
+
+        Raises ``ValueError`` for unknown (unless *ignore_unknown*, which drops
+        them) or missing parameters, and for values whose type does not match a
+        numeric/bool literal default. Returns the accepted parameters.
+        """
+        unknown = [k for k in params if not self.accepts(k)]
+        if unknown and not ignore_unknown:
+            raise ValueError(
+                f"{self.kind}算法 {self.name} 不支持参数: {', '.join(unknown)}，"
+                f"可用参数: {', '.join(self.parameters) or '无'}"
+            )
+        accepted = {k: v for k, v in params.items() if self.accepts(k)}
+        missing = [p for p in self.required if p not in accepted]
+        if missing:
+            raise ValueError(f"{self.kind}算法 {self.name} 缺少必填参数: {', '.join(missing)}")
+        mistyped = [f"{k}={v!r}" for k, v in accepted.items() if not self._matches_default(k, v)]
+        if mistyped:
+            raise ValueError(f"{self.kind}算法 {self.name} 参数类型错误: {', '.join(mistyped)}")
+        return accepted
+
+    def _matches_default(self, param: str, value: Any) -> bool:
+        """Whether *value* has the type of the parameter's literal default (non-literal defaults accept anything)."""
+        default = _literal_default(self.parameters.get(param))
+        if default is _NON_LITERAL or value is None:
+            return True
+        if isinstance(default, bool):
+            return isinstance(value, bool)
+        if isinstance(default, numbers.Integral):
+            return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+        if isinstance(default, numbers.Real):
+            return isinstance(value, numbers.Real) and not isinstance(value, bool)
+        return True
+
+    def factory(self, ignore_unknown: bool = False, **params: Any) -> Callable[[], Any]:
+        """Validate *params* once and return a zero-argument constructor."""
+        return functools.partial(self.cls, **self.validate(params, ignore_unknown))
+
+    def create(self, ignore_unknown: bool = False, **params: Any):
+        return self.factory(ignore_unknown, **params)()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "class": self.class_name,
+            "parameters": dict(self.parameters),
+            "doc": self.doc,
+        }
+
+
+class AlgorithmRegistry:
+    """Algorithms of one kind found in one sub-package (``attacks`` or ``defenses``)."""
+
+    def __init__(self, kind: str, subpackage: str, base_class: str) -> None:
+        self.kind = kind
+        self.subpackage = subpackage
+        self.base_class = base_class
+        self._specs: Optional[Dict[str, AlgorithmSpec]] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def discover(self, refresh: bool = False, import_classes: bool = False) -> Dict[str, AlgorithmSpec]:
+        """Scan the sub-package (once per process unless *refresh*).
+
+        With *import_classes* every class is also imported now, e.g. at
+        worker startup, so the first task does not pay for it.
+        """
+        with self._lock:
+            if self._specs is None or refresh:
+                self._specs = self._scan()
+            specs = self._specs
+        if import_classes:
+            for spec in specs.values():
+                spec.cls
+        return specs
+
+    def names(self) -> List[str]:
+        return sorted(self.discover())
+
+    def get(self, name: str) -> AlgorithmSpec:
+        spec = self.discover().get(str(name).lower())
+        if spec is None:
+            raise ValueError(f"不支持的{self.kind}算法: {name}，可选: {', '.join(self.names())}")
+        return spec
+
+    def create(self, name: str, ignore_unknown: bool = False, **params: Any):
+        """Instantiate algorithm *name*, validating *params* against its constructor."""
+        return self.get(name).create(ignore_unknown, **params)
+
+    def __contains__(self, name: str) -> bool:
+        return str(name).lower() in self.discover()
+
+    # ------------------------------------------------------------------
+    def _scan(self) -> Dict[str, AlgorithmSpec]:
+        directory = _PACKAGE_DIR / self.subpackage
+        classes = {}  # class name -> (module stem, ClassDef)
+        for path in sorted(directory.glob("*.py")):
+            if path.stem.startswith("_"):
+                continue
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    classes.setdefault(node.name, (path.stem, node))
+
+        # 找出所有（直接或间接）继承基类的类
+        subclasses = {self.base_class}
+        changed = True
+        while changed:
+            changed = False
+            for class_name, (_, node) in classes.items():
+                if class_name not in subclasses and subclasses & set(_base_names(node)):
+                    subclasses.add(class_name)
+                    changed = True
+
+        specs = {}
+        for class_name in sorted(subclasses - {self.base_class}):
+            stem, node = classes[class_name]
+            if stem in specs or _is_abstract(node):
+                continue
+            parameters, var_kwargs = _init_parameters(node, classes)
+            specs[stem] = AlgorithmSpec(
+                kind=self.kind,
+                name=stem,
+                module=f"algorithms.{self.subpackage}.{stem}",
+                class_name=class_name,
+                parameters=parameters,
+                var_kwargs=var_kwargs,
+                doc=(ast.get_docstring(node) or "").strip().split("\n")[0] or None,
+            )
+        return specs
+
+
+_NON_LITERAL = object()
+
+
+def _literal_default(source: Optional[str]) -> Any:
+    """Value of a literal default; constant arithmetic such as ``8 / 255`` counts as a float."""
+    try:
+        return ast.literal_eval(source or "")
+    except (ValueError, SyntaxError):
+        pass
+    try:
+        tree = ast.parse(source or "", mode="eval")
+    except SyntaxError:
+        return _NON_LITERAL
+    for node in ast.walk(tree.body):
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, numbers.Real) or isinstance(node.value, bool):
+                return _NON_LITERAL
+        elif not isinstance(node, (ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop)):
+            return _NON_LITERAL
+    return 0.0
+
+
+def _base_names(node: ast.ClassDef) -> List[str]:
+    names = []
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            names.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            names.append(base.attr)
+    return names
+
+
+def _is_abstract(node: ast.ClassDef) -> bool:
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for deco in item.decorator_list:
+                if (isinstance(deco, ast.Name) and deco.id == "abstractmethod") or \
+                        (isinstance(deco, ast.Attribute) and deco.attr == "abstractmethod"):
+                    return True
+    return False
+
+
+def _init_parameters(node: ast.ClassDef, classes) -> tuple:
+    """Constructor parameters of *node* (inherited ``__init__`` if it defines none)."""
+    init = next((item for item in node.body
+                 if isinstance(item, ast.FunctionDef) and item.name == "__init__"), None)
+    if init is None:
+        for base in _base_names(node):
+            if base in classes:
+                return _init_parameters(classes[base][1], classes)
+        return {}, False
+
+    args = init.args
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    parameters = {}
+    for arg, default in list(zip(positional, defaults))[1:]:  # 跳过 self
+        parameters[arg.arg] = ast.unparse(default) if default is not None else None
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        parameters[arg.arg] = ast.unparse(default) if default is not None else None
+    return parameters, args.kwarg is not None
+
+
+ATTACKS = AlgorithmRegistry("攻击", "attacks", "BaseAttack")
+DEFENSES = AlgorithmRegistry("防御", "defenses", "BaseDefense")
+
+
+def preload_algorithms() -> None:
+    """Discover and import every attack and defense (call once at worker startup)."""
+    ATTACKS.discover(import_classes=True)
+    DEFENSES.discover(import_classes=True)
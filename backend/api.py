@@ -1,17 +1,19 @@
 # 引入 FastAPI 核心组件与类型支持
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Response, File, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response, File, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict, Any, Optional, Union
 from celery.result import AsyncResult
 from uuid import uuid4
+import asyncio
 import os
 import json
 
-# 引入 Celery 异步任务
-from celery_app import celery_app, test_model_task, run_attack_task, run_defense_task
+# 引入 Celery 应用与任务名称（按名称投递任务，不导入 tasks / defense，Web 进程无需加载 torch 等依赖）
+from celery_app import celery_app, MODEL_TEST_TASK, ATTACK_RUN_TASK, DEFENSE_RUN_TASK
 
-# 引入自定义功能函数（同步任务）
-import download_dataset  # 或 from function import some_function
+# 算法注册表（只解析源码，不导入 torch）：用于在入队前校验算法名称与参数
+from algorithms.registry import ATTACKS, DEFENSES
 
 # 创建 API 路由对象（用于模块化组织接口）
 router = APIRouter(
@@ -23,6 +25,27 @@ router = APIRouter(
     }
 )
 
+# SSE 进度推送的最长连接时间（秒），超时后发送 timeout 事件并关闭，客户端可重新订阅
+SSE_MAX_DURATION = 6 * 3600
+
+# 防御任务旧参数名 -> 注册表中的构造参数名
+DEFENSE_PARAM_ALIASES = {"kernel_size": "ksize", "depth": "bits"}
+
+# 报告图表格式：png 由 report.render 任务渲染；json 只输出图表描述供前端绘制
+REPORT_FORMATS = ("png", "json")
+
+def _check_report_format(report_format: str):
+    if report_format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的报告格式: {report_format}，可选: {', '.join(REPORT_FORMATS)}")
+
+def _parse_fraction(value) -> float:
+    """解析 "8/255" 形式的分数（与 worker 端 parse_fraction 一致），失败时抛出 ValueError / ZeroDivisionError"""
+    value = str(value).strip()
+    if "/" in value:
+        num, denom = value.split("/")
+        return float(num) / float(denom)
+    return float(value)
+
 @router.get("/ping")
 async def ping():
     """
@@ -30,26 +53,45 @@ async def ping():
     """
     return {"msg": "pong"}
 
+@router.get("/algorithms")
+async def list_algorithms():
+    """
+    列出可用的攻击 / 防御算法及其构造参数（默认值为源码形式）
+    """
+    return {
+        "attacks": [ATTACKS.get(name).describe() for name in ATTACKS.names()],
+        "defenses": [DEFENSES.get(name).describe() for name in DEFENSES.names()]
+    }
+
 @router.post("/model/test")
 async def test_model(
     model_name: str = "yolov8s-visdrone", 
     dataset_name: str = "VisDrone", 
     num_images: int = 20,
     conf_threshold: float = 0.25,
-    iou_threshold: float = 0.5
+    iou_threshold: float = 0.5,
+    batch_size: int = 1,
+    seed: Optional[int] = None,
+    report_format: str = "png"
 ):
     """
     启动模型测试任务，评估模型在指定数据集上的性能
+    
+    report_format: 报告图表格式，png 由低优先级的渲染任务生成图片，json 只输出图表描述 (plots/charts.json)
     """
+    _check_report_format(report_format)
     task_id = str(uuid4())
-    task = test_model_task.delay(
-        task_id,
-        model_name=model_name, 
+    task = celery_app.send_task(MODEL_TEST_TASK, kwargs=dict(
+        task_id=task_id,
+        model_name=model_name,
         dataset_name=dataset_name,
         num_images=num_images,
         conf_threshold=conf_threshold,
-        iou_threshold=iou_threshold
-    )
+        iou_threshold=iou_threshold,
+        batch_size=batch_size,
+        seed=seed,
+        report_format=report_format
+    ))
     return {"task_id": task_id, "celery_task_id": task.id}
 
 @router.post("/attack/run")
@@ -62,7 +104,19 @@ async def run_attack(
     alpha: str = "2/255",
     steps: int = 10,
     conf_threshold: float = 0.25,
-    iou_threshold: float = 0.5
+    iou_threshold: float = 0.5,
+    batch_size: int = 1,
+    seed: Optional[int] = None,
+    artifact_policy: str = "all",
+    artifact_samples: int = 10,
+    eps_sweep: Optional[str] = None,
+    warm_steps: Optional[int] = None,
+    warm_start: bool = True,
+    early_stop: bool = False,
+    precision: str = "fp32",
+    channels_last: bool = False,
+    compile_model: bool = False,
+    report_format: str = "png"
 ):
     """
     启动对抗攻击任务，支持动态指定攻击算法
@@ -77,9 +131,50 @@ async def run_attack(
     - steps: 攻击迭代步数，仅迭代攻击使用
     - conf_threshold: 置信度阈值
     - iou_threshold: IoU阈值
+    - batch_size: 一次性批量攻击的图像数量
+    - seed: 图像抽样的随机种子，指定后结果可复现
+    - artifact_policy: 结果图像保存策略 (none / sampled / all)
+    - artifact_samples: sampled 策略下保存的图像数量
+    - eps_sweep: 逗号分隔的多个扰动大小 (如 "2/255,4/255,8/255,16/255")，指定后在一个任务中生成鲁棒性曲线
+    - warm_steps: 扫描时热启动运行的迭代步数，默认为 steps 的一半
+    - warm_start: 扫描时是否从上一个 eps 的对抗样本热启动
+    - early_stop: 按样本提前终止迭代攻击（最大置信度低于 conf_threshold 即停止）
+    - precision: 攻击计算精度 (fp32 / bf16 / fp16)，非 fp32 时结果中附带与 fp32 的一致性对比
+    - channels_last: 攻击是否使用 channels_last 内存格式
+    - compile_model: 是否使用 torch.compile 编译网络
+    - report_format: 报告图表格式，png 由低优先级的渲染任务生成图片，json 只输出图表描述 (plots/charts.json)
     """
+    if artifact_policy not in ("none", "sampled", "all"):
+        raise HTTPException(status_code=400, detail=f"未知的保存策略: {artifact_policy}")
+    try:
+        spec = ATTACKS.get(attack_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # worker 对 eps 和 alpha 都会解析（与攻击算法是否使用 alpha 无关）
+        eps_val, alpha_val = _parse_fraction(eps), _parse_fraction(alpha)
+    except (ValueError, ZeroDivisionError):
+        raise HTTPException(status_code=400, detail=f"无法解析的扰动大小: eps={eps}, alpha={alpha}")
+    attack_params = {"eps": eps_val}
+    if spec.accepts("alpha"):
+        attack_params.update({"alpha": alpha_val, "steps": steps})
+    if early_stop:
+        attack_params.update({"early_stop": True, "stop_conf": conf_threshold})
+    try:
+        spec.validate(attack_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _check_report_format(report_format)
+    if precision not in ("fp32", "bf16", "fp16"):
+        raise HTTPException(status_code=400, detail=f"不支持的计算精度: {precision}")
+    if eps_sweep:
+        try:
+            for value in eps_sweep.split(","):
+                _parse_fraction(value)
+        except (ValueError, ZeroDivisionError):
+            raise HTTPException(status_code=400, detail=f"无法解析的 eps_sweep: {eps_sweep}")
     task_id = str(uuid4())
-    task = run_attack_task.delay(
+    task = celery_app.send_task(ATTACK_RUN_TASK, kwargs=dict(
         task_id=task_id,
         attack_name=attack_name,
         model_name=model_name,
@@ -89,8 +184,20 @@ async def run_attack(
         alpha=alpha,
         steps=steps,
         conf_threshold=conf_threshold,
-        iou_threshold=iou_threshold
-    )
+        iou_threshold=iou_threshold,
+        batch_size=batch_size,
+        seed=seed,
+        artifact_policy=artifact_policy,
+        artifact_samples=artifact_samples,
+        eps_sweep=eps_sweep,
+        warm_steps=warm_steps,
+        warm_start=warm_start,
+        early_stop=early_stop,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        report_format=report_format
+    ))
     return {"task_id": task_id, "celery_task_id": task.id}
 
 @router.post("/defense/run")
@@ -103,17 +210,21 @@ async def run_defense(
     """
     if params is None:
         params = {}
+    # 兼容旧的参数名 (kernel_size / depth)
+    params = {DEFENSE_PARAM_ALIASES.get(k, k): v for k, v in params.items()}
+    try:
+        params = DEFENSES.get(defense_type).validate(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     task_id = str(uuid4())
-    task = run_defense_task.delay(task_id, defense_type=defense_type, params=params)
+    task = celery_app.send_task(DEFENSE_RUN_TASK, kwargs=dict(task_id=task_id, defense_type=defense_type, params=params))
     return {"task_id": task_id, "celery_task_id": task.id}
 
-@router.get("/task/{task_id}")
-async def get_task_status(task_id: str):
+def _task_status_payload(task_result: AsyncResult) -> Dict[str, Any]:
     """
-    获取任务状态和结果
+    将 Celery 任务状态整理为接口返回的字典
     """
-    task_result = AsyncResult(task_id, app=celery_app)
     if task_result.state == 'PENDING':
         response = {
             'state': task_result.state,
@@ -130,10 +241,69 @@ async def get_task_status(task_id: str):
             'state': task_result.state,
             'status': '任务进行中' if task_result.state == 'PROGRESS' else '任务完成',
         }
-        if task_result.info:
+        if isinstance(task_result.info, dict):
             response.update(task_result.info)
     
     return response
 
+@router.get("/task/{task_id}")
+async def get_task_status(task_id: str):
+    """
+    获取任务状态和结果
+    """
+    task_result = AsyncResult(task_id, app=celery_app)
+    return _task_status_payload(task_result)
+
+@router.get("/task/{task_id}/stream")
+async def stream_task_status(
+    request: Request,
+    task_id: str,
+    interval: float = 1.0,
+    pending_timeout: float = 300.0,
+    max_duration: float = 3600.0
+):
+    """
+    以 Server-Sent Events 推送任务进度（已处理图像数、累计指标、吞吐量 images/s）
+    
+    仅在状态变化时推送事件，任务结束 (SUCCESS / FAILURE / REVOKED) 后关闭连接，
+    前端改用 EventSource 订阅即可，无需再轮询 /api/task/{task_id}。
+    
+    Celery 对未知的任务 ID 永远返回 PENDING，因此任务持续 PENDING 超过 pending_timeout 秒、
+    或连接超过 max_duration 秒（不超过 SSE_MAX_DURATION）时发送 timeout 事件并关闭；
+    客户端断开后立即停止轮询。
+    """
+    interval = max(interval, 0.2)
+    max_duration = min(max(max_duration, interval), SSE_MAX_DURATION)
+    pending_timeout = min(max(pending_timeout, interval), max_duration)
+
+    async def event_stream():
+        last_payload = None
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while True:
+            if await request.is_disconnected():
+                break
+            task_result = AsyncResult(task_id, app=celery_app)
+            # 读取结果后端是阻塞调用，放到线程池中执行
+            payload = await run_in_threadpool(_task_status_payload, task_result)
+            data = json.dumps(payload, ensure_ascii=False, default=str)
+            if data != last_payload:
+                last_payload = data
+                yield f"event: {payload['state'].lower()}\ndata: {data}\n\n"
+            if payload['state'] in ('SUCCESS', 'FAILURE', 'REVOKED'):
+                break
+            elapsed = loop.time() - started
+            if elapsed >= max_duration or (payload['state'] == 'PENDING' and elapsed >= pending_timeout):
+                timeout = {"task_id": task_id, "state": payload['state'], "elapsed": round(elapsed, 1)}
+                yield f"event: timeout\ndata: {json.dumps(timeout, ensure_ascii=False)}\n\n"
+                break
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 
@@ -16,22 +16,29 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="Asia/Shanghai",
     enable_utc=True,
-    task_track_started=True
+    task_track_started=True,
+    # 每台机器的 worker 子进程数；子进程启动时按序号绑定设备 / CPU（见 utils.worker_runtime）
+    worker_concurrency=int(os.getenv("SKYGUARD_WORKER_CONCURRENCY", "4")),
+    # 子进程初始化 (worker_process_init) 中会加载并预热模型，Celery 默认只等待 4 秒，
+    # 冷启动或 GPU 初始化时子进程会被反复杀死重启
+    worker_proc_alive_timeout=float(os.getenv("SKYGUARD_WORKER_INIT_TIMEOUT", "120")),
+    # 长任务：子进程一次只预取一个任务，避免任务堆积在忙碌的子进程上
+    worker_prefetch_multiplier=1
 )
 
-# 自动发现和注册任务
-celery_app.autodiscover_tasks(['tasks'])
+# 任务名称：API 进程只按名称投递任务 (send_task)，不导入任务模块，
+# 从而避免在 Web 进程中加载 torch / cv2 / ultralytics 等重量级依赖
+MODEL_TEST_TASK = "model.test"
+ATTACK_RUN_TASK = "attack.run"
+DEFENSE_RUN_TASK = "defense.run"
+REPORT_RENDER_TASK = "report.render"
 
-# 导入所有任务函数，确保它们被注册
-# 注意：导入需要放在celery_app定义之后，以避免循环导入
-from tasks import test_model_task, run_attack_task
-from defense import run_defense_task
+# 报告图表渲染走独立的低优先级队列，不占用评估任务的 worker
+REPORT_QUEUE = "reports"
+celery_app.conf.task_routes = {REPORT_RENDER_TASK: {"queue": REPORT_QUEUE}}
 
-# 将test_model_task注册为celery任务
-test_model_task = celery_app.task(name="model.test")(test_model_task)
-
-# 将run_defense_task注册为celery任务
-run_defense_task = celery_app.task(name="defense.run")(run_defense_task)
+# 任务模块仅由 worker 在启动时导入并注册
+celery_app.conf.include = ["tasks", "defense"]
 
 if __name__ == "__main__":
     celery_app.start()
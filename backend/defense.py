@@ -4,7 +4,16 @@ import os
 import numpy as np
 from torchvision.transforms.functional import to_tensor
 import torchvision.transforms as T
+from celery_app import celery_app, DEFENSE_RUN_TASK
+from algorithms.registry import DEFENSES
 
+# 该任务原有的默认参数（与注册表中算法的构造默认值不同的部分）
+TASK_DEFAULTS = {
+    "gaussian_blur": {"ksize": 5},
+    "median_blur": {"ksize": 5},
+}
+
+@celery_app.task(name=DEFENSE_RUN_TASK)
 def run_defense_task(task_id, defense_type="gaussian_blur", params=None):
     """执行防御任务"""
     if params is None:
@@ -48,35 +57,9 @@ def run_defense_task(task_id, defense_type="gaussian_blur", params=None):
         adv_image_bgr = cv2.cvtColor(adv_image_rgb, cv2.COLOR_RGB2BGR)
         cv2.imwrite(os.path.join(result_path, "adversarial_image.jpg"), adv_image_bgr)
         
-        # --- 3. 应用防御 ---
-        if defense_type == "gaussian_blur":
-            # 高斯模糊
-            kernel_size = params.get("kernel_size", 5)
-            defended_image = cv2.GaussianBlur(adv_image_rgb, (kernel_size, kernel_size), 0)
-        
-        elif defense_type == "median_blur":
-            # 中值滤波
-            kernel_size = params.get("kernel_size", 5)
-            defended_image = cv2.medianBlur(adv_image_rgb, kernel_size)
-        
-        elif defense_type == "jpeg_compression":
-            # JPEG压缩
-            quality = params.get("quality", 75)
-            # 保存为JPEG然后重新加载来模拟压缩
-            temp_path = os.path.join(result_path, "temp.jpg")
-            cv2.imwrite(temp_path, adv_image_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
-            defended_image_bgr = cv2.imread(temp_path)
-            defended_image = cv2.cvtColor(defended_image_bgr, cv2.COLOR_BGR2RGB)
-            os.remove(temp_path)  # 清理临时文件
-        
-        elif defense_type == "bit_depth_reduction":
-            # 位深度降低
-            depth = params.get("depth", 5)  # 默认降到5位
-            defended_image = np.floor(adv_image_rgb / (2**(8-depth))) * (2**(8-depth))
-            defended_image = defended_image.astype(np.uint8)
-        
-        else:
-            raise ValueError(f"不支持的防御类型: {defense_type}")
+        # --- 3. 应用防御（参数已由 API 按注册表校验）---
+        defense = DEFENSES.create(defense_type, **{**TASK_DEFAULTS.get(defense_type, {}), **params})
+        defended_image = np.ascontiguousarray(defense(adv_image_rgb)).astype(np.uint8)
         
         # --- 4. 防御后的结果 ---
         # 保存防御后的图像
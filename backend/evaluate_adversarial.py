@@ -6,25 +6,40 @@ import argparse
 import cv2
 import numpy as np
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 from tqdm import tqdm
 from sklearn.metrics import confusion_matrix, precision_recall_curve, average_precision_score
 from utils.model_manager import ModelManager
 from utils.dataset_manager import DatasetManager
+from utils.progress import ProgressReporter
+from utils.artifact_writer import ArtifactWriter, ARTIFACT_POLICIES
+from utils.report_renderer import chart, panel, histogram, bars, line, hline, save_chart_specs, render_charts, report_plots_html
 from algorithms.attacks.pgd import PGDAttack
 from collections import defaultdict
 import time
 import torch
 import torchvision.transforms as transforms
 from PIL import Image
-import importlib
-from algorithms.attacks.base import BaseAttack
+import inspect
+from algorithms.registry import ATTACKS
+
+# Section titles of the report charts (chart name -> title)
+REPORT_PLOT_TITLES = {
+    "detection_count_comparison": "Detection Count Comparison",
+    "confidence_distribution_comparison": "Confidence Distribution Comparison",
+    "class_distribution_comparison": "Class Distribution Comparison",
+    "detection_drop_rate": "Detection Drop Rate by Image",
+    "confidence_drop": "Confidence Drop by Image",
+    "class_vulnerability": "Class Vulnerability Analysis",
+    "attack_time_distribution": "Attack Time Distribution",
+}
+
 
 class AdversarialEvaluator:
     """Evaluator for adversarial attacks providing comprehensive metrics and visualizations"""
     
-    def __init__(self, model, attack, save_dir, conf_threshold=0.25, iou_threshold=0.5):
+    def __init__(self, model, attack, save_dir, conf_threshold=0.25, iou_threshold=0.5, batch_size=1,
+                 artifact_policy="all", artifact_samples=10, parity_batches=1, render_plots=True,
+                 plot_format=None):
         """
         Initialize the evaluator
         
@@ -34,12 +49,36 @@ class AdversarialEvaluator:
             save_dir: Directory to save results
             conf_threshold: Confidence threshold
             iou_threshold: IoU threshold
+            batch_size: Number of images letterboxed and attacked in one tensor
+            artifact_policy: Which result images to save (none / sampled / all)
+            artifact_samples: Number of images saved with the "sampled" policy
+            parity_batches: Number of batches also attacked in fp32 when the attack
+                runs in a non-fp32 execution mode (AMP / channels_last / compile)
+            render_plots: Render PNG charts in-process; when False only plots/charts.json is
+                written and rendering is left to a separate report task
+            plot_format: Image format the HTML report links to when render_plots is False and
+                a report task renders the charts; None means no images are rendered and the
+                report points to plots/charts.json
         """
         self.model = model
         self.attack = attack
         self.save_dir = save_dir
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
+        self.batch_size = max(1, int(batch_size))
+        self.artifact_writer = ArtifactWriter(artifact_policy, artifact_samples)
+        self.render_plots = render_plots
+        self.plot_format = "png" if render_plots else plot_format
+        self.charts = []
+        
+        # fp32 reference for parity checks of non-fp32 execution modes
+        self.parity_reference = None
+        self.parity_batches = 0
+        if not getattr(attack, "is_fp32_baseline", True) and parity_batches > 0:
+            self.parity_reference = attack.fp32_reference()
+            # the first compiled call includes compilation, so it is not used for timing parity
+            self.parity_batches = parity_batches + (1 if attack.compile_model else 0)
+        self._attack_calls = 0
         
         # Create save directories
         self.results_dir = os.path.join(save_dir, "detection_results")
@@ -67,6 +106,7 @@ class AdversarialEvaluator:
             "adversarial_class_names": [],
             "inference_times": [],
             "attack_times": [],
+            "attack_steps": [],
             "original_detection_by_class": defaultdict(int),
             "adversarial_detection_by_class": defaultdict(int),
             "detection_drop_rate": [],
@@ -75,8 +115,12 @@ class AdversarialEvaluator:
                 "name": attack.name,
                 "eps": float(attack.eps),
                 "steps": attack.steps,
-                "alpha": float(attack.alpha)
+                "alpha": float(attack.alpha),
+                "precision": getattr(attack, "precision", "fp32"),
+                "channels_last": getattr(attack, "channels_last", False),
+                "compile_model": getattr(attack, "compile_model", False)
             },
+            "precision_parity": [],
             # Class-wise metrics for vulnerability analysis
             "class_vulnerability": defaultdict(lambda: {"original": 0, "adversarial": 0})
         }
@@ -84,23 +128,27 @@ class AdversarialEvaluator:
         # Transformation for converting tensor to PIL image
         self.to_pil = transforms.ToPILImage()
     
-    def evaluate_image(self, image_path):
+    def evaluate_image(self, image_path, image=None, image_rgb=None):
         """
         Evaluate a single image with adversarial attack
         
         Args:
             image_path: Path to the image
+            image: Preloaded BGR image, read from image_path if None
+            image_rgb: Preloaded RGB image, converted from image if None
             
         Returns:
             Original detection results, adversarial detection results, inference time, attack time
         """
-        # Load image
-        image = cv2.imread(image_path)
         if image is None:
-            print(f"Failed to load image: {image_path}")
-            return None, None, 0, 0
+            # Load image
+            image = cv2.imread(image_path)
+            if image is None:
+                print(f"Failed to load image: {image_path}")
+                return None, None, 0, 0
             
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if image_rgb is None:
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
         # Convert to tensor for attack
         image_tensor = torch.from_numpy(image_rgb.transpose(2, 0, 1)).float() / 255.0
@@ -113,14 +161,15 @@ class AdversarialEvaluator:
         
         # Perform attack and time it
         start_time = time.time()
+        reference_tensor = None
         try:
             # 尝试直接调用攻击
-            adversarial_tensor = self.attack(self.model, image_tensor)
+            adversarial_tensor, attack_time, reference_tensor, reference_time = self._run_attack(image_tensor)
         except Exception as e:
             print(f"Attack error: {e}")
             # 如果失败，使用原始图像
             adversarial_tensor = image_tensor
-        attack_time = time.time() - start_time
+            attack_time = time.time() - start_time
         
         # Convert adversarial tensor back to numpy for prediction
         adversarial_image = adversarial_tensor[0].permute(1, 2, 0).cpu().numpy() * 255.0
@@ -131,17 +180,161 @@ class AdversarialEvaluator:
         # Perform inference on adversarial image
         adversarial_results = self.model.predict(adversarial_image)
         
+        if reference_tensor is not None:
+            reference_image = (reference_tensor[0].clamp(0, 1).permute(1, 2, 0).detach().cpu().numpy() * 255.0).astype(np.uint8)
+            self._record_parity(adversarial_tensor, reference_tensor, adversarial_results,
+                                self.model.predict(np.ascontiguousarray(reference_image)),
+                                attack_time, reference_time)
+        
+        self._record_result(image_path, image, image_rgb, adversarial_image,
+                            original_results[0], adversarial_results[0],
+                            inference_time, attack_time)
+        
+        return original_results, adversarial_results, inference_time, attack_time
+    
+    def evaluate_batch(self, image_paths, images, images_rgb):
+        """
+        Evaluate a batch of images, attacking all of them in a single tensor
+        
+        Images are letterboxed to the attack input size so that frames of
+        different resolutions can be stacked, then each adversarial example
+        is cropped and resized back to its original resolution.
+        
+        Args:
+            image_paths: List of image paths
+            images: List of BGR images aligned with image_paths
+            images_rgb: List of RGB images aligned with image_paths
+            
+        Returns:
+            Original detection results, adversarial detection results, batch inference time, batch attack time
+        """
+        input_size = getattr(self.attack, "input_size", None) or 640
+        
+        # Perform original inference on the whole batch and time it
+        start_time = time.time()
+        original_results = self.model.predict(list(images_rgb))
+        inference_time = time.time() - start_time
+        
+        # Letterbox and attack the batch
+        batch_tensor, letterbox_params = letterbox_batch(images_rgb, input_size)
+        start_time = time.time()
+        reference_tensor = None
+        try:
+            adversarial_tensor, attack_time, reference_tensor, reference_time = self._run_attack(batch_tensor)
+        except Exception as e:
+            print(f"Attack error: {e}")
+            # 如果失败，使用原始图像
+            adversarial_tensor = batch_tensor
+            attack_time = time.time() - start_time
+        
+        # Split the batch back into per-image arrays at original resolution
+        adversarial_images = [
+            unletterbox(adversarial_tensor[i], params, image_rgb.shape[:2])
+            for i, (params, image_rgb) in enumerate(zip(letterbox_params, images_rgb))
+        ]
+        
+        # Perform inference on adversarial images
+        adversarial_results = self.model.predict(adversarial_images)
+        
+        if reference_tensor is not None:
+            reference_images = [
+                unletterbox(reference_tensor[i], params, image_rgb.shape[:2])
+                for i, (params, image_rgb) in enumerate(zip(letterbox_params, images_rgb))
+            ]
+            self._record_parity(adversarial_tensor, reference_tensor, adversarial_results,
+                                self.model.predict(reference_images), attack_time, reference_time)
+        
+        # Attribute an equal share of the batch latency to each image
+        n = len(images_rgb)
+        for i in range(n):
+            self._record_result(image_paths[i], images[i], images_rgb[i], adversarial_images[i],
+                                original_results[i], adversarial_results[i],
+                                inference_time / n, attack_time / n)
+        
+        return original_results, adversarial_results, inference_time, attack_time
+    
+    def _run_attack(self, inputs):
+        """
+        Run the attack on an input tensor
+        
+        While parity checks are pending for a non-fp32 execution mode, the same
+        inputs are also attacked by the fp32 reference starting from the same
+        RNG state, so random starts match.
+        
+        Args:
+            inputs: Image tensor (N, C, H, W) in [0, 1]
+            
+        Returns:
+            Adversarial tensor, attack time, fp32 reference tensor (None when not
+            checked), reference attack time
+        """
+        self._attack_calls += 1
+        check_parity = (self.parity_reference is not None
+                        and self._attack_calls <= self.parity_batches
+                        and not (self.attack.compile_model and self._attack_calls == 1))
+        rng_state = _get_rng_state() if check_parity else None
+        
+        start_time = time.time()
+        adversarial_tensor = self.attack(self.model, inputs)
+        attack_time = time.time() - start_time
+        self._record_attack_steps()
+        if not check_parity:
+            return adversarial_tensor, attack_time, None, 0.0
+        
+        after_state = _get_rng_state()
+        _set_rng_state(rng_state)
+        start_time = time.time()
+        reference_tensor = self.parity_reference(self.model, inputs)
+        reference_time = time.time() - start_time
+        _set_rng_state(after_state)
+        return adversarial_tensor, attack_time, reference_tensor, reference_time
+    
+    def _record_parity(self, adversarial_tensor, reference_tensor, adversarial_results, reference_results,
+                       attack_time, reference_time):
+        """Record how far the execution-mode attack deviates from its fp32 reference on one batch"""
+        diff = (adversarial_tensor.detach().float().cpu() - reference_tensor.detach().float().cpu()).abs()
+        self.metrics["precision_parity"].append({
+            "num_images": len(reference_results),
+            "max_abs_diff": float(diff.max()),
+            "mean_abs_diff": float(diff.mean()),
+            "adversarial_detections": int(sum(len(r.boxes) for r in adversarial_results)),
+            "fp32_adversarial_detections": int(sum(len(r.boxes) for r in reference_results)),
+            "attack_time": attack_time,
+            "fp32_attack_time": reference_time
+        })
+    
+    def _record_attack_steps(self):
+        """Record per-sample iteration counts reported by attacks that stop early"""
+        steps_run = getattr(self.attack, "last_steps_run", None)
+        if steps_run:
+            self.metrics["attack_steps"].extend(steps_run)
+    
+    def _record_result(self, image_path, image, image_rgb, adversarial_image,
+                       original_result, adversarial_result, inference_time, attack_time):
+        """
+        Update metrics and save visualizations for one attacked image
+        
+        Args:
+            image_path: Path to the image
+            image: Original BGR image
+            image_rgb: Original RGB image
+            adversarial_image: Adversarial RGB image (uint8)
+            original_result: Ultralytics result on the original image
+            adversarial_result: Ultralytics result on the adversarial image
+            inference_time: Inference time attributed to the image
+            attack_time: Attack time attributed to the image
+        """
         # Update metrics
         self.metrics["total_images"] += 1
         self.metrics["inference_times"].append(inference_time)
         self.metrics["attack_times"].append(attack_time)
         
         # Process original detection results
-        original_boxes = original_results[0].boxes
+        original_boxes = original_result.boxes
         self.metrics["original_detections"] += len(original_boxes)
         
         # Process adversarial detection results
-        adversarial_boxes = adversarial_results[0].boxes
+        adversarial_boxes = adversarial_result.boxes
         self.metrics["adversarial_detections"] += len(adversarial_boxes)
         
         # Calculate detection drop rate
@@ -196,14 +389,30 @@ class AdversarialEvaluator:
             conf_drop = original_avg_conf - adversarial_avg_conf
             self.metrics["confidence_drop"].append(conf_drop)
         
+        # Render and save result images off the critical path, if the policy asks for it
+        if self.artifact_writer.should_render(self.metrics["total_images"]):
+            image_name = os.path.basename(image_path)
+            unique_name = f"{self.metrics['total_images']:04d}_{image_name}"
+            self.artifact_writer.submit(self._save_artifacts, unique_name, image_rgb, adversarial_image,
+                                        original_result, adversarial_result)
+    
+    def _save_artifacts(self, unique_name, image_rgb, adversarial_image, original_result, adversarial_result):
+        """
+        Render detection plots, perturbation and comparison images for one image
+        
+        Args:
+            unique_name: Output file name
+            image_rgb: Original RGB image
+            adversarial_image: Adversarial RGB image (uint8)
+            original_result: Ultralytics result on the original image
+            adversarial_result: Ultralytics result on the adversarial image
+        """
         # Save original detection result image
-        original_result_image = original_results[0].plot()
-        image_name = os.path.basename(image_path)
-        unique_name = f"{self.metrics['total_images']:04d}_{image_name}"
+        original_result_image = original_result.plot()
         cv2.imwrite(os.path.join(self.results_dir, unique_name), original_result_image)
         
         # Save adversarial detection result image
-        adversarial_result_image = adversarial_results[0].plot()
+        adversarial_result_image = adversarial_result.plot()
         cv2.imwrite(os.path.join(self.adversarial_dir, unique_name), adversarial_result_image)
         
         # Save perturbation visualization
@@ -214,28 +423,47 @@ class AdversarialEvaluator:
                     cv2.cvtColor(perturbation_enhanced, cv2.COLOR_RGB2BGR))
         
         # Create side-by-side comparison
-        h, w = image.shape[:2]
+        h, w = image_rgb.shape[:2]
         comparison = np.zeros((h, w*3, 3), dtype=np.uint8)
         comparison[:, :w] = cv2.cvtColor(original_result_image, cv2.COLOR_BGR2RGB)
         comparison[:, w:2*w] = cv2.cvtColor(adversarial_result_image, cv2.COLOR_BGR2RGB)
         comparison[:, 2*w:] = perturbation_enhanced
         cv2.imwrite(os.path.join(self.comparison_dir, unique_name), 
                     cv2.cvtColor(comparison, cv2.COLOR_RGB2BGR))
-        
-        return original_results, adversarial_results, inference_time, attack_time
     
-    def evaluate_dataset(self, image_paths):
+    def evaluate_dataset(self, image_paths, num_workers=4, progress_callback=None):
         """
         Evaluate the entire dataset
         
         Args:
             image_paths: List of image paths
+            num_workers: Number of background image decoding threads
+            progress_callback: Optional callable receiving a progress dict
+                (processed count, throughput and running metrics)
         """
         print(f"Starting adversarial evaluation on {len(image_paths)} images...")
         
-        # Use tqdm for progress bar
-        for image_path in tqdm(image_paths):
-            self.evaluate_image(image_path)
+        # Use tqdm for progress bar, decoding images ahead on a background pool
+        images = DatasetManager.iter_images(image_paths, num_workers=num_workers,
+                                            prefetch=max(8, 2 * self.batch_size))
+        progress = ProgressReporter(progress_callback, len(image_paths))
+        batch = []
+        for processed, (image_path, image, image_rgb) in enumerate(tqdm(images, total=len(image_paths)), 1):
+            if image is None:
+                print(f"Failed to load image: {image_path}")
+            elif self.batch_size == 1:
+                self.evaluate_image(image_path, image=image, image_rgb=image_rgb)
+            else:
+                batch.append((image_path, image, image_rgb))
+                if len(batch) == self.batch_size or processed == len(image_paths):
+                    self.evaluate_batch(*zip(*batch))
+                    batch = []
+            progress.update(processed, self.running_metrics())
+        if batch:
+            self.evaluate_batch(*zip(*batch))
+        
+        # Wait for pending result images so the report can reference them
+        self.artifact_writer.flush()
         
         # Calculate summary metrics
         self.calculate_summary_metrics()
@@ -248,6 +476,138 @@ class AdversarialEvaluator:
         
         print(f"Adversarial evaluation complete! Results saved to {self.save_dir}")
     
+    def running_metrics(self):
+        """Return a small snapshot of the metrics accumulated so far"""
+        original = self.metrics["original_detections"]
+        return {
+            "total_images": self.metrics["total_images"],
+            "original_detections": original,
+            "adversarial_detections": self.metrics["adversarial_detections"],
+            "detection_reduction_rate": 1.0 - (self.metrics["adversarial_detections"] / original) if original > 0 else 0,
+            "avg_attack_time": float(np.mean(self.metrics["attack_times"])) if self.metrics["attack_times"] else 0,
+            "avg_attack_steps": float(np.mean(self.metrics["attack_steps"])) if self.metrics["attack_steps"] else None
+        }
+    
+    def evaluate_sweep(self, image_paths, eps_values, steps=None, warm_steps=None, warm_start=True,
+                       num_workers=4, progress_callback=None):
+        """
+        Evaluate the attack at several perturbation budgets and build a robustness curve
+        
+        The model and the decoded images stay resident for the whole sweep, and
+        every batch is letterboxed once. Budgets are processed in increasing
+        order; with warm_start each run starts from the adversarial examples of
+        the previous (smaller) eps, projected into the new eps ball, so it needs
+        fewer iterations than a cold start. Attacks whose attack() does not
+        accept init_images are always cold-started.
+        
+        Args:
+            image_paths: List of image paths
+            eps_values: Perturbation budgets, e.g. [2/255, 4/255, 8/255, 16/255]
+            steps: Iterations of the first (cold) run, defaults to attack.steps
+            warm_steps: Iterations of warm-started runs, defaults to half of steps
+            warm_start: Start every run from the previous adversarial examples
+            num_workers: Number of background image decoding threads
+            progress_callback: Optional callable receiving a progress dict
+            
+        Returns:
+            The robustness curve: one metrics dict per eps, in increasing eps order
+        """
+        eps_values = sorted(float(eps) for eps in eps_values)
+        steps = self.attack.steps if steps is None else int(steps)
+        warm_steps = max(1, steps // 2) if warm_steps is None else int(warm_steps)
+        warm_start = warm_start and "init_images" in inspect.signature(self.attack.attack).parameters
+        input_size = getattr(self.attack, "input_size", None) or 640
+        
+        print(f"Loading {len(image_paths)} images for eps sweep {[round(e * 255, 2) for e in eps_values]}/255...")
+        loaded = []
+        for image_path, image, image_rgb in DatasetManager.iter_images(image_paths, num_workers=num_workers):
+            if image is None:
+                print(f"Failed to load image: {image_path}")
+            else:
+                loaded.append(image_rgb)
+        
+        curve = [{
+            "eps": eps,
+            "steps": warm_steps if (warm_start and i > 0) else steps,
+            "warm_start": warm_start and i > 0,
+            "adversarial_detections": 0,
+            "attack_time": 0.0,
+            "confidence_drop": [],
+        } for i, eps in enumerate(eps_values)]
+        original_detections = 0
+        inference_time = 0.0
+        
+        progress = ProgressReporter(progress_callback, len(loaded) * len(curve))
+        processed = 0
+        attack_eps, attack_steps = self.attack.eps, self.attack.steps
+        try:
+            for start in tqdm(range(0, len(loaded), self.batch_size)):
+                images_rgb = loaded[start:start + self.batch_size]
+                start_time = time.time()
+                original_results = self.model.predict(list(images_rgb))
+                inference_time += time.time() - start_time
+                original_conf = [r.boxes.conf.cpu().numpy() for r in original_results]
+                original_detections += sum(len(c) for c in original_conf)
+                
+                batch_tensor, letterbox_params = letterbox_batch(images_rgb, input_size)
+                previous = None
+                for point in curve:
+                    self.attack.eps, self.attack.steps = point["eps"], point["steps"]
+                    kwargs = {"init_images": previous} if (warm_start and previous is not None) else {}
+                    start_time = time.time()
+                    previous = self.attack(self.model, batch_tensor, **kwargs)
+                    point["attack_time"] += time.time() - start_time
+                    
+                    adversarial_images = [
+                        unletterbox(previous[i], params, image_rgb.shape[:2])
+                        for i, (params, image_rgb) in enumerate(zip(letterbox_params, images_rgb))
+                    ]
+                    for conf, result in zip(original_conf, self.model.predict(adversarial_images)):
+                        adversarial_conf = result.boxes.conf.cpu().numpy()
+                        point["adversarial_detections"] += len(adversarial_conf)
+                        if len(conf) and len(adversarial_conf):
+                            point["confidence_drop"].append(float(conf.mean() - adversarial_conf.mean()))
+                    processed += len(images_rgb)
+                    progress.update(processed, {"eps": point["eps"], "original_detections": original_detections,
+                                                "adversarial_detections": point["adversarial_detections"]})
+        finally:
+            self.attack.eps, self.attack.steps = attack_eps, attack_steps
+        
+        num_images = max(len(loaded), 1)
+        for point in curve:
+            point["original_detections"] = original_detections
+            point["detection_reduction_rate"] = (
+                1.0 - point["adversarial_detections"] / original_detections if original_detections > 0 else 0)
+            point["avg_confidence_drop"] = float(np.mean(point.pop("confidence_drop") or [0.0]))
+            point["avg_attack_time"] = point.pop("attack_time") / num_images
+        
+        self.metrics["robustness_curve"] = {
+            "attack": self.attack.name,
+            "num_images": len(loaded),
+            "avg_inference_time": inference_time / num_images,
+            "total_attack_steps": sum(point["steps"] for point in curve),
+            "points": curve,
+        }
+        with open(os.path.join(self.metrics_dir, "robustness_curve.json"), "w", encoding="utf-8") as f:
+            json.dump(self.metrics["robustness_curve"], f, indent=4, ensure_ascii=False)
+        self._plot_robustness_curve(curve)
+        
+        print(f"Eps sweep complete! Results saved to {self.save_dir}")
+        return curve
+    
+    def _plot_robustness_curve(self, curve):
+        """Chart detection reduction rate and confidence drop against eps"""
+        eps_255 = [point["eps"] * 255 for point in curve]
+        self._save_charts([chart(
+            "robustness_curve",
+            panel(line([point["detection_reduction_rate"] for point in curve], x=eps_255, color='red',
+                       label='Detection Reduction Rate'),
+                  line([point["avg_confidence_drop"] for point in curve], x=eps_255, color='blue',
+                       label='Avg Confidence Drop', marker='s'),
+                  title=f"Robustness Curve ({self.attack.name})", xlabel="Epsilon (x/255)", ylabel="Rate",
+                  grid=True, legend=True)
+        )])
+    
     def calculate_summary_metrics(self):
         """Calculate summary metrics"""
         # Calculate average inference and attack time
@@ -271,6 +631,7 @@ class AdversarialEvaluator:
         self.metrics["summary"] = {
             "avg_inference_time": avg_inference_time,
             "avg_attack_time": avg_attack_time,
+            "avg_attack_steps": float(np.mean(self.metrics["attack_steps"])) if self.metrics["attack_steps"] else None,
             "total_original_detections": self.metrics["original_detections"],
             "total_adversarial_detections": self.metrics["adversarial_detections"],
             "detection_reduction_rate": 1.0 - (self.metrics["adversarial_detections"] / self.metrics["original_detections"]) if self.metrics["original_detections"] > 0 else 0,
@@ -278,38 +639,46 @@ class AdversarialEvaluator:
             "avg_confidence_drop": avg_confidence_drop,
             "class_vulnerability": class_vulnerability
         }
+        
+        # Parity of the non-fp32 execution mode against fp32
+        parity = self.metrics["precision_parity"]
+        if parity:
+            attack_time = sum(p["attack_time"] for p in parity)
+            self.metrics["summary"]["precision_parity"] = {
+                "precision": self.metrics["attack_params"]["precision"],
+                "channels_last": self.metrics["attack_params"]["channels_last"],
+                "compile_model": self.metrics["attack_params"]["compile_model"],
+                "batches": len(parity),
+                "num_images": sum(p["num_images"] for p in parity),
+                "max_abs_diff": max(p["max_abs_diff"] for p in parity),
+                "mean_abs_diff": float(np.mean([p["mean_abs_diff"] for p in parity])),
+                "adversarial_detections": sum(p["adversarial_detections"] for p in parity),
+                "fp32_adversarial_detections": sum(p["fp32_adversarial_detections"] for p in parity),
+                "speedup": sum(p["fp32_attack_time"] for p in parity) / attack_time if attack_time > 0 else None
+            }
     
-    def generate_visualizations(self):
-        """Generate visualization charts"""
+    def build_charts(self):
+        """Build the report charts as JSON chart specs (see utils.report_renderer)"""
+        charts = []
         # 1. Detection count comparison (original vs adversarial)
-        plt.figure(figsize=(10, 6))
-        labels = ['Original', 'Adversarial']
-        counts = [self.metrics["original_detections"], self.metrics["adversarial_detections"]]
-        plt.bar(labels, counts, color=['blue', 'red'])
-        plt.title("Detection Count Comparison")
-        plt.ylabel("Number of Detections")
-        plt.grid(True, alpha=0.3)
-        plt.savefig(os.path.join(self.plots_dir, "detection_count_comparison.png"))
-        plt.close()
+        charts.append(chart(
+            "detection_count_comparison",
+            panel(bars(['Original', 'Adversarial'],
+                       [self.metrics["original_detections"], self.metrics["adversarial_detections"]],
+                       color=['blue', 'red']),
+                  title="Detection Count Comparison", ylabel="Number of Detections", grid=True)
+        ))
         
         # 2. Confidence score distribution comparison
         if self.metrics["original_conf_scores"] and self.metrics["adversarial_conf_scores"]:
-            plt.figure(figsize=(12, 6))
-            
-            plt.subplot(1, 2, 1)
-            plt.hist(self.metrics["original_conf_scores"], bins=20, alpha=0.7, color='blue')
-            plt.title("Original Confidence Distribution")
-            plt.xlabel("Confidence")
-            plt.ylabel("Count")
-            
-            plt.subplot(1, 2, 2)
-            plt.hist(self.metrics["adversarial_conf_scores"], bins=20, alpha=0.7, color='red')
-            plt.title("Adversarial Confidence Distribution")
-            plt.xlabel("Confidence")
-            
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "confidence_distribution_comparison.png"))
-            plt.close()
+            charts.append(chart(
+                "confidence_distribution_comparison",
+                panel(histogram(self.metrics["original_conf_scores"], color='blue'),
+                      title="Original Confidence Distribution", xlabel="Confidence", ylabel="Count"),
+                panel(histogram(self.metrics["adversarial_conf_scores"], color='red'),
+                      title="Adversarial Confidence Distribution", xlabel="Confidence"),
+                figsize=(12, 6)
+            ))
         
         # 3. Class distribution comparison
         if self.metrics["original_detection_by_class"] and self.metrics["adversarial_detection_by_class"]:
@@ -329,52 +698,37 @@ class AdversarialEvaluator:
             original_counts = [self.metrics["original_detection_by_class"].get(cls, 0) for cls in top_classes]
             adversarial_counts = [self.metrics["adversarial_detection_by_class"].get(cls, 0) for cls in top_classes]
             
-            # Plot
-            plt.figure(figsize=(12, 8))
-            x = np.arange(len(top_classes))
             width = 0.35
-            
-            plt.bar(x - width/2, original_counts, width, label='Original', color='blue')
-            plt.bar(x + width/2, adversarial_counts, width, label='Adversarial', color='red')
-            
-            plt.xlabel('Class')
-            plt.ylabel('Count')
-            plt.title('Top 10 Class Distribution Comparison')
-            plt.xticks(x, top_classes, rotation=45, ha='right')
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "class_distribution_comparison.png"))
-            plt.close()
+            charts.append(chart(
+                "class_distribution_comparison",
+                panel(bars(top_classes, original_counts, color='blue', label='Original', offset=-width/2, width=width),
+                      bars(top_classes, adversarial_counts, color='red', label='Adversarial', offset=width/2, width=width),
+                      title='Top 10 Class Distribution Comparison', xlabel='Class', ylabel='Count',
+                      legend=True, xtick_rotation=45),
+                figsize=(12, 8)
+            ))
         
         # 4. Detection drop rate by image
         if self.metrics["detection_drop_rate"]:
-            plt.figure(figsize=(10, 6))
-            plt.plot(self.metrics["detection_drop_rate"], marker='o', linestyle='-', color='purple')
-            plt.axhline(y=np.mean(self.metrics["detection_drop_rate"]), color='r', linestyle='--', 
-                      label=f'Mean: {np.mean(self.metrics["detection_drop_rate"]):.2f}')
-            plt.title("Detection Drop Rate by Image")
-            plt.xlabel("Image Index")
-            plt.ylabel("Detection Drop Rate")
-            plt.grid(True, alpha=0.3)
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "detection_drop_rate.png"))
-            plt.close()
+            mean_drop = np.mean(self.metrics["detection_drop_rate"])
+            charts.append(chart(
+                "detection_drop_rate",
+                panel(line(self.metrics["detection_drop_rate"], color='purple'),
+                      hline(mean_drop, label=f'Mean: {mean_drop:.2f}'),
+                      title="Detection Drop Rate by Image", xlabel="Image Index", ylabel="Detection Drop Rate",
+                      grid=True, legend=True)
+            ))
         
         # 5. Confidence drop by image
         if self.metrics["confidence_drop"]:
-            plt.figure(figsize=(10, 6))
-            plt.plot(self.metrics["confidence_drop"], marker='o', linestyle='-', color='green')
-            plt.axhline(y=np.mean(self.metrics["confidence_drop"]), color='r', linestyle='--', 
-                      label=f'Mean: {np.mean(self.metrics["confidence_drop"]):.2f}')
-            plt.title("Confidence Drop by Image")
-            plt.xlabel("Image Index")
-            plt.ylabel("Confidence Drop")
-            plt.grid(True, alpha=0.3)
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "confidence_drop.png"))
-            plt.close()
+            mean_drop = np.mean(self.metrics["confidence_drop"])
+            charts.append(chart(
+                "confidence_drop",
+                panel(line(self.metrics["confidence_drop"], color='green'),
+                      hline(mean_drop, label=f'Mean: {mean_drop:.2f}'),
+                      title="Confidence Drop by Image", xlabel="Image Index", ylabel="Confidence Drop",
+                      grid=True, legend=True)
+            ))
         
         # 6. Class vulnerability analysis
         if self.metrics["summary"]["class_vulnerability"]:
@@ -387,24 +741,31 @@ class AdversarialEvaluator:
             class_names = [cls[0] for cls in top_vulnerable]
             vulnerability_scores = [cls[1] for cls in top_vulnerable]
             
-            plt.figure(figsize=(12, 8))
-            plt.barh(class_names, vulnerability_scores, color='red')
-            plt.title("Top 10 Most Vulnerable Classes")
-            plt.xlabel("Vulnerability Score (higher = more vulnerable)")
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "class_vulnerability.png"))
-            plt.close()
+            charts.append(chart(
+                "class_vulnerability",
+                panel(bars(class_names, vulnerability_scores, color='red', horizontal=True),
+                      title="Top 10 Most Vulnerable Classes",
+                      xlabel="Vulnerability Score (higher = more vulnerable)"),
+                figsize=(12, 8)
+            ))
         
         # 7. Attack time distribution
         if self.metrics["attack_times"]:
-            plt.figure(figsize=(10, 6))
-            plt.hist(self.metrics["attack_times"], bins=20, alpha=0.7, color='orange')
-            plt.title("Attack Time Distribution")
-            plt.xlabel("Attack Time (seconds)")
-            plt.ylabel("Count")
-            plt.grid(True, alpha=0.3)
-            plt.savefig(os.path.join(self.plots_dir, "attack_time_distribution.png"))
-            plt.close()
+            charts.append(chart(
+                "attack_time_distribution",
+                panel(histogram(self.metrics["attack_times"], color='orange'),
+                      title="Attack Time Distribution", xlabel="Attack Time (seconds)", ylabel="Count", grid=True)
+            ))
+        return charts
+    
+    def generate_visualizations(self):
+        """Write plots/charts.json and, if render_plots is set, render the PNG charts"""
+        self._save_charts(self.build_charts())
+    
+    def _save_charts(self, charts):
+        self.charts = save_chart_specs(charts, self.plots_dir)
+        if self.render_plots:
+            render_charts(charts, self.plots_dir)
     
     def save_metrics(self):
         """Save evaluation metrics to JSON file"""
@@ -563,40 +924,7 @@ class AdversarialEvaluator:
                 
                 <div class="metric-card">
                     <h2>Visualizations</h2>
-                    <div class="plot-container">
-                        <h3>Detection Count Comparison</h3>
-                        <img src="plots/detection_count_comparison.png" alt="Detection Count Comparison" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Confidence Distribution Comparison</h3>
-                        <img src="plots/confidence_distribution_comparison.png" alt="Confidence Distribution Comparison" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Class Distribution Comparison</h3>
-                        <img src="plots/class_distribution_comparison.png" alt="Class Distribution Comparison" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Detection Drop Rate by Image</h3>
-                        <img src="plots/detection_drop_rate.png" alt="Detection Drop Rate" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Confidence Drop by Image</h3>
-                        <img src="plots/confidence_drop.png" alt="Confidence Drop" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Class Vulnerability Analysis</h3>
-                        <img src="plots/class_vulnerability.png" alt="Class Vulnerability" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Attack Time Distribution</h3>
-                        <img src="plots/attack_time_distribution.png" alt="Attack Time Distribution" style="max-width: 100%;">
-                    </div>
+                    {report_plots_html(self.charts, self.plot_format, REPORT_PLOT_TITLES)}
                 </div>
                 
                 <div class="metric-card">
@@ -657,6 +985,66 @@ class AdversarialEvaluator:
             f.write(html_content)
 
 
+def _get_rng_state():
+    """Snapshot the torch CPU (and CUDA) RNG state"""
+    cuda_state = torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None
+    return torch.get_rng_state(), cuda_state
+
+
+def _set_rng_state(state):
+    """Restore a state returned by _get_rng_state"""
+    cpu_state, cuda_state = state
+    torch.set_rng_state(cpu_state)
+    if cuda_state is not None:
+        torch.cuda.set_rng_state_all(cuda_state)
+
+
+def letterbox_batch(images_rgb, size, pad_value=114):
+    """
+    Letterbox RGB images to a square size and stack them into one tensor
+    
+    Args:
+        images_rgb: List of RGB uint8 images of arbitrary resolution
+        size: Target square side length
+        pad_value: Padding pixel value
+        
+    Returns:
+        Tensor of shape (N, 3, size, size) in [0, 1], list of (top, left, new_h, new_w)
+    """
+    batch = np.full((len(images_rgb), size, size, 3), pad_value, dtype=np.uint8)
+    params = []
+    for i, image_rgb in enumerate(images_rgb):
+        h, w = image_rgb.shape[:2]
+        scale = min(size / h, size / w)
+        new_h, new_w = max(1, int(round(h * scale))), max(1, int(round(w * scale)))
+        top, left = (size - new_h) // 2, (size - new_w) // 2
+        batch[i, top:top + new_h, left:left + new_w] = cv2.resize(
+            image_rgb, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        params.append((top, left, new_h, new_w))
+    tensor = torch.from_numpy(batch).permute(0, 3, 1, 2).float() / 255.0
+    return tensor, params
+
+
+def unletterbox(image_tensor, params, orig_size):
+    """
+    Crop the letterbox padding from a (C, H, W) tensor and resize it back
+    
+    Args:
+        image_tensor: Letterboxed image tensor in [0, 1]
+        params: (top, left, new_h, new_w) returned by letterbox_batch
+        orig_size: Original (height, width)
+        
+    Returns:
+        Contiguous RGB uint8 numpy image of the original size
+    """
+    top, left, new_h, new_w = params
+    crop = image_tensor[:, top:top + new_h, left:left + new_w].unsqueeze(0)
+    if (new_h, new_w) != tuple(orig_size):
+        crop = torch.nn.functional.interpolate(crop, size=tuple(orig_size), mode="bilinear", align_corners=False)
+    image = (crop[0].clamp(0, 1).permute(1, 2, 0).detach().cpu().numpy() * 255.0).astype(np.uint8)
+    return np.ascontiguousarray(image)
+
+
 def parse_fraction(fraction_str):
     """Parse a fraction string like '8/255' into a float"""
     if '/' in fraction_str:
@@ -676,12 +1064,24 @@ def main():
         default="",  # auto timestamp under backend/results if empty
         help="Relative directory name under backend/results (leave blank for auto)",
     )
-    parser.add_argument("--attack", type=str, default="pgd", help="Attack algorithm (pgd)")
+    parser.add_argument("--attack", type=str, default="pgd", help=f"Attack algorithm ({', '.join(ATTACKS.names())})")
     parser.add_argument("--eps", type=str, default="8/255", help="Epsilon value (max perturbation)")
     parser.add_argument("--alpha", type=str, default="2/255", help="Alpha value (step size)")
     parser.add_argument("--steps", type=int, default=10, help="Number of attack iterations")
     parser.add_argument("--conf_threshold", type=float, default=0.25, help="Confidence threshold")
     parser.add_argument("--iou_threshold", type=float, default=0.5, help="IoU threshold")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible image sampling")
+    parser.add_argument("--batch_size", type=int, default=1, help="Number of images attacked in one batch")
+    parser.add_argument("--artifacts", type=str, default="all", choices=ARTIFACT_POLICIES, help="Which result images to save")
+    parser.add_argument("--artifact_samples", type=int, default=10, help="Number of images saved with --artifacts sampled")
+    parser.add_argument("--precision", type=str, default="fp32", choices=["fp32", "bf16", "fp16"], help="Attack compute precision (autocast)")
+    parser.add_argument("--channels_last", action="store_true", help="Run the attack in channels_last memory format")
+    parser.add_argument("--compile", action="store_true", help="Compile the network with torch.compile for the attack loop")
+    parser.add_argument("--parity_batches", type=int, default=1, help="Batches also attacked in fp32 to report parity of non-fp32 modes")
+    parser.add_argument("--early_stop", action="store_true", help="Stop attacking an image once its max confidence drops below --conf_threshold")
+    parser.add_argument("--eps_sweep", type=str, default="", help="Comma-separated eps values for a robustness curve, e.g. '2/255,4/255,8/255,16/255'")
+    parser.add_argument("--warm_steps", type=int, default=None, help="Iterations of warm-started sweep runs (default: steps // 2)")
+    parser.add_argument("--no_warm_start", action="store_true", help="Cold-start every run of --eps_sweep")
     args = parser.parse_args()
     
     # Resolve output directory (align with evaluate_defense)
@@ -712,30 +1112,21 @@ def main():
     eps = parse_fraction(args.eps)
     alpha = parse_fraction(args.alpha)
     
-    # Initialize attack algorithm
-    def load_attack(name: str, **kwargs):
-        """Dynamically import an attack class located in algorithms/attacks/NAME.py"""
-        module_name = f"algorithms.attacks.{name.lower()}"
-        try:
-            module = importlib.import_module(module_name)
-        except ModuleNotFoundError as e:
-            raise ValueError(f"Unsupported attack algorithm: {name}. Expected file backend/{module_name.replace('.', '/')} .py") from e
-
-        # Find concrete subclass of BaseAttack inside module
-        for attr in dir(module):
-            obj = getattr(module, attr)
-            if isinstance(obj, type) and issubclass(obj, BaseAttack) and obj is not BaseAttack:
-                return obj(**kwargs)
-        raise ValueError(f"No attack class found in module {module_name}")
-
-    attack = load_attack(args.attack, eps=eps, alpha=alpha, steps=args.steps)
+    # Initialize attack algorithm through the registry; generic options the
+    # attack does not take (e.g. alpha for FGSM) are dropped
+    attack_kwargs = {"eps": eps, "alpha": alpha, "steps": args.steps}
+    if args.early_stop:
+        attack_kwargs.update({"early_stop": True, "stop_conf": args.conf_threshold})
+    attack = ATTACKS.create(args.attack, ignore_unknown=True, **attack_kwargs)
+    attack.set_execution_mode(args.precision, args.channels_last, args.compile)
     
     print(f"Loading dataset: {args.dataset}")
     # Get test images
     image_paths = DatasetManager.get_test_images(
         dataset_name=args.dataset, 
         num_images=args.num_images if args.num_images > 0 else None,
-        random_select=args.num_images > 0  # Randomly select if number is specified
+        random_select=args.num_images > 0,  # Randomly select if number is specified
+        seed=args.seed
     )
     
     if not image_paths:
@@ -751,9 +1142,23 @@ def main():
         attack=attack,
         save_dir=save_dir,
         conf_threshold=args.conf_threshold,
-        iou_threshold=args.iou_threshold
+        iou_threshold=args.iou_threshold,
+        batch_size=args.batch_size,
+        artifact_policy=args.artifacts,
+        artifact_samples=args.artifact_samples,
+        parity_batches=args.parity_batches
     )
     
+    if args.eps_sweep:
+        evaluator.evaluate_sweep(
+            image_paths,
+            [parse_fraction(e.strip()) for e in args.eps_sweep.split(",") if e.strip()],
+            warm_steps=args.warm_steps,
+            warm_start=not args.no_warm_start
+        )
+        print(f"Robustness curve: {os.path.join(save_dir, 'metrics', 'robustness_curve.json')}")
+        return
+    
     # Perform evaluation
     evaluator.evaluate_dataset(image_paths)
     
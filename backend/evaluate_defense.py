@@ -15,22 +15,39 @@ $ python backend/evaluate_defense.py \
     --defense_params ksize=5 \
     --num_images 20 
 
+Parameter sweep (one consolidated table for the whole grid; ``+`` chains
+defenses, ``|`` separates values, ``--sweep`` may be repeated)
+$ python backend/evaluate_defense.py \
+    --sweep "median_blur:ksize=3|5|7+jpeg_compression:quality=50|75|90" \
+    --num_images 100 --sweep_workers 4
+
 """ 
 import os
 import argparse
+import ast
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 import json
 import time
+import csv
+import hashlib
+import itertools
+import multiprocessing
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from tqdm import tqdm
-import importlib
+import torch
 
 from utils.model_manager import ModelManager
 from utils.dataset_manager import DatasetManager
+from utils.evaluator import MAPAccumulator, result_to_detections
+from utils.annotation_index import _CACHE_DIR
+from utils.report_renderer import chart, panel, histogram, bars, line, hline, save_chart_specs, render_charts
+from algorithms.attacks.base import BaseAttack
 from algorithms.defenses.base import BaseDefense
+from algorithms.registry import ATTACKS, DEFENSES
+from algorithms.defenses.differentiable import DefendedModel
 
 # ------------------------------------------------------------
 # Evaluation class
@@ -43,6 +60,11 @@ class DefenseEvaluator:
     defense on *clean* images – useful for ensuring the defense does not overly
     degrade performance. If you have adversarial images, you can simply feed
     them instead of clean ones to measure robustness gain.
+
+    When an *attack* is given, every image is attacked first and the defense is
+    applied to the adversarial image. With ``adaptive=True`` the attack is run
+    end to end through the defense (see ``algorithms.defenses.differentiable``),
+    using BPDA gradients for non-differentiable defenses.
     """
 
     def __init__(
@@ -52,12 +74,21 @@ class DefenseEvaluator:
         save_dir: str,
         conf_threshold: float = 0.25,
         iou_threshold: float = 0.5,
+        attack: BaseAttack = None,
+        adaptive: bool = False,
+        bpda: bool = None,
+        render_plots: bool = True,
     ) -> None:
         self.model = model
         self.defense = defense
+        self.attack = attack
+        # model the attack differentiates through: plain model (transfer) or model(defense(x))
+        self.attack_model = DefendedModel(model, defense, bpda=bpda) if adaptive else model
         self.save_dir = save_dir
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
+        # False: only write plots/charts.json and leave rendering to a report task
+        self.render_plots = render_plots
 
         # directories
         self.results_dir = os.path.join(save_dir, "original_results")
@@ -86,28 +117,51 @@ class DefenseEvaluator:
             "confidence_change": [],  # defended - original avg
             "inference_times": [],
             "defense_times": [],
+            "attack_times": [],
             "defense_params": {},
+            "attack_params": {
+                "name": attack.name,
+                "eps": float(attack.eps),
+                "steps": attack.steps,
+                "adaptive": adaptive,
+            } if attack is not None else None,
             "detection_by_class_original": defaultdict(int),
             "detection_by_class_defended": defaultdict(int),
         }
 
     # --------------------------------------------------------
-    def evaluate_image(self, image_path: str):
-        """Run model on *image_path* with/without defense and log metrics."""
-        img_bgr = cv2.imread(image_path)
+    def evaluate_image(self, image_path: str, img_bgr=None, img_rgb=None):
+        """Run model on *image_path* with/without defense and log metrics.
+
+        ``img_bgr`` / ``img_rgb`` may carry an already decoded image (see
+        ``DatasetManager.iter_images``); otherwise the file is read here.
+        """
         if img_bgr is None:
-            print(f"[Warning] failed to load image: {image_path}")
-            return
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+            img_bgr = cv2.imread(image_path)
+            if img_bgr is None:
+                print(f"[Warning] failed to load image: {image_path}")
+                return
+        if img_rgb is None:
+            img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
 
         # original inference
         t0 = time.time()
         orig_res = self.model.predict(img_rgb)
         infer_time = time.time() - t0
 
+        # optionally attack the image (transfer or adaptive through the defense)
+        source_img = img_rgb
+        if self.attack is not None:
+            t0 = time.time()
+            image_tensor = torch.from_numpy(img_rgb.transpose(2, 0, 1)).float().div(255.0).unsqueeze(0)
+            adv_tensor = self.attack(self.attack_model, image_tensor)
+            self.metrics["attack_times"].append(time.time() - t0)
+            source_img = (adv_tensor[0].clamp(0, 1).permute(1, 2, 0).detach().cpu().numpy() * 255.0).astype(np.uint8)
+            source_img = np.ascontiguousarray(source_img)
+
         # apply defense
         t0 = time.time()
-        defended_img = self.defense(img_rgb)
+        defended_img = self.defense(source_img)
         defense_time = time.time() - t0
         defended_img = np.ascontiguousarray(defended_img)
 
@@ -164,12 +218,16 @@ class DefenseEvaluator:
         cv2.imwrite(os.path.join(self.comparison_dir, tag), cv2.cvtColor(comp, cv2.COLOR_RGB2BGR))
 
     # --------------------------------------------------------
-    def evaluate_dataset(self, image_paths):
+    def evaluate_dataset(self, image_paths, num_workers: int = 4):
         print(f"Evaluating defense on {len(image_paths)} images …")
-        for p in tqdm(image_paths):
-            self.evaluate_image(p)
+        images = DatasetManager.iter_images(image_paths, num_workers=num_workers)
+        for p, img_bgr, img_rgb in tqdm(images, total=len(image_paths)):
+            if img_bgr is None:
+                print(f"[Warning] failed to load image: {p}")
+                continue
+            self.evaluate_image(p, img_bgr=img_bgr, img_rgb=img_rgb)
         self._summarize()
-        # create plots before saving metrics so figure files exist
+        # write chart specs (and plots) before saving metrics
         self.generate_visualizations()
         self._save_metrics()
         print(f"Finished. Results saved under: {self.save_dir}")
@@ -200,62 +258,73 @@ class DefenseEvaluator:
             json.dump(to_save, f, indent=4, ensure_ascii=False)
 
     # --------------------------------------------------------
-    def generate_visualizations(self):
-        """Generate basic evaluation plots under *plots_dir*."""
+    def build_charts(self):
+        """Build the evaluation charts as JSON chart specs (see ``utils.report_renderer``)."""
+        charts = []
         # 1. Detection count comparison
-        plt.figure(figsize=(6, 4))
-        plt.bar(["Original", "Defended"], [self.metrics["original_detections"], self.metrics["defended_detections"]], color=["blue", "green"])
-        plt.ylabel("Detections")
-        plt.title("Detection Count Comparison")
-        plt.tight_layout()
-        plt.savefig(os.path.join(self.plots_dir, "detection_count_comparison.png"))
-        plt.close()
+        charts.append(chart(
+            "detection_count_comparison",
+            panel(bars(["Original", "Defended"], [self.metrics["original_detections"], self.metrics["defended_detections"]], color=["blue", "green"]),
+                  title="Detection Count Comparison", ylabel="Detections"),
+            figsize=(6, 4),
+        ))
 
         # 2. Confidence distribution comparison
         if self.metrics["original_conf_scores"] and self.metrics["defended_conf_scores"]:
-            plt.figure(figsize=(10, 4))
-            plt.subplot(1, 2, 1)
-            plt.hist(self.metrics["original_conf_scores"], bins=20, alpha=0.7, color="blue")
-            plt.title("Original Confidence")
-            plt.xlabel("Conf")
-            plt.subplot(1, 2, 2)
-            plt.hist(self.metrics["defended_conf_scores"], bins=20, alpha=0.7, color="green")
-            plt.title("Defended Confidence")
-            plt.xlabel("Conf")
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "confidence_distribution_comparison.png"))
-            plt.close()
+            charts.append(chart(
+                "confidence_distribution_comparison",
+                panel(histogram(self.metrics["original_conf_scores"], color="blue"), title="Original Confidence", xlabel="Conf"),
+                panel(histogram(self.metrics["defended_conf_scores"], color="green"), title="Defended Confidence", xlabel="Conf"),
+                figsize=(10, 4),
+            ))
 
         # 3. Detection change rate per image
         if self.metrics["detection_change_rate"]:
-            plt.figure(figsize=(8, 4))
-            plt.plot(self.metrics["detection_change_rate"], marker="o", linestyle="-")
-            plt.axhline(y=np.mean(self.metrics["detection_change_rate"]), color="r", linestyle="--", label=f"Mean: {np.mean(self.metrics['detection_change_rate']):.2f}")
-            plt.xlabel("Image idx")
-            plt.ylabel("Defended / Original")
-            plt.title("Detection Change Rate per Image")
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "detection_change_rate.png"))
-            plt.close()
+            mean_rate = np.mean(self.metrics["detection_change_rate"])
+            charts.append(chart(
+                "detection_change_rate",
+                panel(line(self.metrics["detection_change_rate"]), hline(mean_rate, label=f"Mean: {mean_rate:.2f}"),
+                      title="Detection Change Rate per Image", xlabel="Image idx", ylabel="Defended / Original", legend=True),
+                figsize=(8, 4),
+            ))
 
         # 4. Confidence change per image
         if self.metrics["confidence_change"]:
-            plt.figure(figsize=(8, 4))
-            plt.plot(self.metrics["confidence_change"], marker="o", linestyle="-")
-            plt.axhline(y=np.mean(self.metrics["confidence_change"]), color="r", linestyle="--", label=f"Mean: {np.mean(self.metrics['confidence_change']):.2f}")
-            plt.xlabel("Image idx")
-            plt.ylabel("Avg Conf (Def - Orig)")
-            plt.title("Confidence Change per Image")
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "confidence_change.png"))
-            plt.close()
+            mean_change = np.mean(self.metrics["confidence_change"])
+            charts.append(chart(
+                "confidence_change",
+                panel(line(self.metrics["confidence_change"]), hline(mean_change, label=f"Mean: {mean_change:.2f}"),
+                      title="Confidence Change per Image", xlabel="Image idx", ylabel="Avg Conf (Def - Orig)", legend=True),
+                figsize=(8, 4),
+            ))
+        return charts
+
+    # --------------------------------------------------------
+    def generate_visualizations(self):
+        """Write ``plots/charts.json`` and, if *render_plots*, render the PNG plots."""
+        charts = self.build_charts()
+        save_chart_specs(charts, self.plots_dir)
+        if self.render_plots:
+            render_charts(charts, self.plots_dir)
 
 # ------------------------------------------------------------
 # helper to parse k1=v1,k2=v2 strings
 # ------------------------------------------------------------
 
+def _parse_value(v: str):
+    # int/float/bool/None literals and a/b fractions; anything else stays a string
+    v = v.strip()
+    try:
+        return ast.literal_eval(v)
+    except (ValueError, SyntaxError):
+        pass
+    if "/" in v:
+        try:
+            return _parse_fraction(v)
+        except (ValueError, ZeroDivisionError):
+            pass
+    return v
+
 def _parse_kv_list(kv_str: str):
     if not kv_str:
         return {}
@@ -264,32 +333,326 @@ def _parse_kv_list(kv_str: str):
         if "=" not in token:
             continue
         k, v = token.split("=", 1)
-        # attempt to eval to int/float/bool
-        try:
-            out[k.strip()] = eval(v)
-        except Exception:
-            out[k.strip()] = v
+        out[k.strip()] = _parse_value(v)
     return out
 
+def _parse_fraction(value: str) -> float:
+    if "/" in value:
+        num, denom = value.split("/")
+        return float(num) / float(denom)
+    return float(value)
+
 # ------------------------------------------------------------
-# dynamic defense loader
+# parameter sweep
 # ------------------------------------------------------------
 
-def load_defense(name: str, **kwargs) -> BaseDefense:
-    module_name = f"algorithms.defenses.{name.lower()}"
+class DefenseChain(BaseDefense):
+    """Apply several defenses in sequence (one point of a multi-defense grid)."""
+
+    def __init__(self, defenses) -> None:
+        super().__init__(name="+".join(d.name for d in defenses))
+        self.defenses = list(defenses)
+
+    def defend(self, images, **kwargs):
+        for defense in self.defenses:
+            images = defense(images, **kwargs)
+        return images
+
+
+def parse_sweep_spec(spec: str):
+    """Expand a grid spec into a list of defense combinations.
+
+    ``"median_blur:ksize=3|5|7+jpeg_compression:quality=50|75|90"`` yields the
+    9 chained combinations ``[("median_blur", {"ksize": 3}), ("jpeg_compression",
+    {"quality": 50})]``, … Every combination is a list of ``(name, kwargs)``.
+    """
+    per_defense = []
+    for part in spec.split("+"):
+        name, _, params = part.strip().partition(":")
+        if not name:
+            raise ValueError(f"Invalid sweep spec: {spec!r}")
+        keys, values = [], []
+        for token in params.split(","):
+            if "=" not in token:
+                continue
+            k, v = token.split("=", 1)
+            keys.append(k.strip())
+            values.append([_parse_value(x) for x in v.split("|")])
+        per_defense.append([(name.strip(), dict(zip(keys, combo))) for combo in itertools.product(*values)])
+    return [list(combo) for combo in itertools.product(*per_defense)]
+
+
+def build_defense(combination) -> BaseDefense:
+    defenses = [DEFENSES.create(name, **kwargs) for name, kwargs in combination]
+    return defenses[0] if len(defenses) == 1 else DefenseChain(defenses)
+
+
+def describe_combination(combination) -> str:
+    return "+".join(
+        f"{name}({','.join(f'{k}={v}' for k, v in kwargs.items())})" for name, kwargs in combination
+    )
+
+
+def _clean_cache_path(model_name: str, image_paths, conf_threshold: float, iou_threshold: float):
+    """Cache file for clean predictions, keyed by weights, thresholds and image files."""
+    weights = os.path.realpath(ModelManager._resolve_model_path(model_name=model_name))
+    digest = hashlib.sha1()
+    weights_mtime = os.stat(weights).st_mtime_ns if os.path.exists(weights) else 0
+    digest.update(f"{weights}|{weights_mtime}|{conf_threshold}|{iou_threshold}".encode("utf-8"))
+    for p in image_paths:
+        st = os.stat(p)
+        digest.update(f"|{os.path.realpath(p)}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+    return _CACHE_DIR / f"clean_predictions_{digest.hexdigest()[:16]}.npz"
+
+
+def compute_clean_predictions(model, model_name: str, image_paths, conf_threshold: float,
+                              iou_threshold: float, batch_size: int = 8, num_workers: int = 4):
+    """Clean-image detections ``[x, y, w, h, class_id, conf]`` of the decodable images.
+
+    Images that fail to decode are skipped with a warning. Returns
+    ``(kept_paths, predictions)`` with one prediction array per kept path.
+    Results are stored under the shared cache directory, so repeated sweeps
+    over the same images and model skip clean inference entirely.
+    """
+    cache_path = _clean_cache_path(model_name, image_paths, conf_threshold, iou_threshold)
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                offsets, boxes = data["offsets"], data["boxes"]
+                kept = data["kept"] if "kept" in data.files else np.arange(len(image_paths))
+            print(f"Using cached clean predictions: {cache_path}")
+            return ([image_paths[i] for i in kept],
+                    [boxes[offsets[i]:offsets[i + 1]] for i in range(len(kept))])
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"Failed to read clean prediction cache {cache_path}: {e}, recomputing")
+
+    predictions, kept = [], []
+    images = DatasetManager.iter_images(image_paths, num_workers=num_workers)
+    batch = []
+    for i, (p, img_bgr, img_rgb) in enumerate(tqdm(images, total=len(image_paths), desc="Clean inference")):
+        if img_rgb is None:
+            print(f"[Warning] failed to load image: {p}")
+            continue
+        kept.append(i)
+        batch.append(img_rgb)
+        if len(batch) == batch_size:
+            predictions.extend(result_to_detections(r) for r in model.predict(batch, verbose=False))
+            batch = []
+    if batch:
+        predictions.extend(result_to_detections(r) for r in model.predict(batch, verbose=False))
+
+    offsets = np.zeros(len(predictions) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(d) for d in predictions])
+    boxes = np.concatenate(predictions).astype(np.float32) if predictions else np.zeros((0, 6), np.float32)
     try:
-        module = importlib.import_module(module_name)
-    except ModuleNotFoundError as e:
-        raise ValueError(
-            f"Unsupported defense algorithm: {name}. Expected file backend/{module_name.replace('.', '/')} .py"
-        ) from e
-
-    # find subclass
-    for attr in dir(module):
-        obj = getattr(module, attr)
-        if isinstance(obj, type) and issubclass(obj, BaseDefense) and obj is not BaseDefense:
-            return obj(**kwargs)
-    raise ValueError(f"No defense class found in module {module_name}")
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, offsets=offsets, boxes=boxes, kept=np.asarray(kept, dtype=np.int64))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Could not write clean prediction cache {cache_path}: {e}")
+    return [image_paths[i] for i in kept], [boxes[offsets[i]:offsets[i + 1]] for i in range(len(predictions))]
+
+
+# per-process state of sweep workers (the model, and the decoded images when they fit the cache budget)
+_sweep_state = {}
+
+
+def _init_sweep_worker(model_name, image_paths, clean_predictions, ground_truths,
+                       conf_threshold, iou_threshold, torch_threads=None, cache_images=True):
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    model = ModelManager.load_yolov8_model(model_name=model_name)
+    model.overrides["conf"] = conf_threshold
+    model.overrides["iou"] = iou_threshold
+    images = None
+    if cache_images:
+        images = [img_rgb for _, _, img_rgb in DatasetManager.iter_images(image_paths)]
+    _sweep_state.update(
+        model=model,
+        image_paths=list(image_paths),
+        images=images,
+        clean=clean_predictions,
+        ground_truths=ground_truths,
+    )
+
+
+def _sweep_batches(batch_size: int):
+    """Yield RGB image batches from the worker's cache, or decode them on the fly when not cached."""
+    images = _sweep_state["images"]
+    if images is not None:
+        for start in range(0, len(images), batch_size):
+            yield images[start:start + batch_size]
+        return
+    batch = []
+    for _, _, img_rgb in DatasetManager.iter_images(_sweep_state["image_paths"], num_workers=2):
+        batch.append(img_rgb)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _decoded_size(image_paths) -> int:
+    """Estimated bytes of all images decoded to RGB, extrapolated from the first image."""
+    if not image_paths:
+        return 0
+    _, _, img_rgb = DatasetManager._decode_image(image_paths[0])
+    return 0 if img_rgb is None else img_rgb.nbytes * len(image_paths)
+
+
+def _evaluate_combination(combination, batch_size: int = 8):
+    """Run defended inference for one combination and compare it with the cached clean predictions."""
+    model, num_images = _sweep_state["model"], len(_sweep_state["image_paths"])
+    clean, ground_truths = _sweep_state["clean"], _sweep_state["ground_truths"]
+    defense = build_defense(combination)
+
+    # clean predictions carry no ignore regions, so no class is treated as one
+    agreement = MAPAccumulator(ignore_classes=())
+    gt_map = MAPAccumulator() if ground_truths is not None else None
+    detections = clean_detections = 0
+    conf_change = []
+    defense_time = inference_time = 0.0
+    start = 0
+    for images in _sweep_batches(batch_size):
+        t0 = time.time()
+        defended = [np.ascontiguousarray(defense(img)) for img in images]
+        defense_time += time.time() - t0
+        t0 = time.time()
+        results = model.predict(defended, verbose=False)
+        inference_time += time.time() - t0
+
+        for offset, result in enumerate(results):
+            idx = start + offset
+            dets = result_to_detections(result)
+            # the clean predictions act as pseudo ground truth
+            agreement.update(dets, clean[idx])
+            if gt_map is not None and ground_truths[idx] is not None:
+                gt_map.update(dets, ground_truths[idx])
+            detections += len(dets)
+            clean_detections += len(clean[idx])
+            if len(dets) and len(clean[idx]):
+                conf_change.append(float(dets[:, 5].mean() - clean[idx][:, 5].mean()))
+        start += len(images)
+
+    agreement_metrics = agreement.finalize()
+    row = {
+        "combination": describe_combination(combination),
+        "defenses": [{"name": name, **kwargs} for name, kwargs in combination],
+        "detections": detections,
+        "detection_retention_rate": detections / clean_detections if clean_detections else 0,
+        "agreement_map50": agreement_metrics["map50"],
+        "agreement_map": agreement_metrics["map"],
+        "avg_confidence_change": float(np.mean(conf_change)) if conf_change else 0,
+        "avg_defense_time": defense_time / max(num_images, 1),
+        "avg_inference_time": inference_time / max(num_images, 1),
+    }
+    if gt_map is not None:
+        gt_metrics = gt_map.finalize()
+        row["map50"] = gt_metrics["map50"]
+        row["map"] = gt_metrics["map"]
+    return row
+
+
+def run_defense_sweep(model, model_name: str, combinations, image_paths, save_dir: str,
+                      conf_threshold: float = 0.25, iou_threshold: float = 0.5,
+                      dataset_name: str = None, num_workers: int = 4, batch_size: int = 8,
+                      image_cache_mb: int = 2048):
+    """Evaluate every defense combination and write one consolidated table.
+
+    Clean inference runs once (and is cached on disk); defended inference is
+    fanned out over a process pool whose workers each load the model once.
+    Each worker keeps the decoded images resident only while all workers
+    together stay within ``image_cache_mb``; otherwise they decode the images
+    batch by batch for every combination. ``num_workers <= 0`` evaluates in
+    this process.
+    """
+    # images that fail to decode are dropped here, so every later stage sees the same image list
+    image_paths, clean = compute_clean_predictions(model, model_name, image_paths, conf_threshold,
+                                                   iou_threshold, batch_size=batch_size)
+    ground_truths = None
+    if dataset_name:
+        ground_truths = [DatasetManager.get_annotations(p, dataset_name) for p in image_paths]
+        if all(gt is None for gt in ground_truths):
+            ground_truths = None
+
+    # clean baseline row
+    baseline = {
+        "combination": "none",
+        "defenses": [],
+        "detections": int(sum(len(d) for d in clean)),
+        "detection_retention_rate": 1.0,
+        "agreement_map50": 1.0,
+        "agreement_map": 1.0,
+        "avg_confidence_change": 0.0,
+        "avg_defense_time": 0.0,
+        "avg_inference_time": None,
+    }
+    if ground_truths is not None:
+        acc = MAPAccumulator()
+        for dets, gt in zip(clean, ground_truths):
+            if gt is not None:
+                acc.update(dets, gt)
+        baseline.update({k: v for k, v in acc.finalize().items() if k in ("map50", "map")})
+
+    init_args = (model_name, image_paths, clean, ground_truths, conf_threshold, iou_threshold)
+    rows = []
+    print(f"Sweeping {len(combinations)} defense combinations on {len(image_paths)} images …")
+    decoded_size = _decoded_size(image_paths)
+    if num_workers <= 0:
+        _init_sweep_worker(*init_args, cache_images=decoded_size <= image_cache_mb * 2**20)
+        for combination in tqdm(combinations):
+            rows.append(_evaluate_combination(combination, batch_size))
+    else:
+        num_workers = min(num_workers, len(combinations))
+        torch_threads = max(1, (os.cpu_count() or 1) // num_workers)
+        cache_images = num_workers * decoded_size <= image_cache_mb * 2**20
+        if not cache_images:
+            print(f"Decoded images ({decoded_size / 2**20:.0f} MB x {num_workers} workers) exceed "
+                  f"{image_cache_mb} MB, decoding per combination")
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_sweep_worker,
+            initargs=init_args + (torch_threads, cache_images),
+        ) as executor:
+            futures = [executor.submit(_evaluate_combination, c, batch_size) for c in combinations]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                rows.append(future.result())
+
+    rows.sort(key=lambda r: (r.get("map50", r["agreement_map50"]), r["detection_retention_rate"]), reverse=True)
+    rows.insert(0, baseline)
+    _save_sweep_table(rows, save_dir)
+    return rows
+
+
+def _save_sweep_table(rows, save_dir: str):
+    metrics_dir = os.path.join(save_dir, "metrics")
+    os.makedirs(metrics_dir, exist_ok=True)
+    with open(os.path.join(metrics_dir, "defense_sweep.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=4, ensure_ascii=False)
+
+    columns = [k for k in rows[0] if k != "defenses"]
+    for row in rows:
+        columns.extend(k for k in row if k not in columns and k != "defenses")
+    with open(os.path.join(metrics_dir, "defense_sweep.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    # console table
+    header = f"{'combination':<50} {'dets':>6} {'retain':>7} {'agr@50':>7} {'mAP50':>7} {'def ms':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        map50 = row.get("map50")
+        print(
+            f"{row['combination'][:50]:<50} {row['detections']:>6} {row['detection_retention_rate']:>7.3f} "
+            f"{row['agreement_map50']:>7.3f} {'-' if map50 is None else f'{map50:.3f}':>7} "
+            f"{row['avg_defense_time'] * 1000:>7.1f}"
+        )
 
 # ------------------------------------------------------------
 # main entry
@@ -306,7 +669,7 @@ def main():
         default="",  # auto-generate under backend/results if empty
         help="Relative directory name under backend/results (leave blank for auto timestamped folder)",
     )
-    parser.add_argument("--defense", type=str, required=True, help="Defense algorithm name (e.g. median_blur)")
+    parser.add_argument("--defense", type=str, default="", help=f"Defense algorithm name ({', '.join(DEFENSES.names())})")
     parser.add_argument(
         "--defense_params",
         type=str,
@@ -315,8 +678,40 @@ def main():
     )
     parser.add_argument("--conf_threshold", type=float, default=0.25, help="Model confidence threshold")
     parser.add_argument("--iou_threshold", type=float, default=0.5, help="IoU threshold")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible image sampling")
+    parser.add_argument("--attack", type=str, default="", help="Attack applied before the defense (e.g. pgd); empty for clean images")
+    parser.add_argument("--eps", type=str, default="8/255", help="Attack epsilon")
+    parser.add_argument("--alpha", type=str, default="2/255", help="Attack step size")
+    parser.add_argument("--steps", type=int, default=10, help="Attack iterations")
+    parser.add_argument("--adaptive", action="store_true", help="Attack end to end through the defense (BPDA for non-differentiable defenses)")
+    parser.add_argument("--bpda", type=str, default="auto", choices=["auto", "on", "off"], help="Gradient mode for --adaptive")
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        action="append",
+        default=[],
+        help="Defense grid, e.g. 'median_blur:ksize=3|5|7+jpeg_compression:quality=50|75|90' (repeatable)",
+    )
+    parser.add_argument("--sweep_workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker processes for --sweep (0 = in-process)")
+    parser.add_argument("--batch_size", type=int, default=8, help="Inference batch size for --sweep")
+    parser.add_argument("--sweep_image_cache_mb", type=int, default=2048,
+                        help="Memory all --sweep workers together may use to keep decoded images resident")
 
     args = parser.parse_args()
+    if not args.defense and not args.sweep:
+        parser.error("either --defense or --sweep is required")
+    if args.sweep and args.attack:
+        parser.error("--attack is not supported together with --sweep")
+
+    # validate every defense combination before any inference runs
+    combinations = [c for spec in args.sweep for c in parse_sweep_spec(spec)]
+    checks = [(args.defense, _parse_kv_list(args.defense_params))] if args.defense else []
+    checks += [item for combination in combinations for item in combination]
+    try:
+        for name, kwargs in checks:
+            DEFENSES.get(name).validate(kwargs)
+    except ValueError as e:
+        parser.error(str(e))
 
     # -----------------------------------
     # Resolve output directory
@@ -334,7 +729,7 @@ def main():
             folder_name = args.save_dir.strip("/\\")  # remove any leading/trailing slashes
         else:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
-            folder_name = f"{args.defense}_{timestamp}"
+            folder_name = f"{args.defense or 'sweep'}_{timestamp}"
 
         save_dir = os.path.join(base_results, folder_name)
     os.makedirs(save_dir, exist_ok=True)
@@ -344,22 +739,46 @@ def main():
     model.overrides["conf"] = args.conf_threshold
     model.overrides["iou"] = args.iou_threshold
 
-    # instantiate defense
-    defense_kwargs = _parse_kv_list(args.defense_params)
-    defense = load_defense(args.defense, **defense_kwargs)
-
-    print(f"Loaded defense: {defense.__class__.__name__} with params {defense_kwargs}")
-
     # collect dataset images
     image_paths = DatasetManager.get_test_images(
         dataset_name=args.dataset,
         num_images=args.num_images if args.num_images > 0 else None,
         random_select=args.num_images > 0,
+        seed=args.seed,
     )
     if not image_paths:
         print("[Error] No images found. Exiting.")
         return
 
+    if args.sweep:
+        run_defense_sweep(
+            model,
+            args.model,
+            combinations,
+            image_paths,
+            save_dir,
+            conf_threshold=args.conf_threshold,
+            iou_threshold=args.iou_threshold,
+            dataset_name=args.dataset,
+            num_workers=args.sweep_workers,
+            batch_size=args.batch_size,
+            image_cache_mb=args.sweep_image_cache_mb,
+        )
+        print(f"Sweep table: {os.path.join(save_dir, 'metrics', 'defense_sweep.csv')}")
+        return
+
+    # instantiate defense
+    defense_kwargs = _parse_kv_list(args.defense_params)
+    defense = DEFENSES.create(args.defense, **defense_kwargs)
+
+    print(f"Loaded defense: {defense.__class__.__name__} with params {defense_kwargs}")
+
+    attack = None
+    if args.attack:
+        attack = ATTACKS.create(args.attack, ignore_unknown=True, eps=_parse_fraction(args.eps),
+                                alpha=_parse_fraction(args.alpha), steps=args.steps)
+        print(f"Loaded attack: {attack.__class__.__name__} ({'adaptive' if args.adaptive else 'transfer'})")
+
     # evaluator
     evaluator = DefenseEvaluator(
         model=model,
@@ -367,6 +786,9 @@ def main():
         save_dir=save_dir,
         conf_threshold=args.conf_threshold,
         iou_threshold=args.iou_threshold,
+        attack=attack,
+        adaptive=args.adaptive,
+        bpda={"auto": None, "on": True, "off": False}[args.bpda],
     )
     evaluator.metrics["defense_params"] = {"name": args.defense, **defense_kwargs}
 
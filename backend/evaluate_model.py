@@ -6,20 +6,30 @@ import argparse
 import cv2
 import numpy as np
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 from tqdm import tqdm
 from sklearn.metrics import confusion_matrix, precision_recall_curve, average_precision_score
 from utils.model_manager import ModelManager
 from utils.dataset_manager import DatasetManager
+from utils.progress import ProgressReporter
+from utils.evaluator import MAPAccumulator, result_to_detections
+from utils.report_renderer import chart, panel, histogram, bars, heatmap, save_chart_specs, render_charts, report_plots_html
 from collections import defaultdict
 import time
 import torch
 
+# Section titles of the report charts (chart name -> title)
+REPORT_PLOT_TITLES = {
+    "confidence_distribution": "Confidence Distribution",
+    "class_distribution": "Class Distribution",
+    "inference_time_distribution": "Inference Time Distribution",
+    "class_distribution_heatmap": "Top 10 Class Distribution Heatmap",
+}
+
 class EnhancedEvaluator:
     """Enhanced evaluator providing comprehensive metrics and visualizations"""
     
-    def __init__(self, model, save_dir, conf_threshold=0.25, iou_threshold=0.5):
+    def __init__(self, model, save_dir, conf_threshold=0.25, iou_threshold=0.5, batch_size=1, dataset_name=None,
+                 render_plots=True, plot_format=None):
         """
         Initialize the evaluator
         
@@ -28,11 +38,24 @@ class EnhancedEvaluator:
             save_dir: Directory to save results
             conf_threshold: Confidence threshold
             iou_threshold: IoU threshold
+            batch_size: Number of images grouped into a single predict call
+            dataset_name: Dataset whose annotations are used for mAP (None to skip)
+            render_plots: Render PNG charts in-process; when False only plots/charts.json is
+                written and rendering is left to a separate report task
+            plot_format: Image format the HTML report links to when render_plots is False and
+                a report task renders the charts; None means no images are rendered and the
+                report points to plots/charts.json
         """
         self.model = model
         self.save_dir = save_dir
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
+        self.batch_size = max(1, int(batch_size))
+        self.dataset_name = dataset_name
+        self.render_plots = render_plots
+        self.plot_format = "png" if render_plots else plot_format
+        self.charts = []
+        self.map_accumulator = MAPAccumulator()
         
         # Create save directories
         self.results_dir = os.path.join(save_dir, "detection_results")
@@ -50,39 +73,103 @@ class EnhancedEvaluator:
             "detection_by_class": defaultdict(int),
             "conf_scores": [],
             "class_names": [],
-            "inference_times": []
+            "inference_times": [],
+            "batch_times": []
         }
     
-    def evaluate_image(self, image_path, ground_truth=None):
+    def evaluate_image(self, image_path, ground_truth=None, image_rgb=None):
         """
         Evaluate a single image
         
         Args:
             image_path: Path to the image
             ground_truth: Ground truth annotations (if available)
+            image_rgb: Preloaded RGB image, read from image_path if None
             
         Returns:
             Detection results, inference time
         """
-        # Load image
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"Failed to load image: {image_path}")
-            return None, 0
-            
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if image_rgb is None:
+            # Load image
+            image = cv2.imread(image_path)
+            if image is None:
+                print(f"Failed to load image: {image_path}")
+                return None, 0
+                
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
         # Perform inference and time it
         start_time = time.time()
         results = self.model.predict(image_rgb)
         inference_time = time.time() - start_time
         
+        self._record_result(image_path, results[0], inference_time)
+        
+        return results, inference_time
+    
+    def evaluate_batch(self, image_paths, images_rgb=None):
+        """
+        Evaluate a batch of images with a single predict call
+        
+        Args:
+            image_paths: List of image paths
+            images_rgb: Preloaded RGB images aligned with image_paths, read from disk if None
+            
+        Returns:
+            Detection results, batch inference time
+        """
+        if images_rgb is None:
+            images_rgb = [None] * len(image_paths)
+        
+        # Load images, skipping the ones that cannot be decoded
+        loaded_paths = []
+        loaded_images = []
+        for image_path, image_rgb in zip(image_paths, images_rgb):
+            if image_rgb is None:
+                image = cv2.imread(image_path)
+                if image is None:
+                    print(f"Failed to load image: {image_path}")
+                    continue
+                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            loaded_paths.append(image_path)
+            loaded_images.append(image_rgb)
+        images_rgb = loaded_images
+        
+        if not images_rgb:
+            return None, 0
+        
+        # Perform batched inference and time it
+        start_time = time.time()
+        results = self.model.predict(images_rgb)
+        batch_time = time.time() - start_time
+        
+        self.metrics["batch_times"].append(batch_time)
+        
+        # Attribute an equal share of the batch latency to each image
+        per_image_time = batch_time / len(images_rgb)
+        for image_path, result in zip(loaded_paths, results):
+            self._record_result(image_path, result, per_image_time)
+        
+        return results, batch_time
+    
+    def _record_result(self, image_path, result, inference_time):
+        """
+        Update metrics and save the detection image for one result
+        
+        Args:
+            image_path: Path to the image
+            result: Ultralytics result for the image
+            inference_time: Inference time attributed to the image
+        """
         # Update metrics
         self.metrics["total_images"] += 1
         self.metrics["inference_times"].append(inference_time)
         
+        # Accumulate mAP against ground truth when annotations are available
+        self._accumulate_map(image_path, result)
+        
         # Process detection results
-        boxes = results[0].boxes
+        boxes = result.boxes
         self.metrics["total_detections"] += len(boxes)
         
         # Collect confidence and class for each detection
@@ -96,25 +183,44 @@ class EnhancedEvaluator:
             self.metrics["detection_by_class"][class_name] += 1
         
         # Save detection result image
-        result_image = results[0].plot()
+        result_image = result.plot()
         image_name = os.path.basename(image_path)
         unique_name = f"{self.metrics['total_images']:04d}_{image_name}"
         cv2.imwrite(os.path.join(self.results_dir, unique_name), result_image)
-        
-        return results, inference_time
     
-    def evaluate_dataset(self, image_paths):
+    def evaluate_dataset(self, image_paths, num_workers=4, progress_callback=None):
         """
         Evaluate the entire dataset
         
         Args:
             image_paths: List of image paths
+            num_workers: Number of background image decoding threads
+            progress_callback: Optional callable receiving a progress dict
+                (processed count, throughput and running metrics)
         """
         print(f"Starting evaluation on {len(image_paths)} images...")
         
+        # Decode images ahead of inference on a background pool
+        images = DatasetManager.iter_images(image_paths, num_workers=num_workers,
+                                            prefetch=max(8, 2 * self.batch_size))
+        progress = ProgressReporter(progress_callback, len(image_paths))
+        
         # Use tqdm for progress bar
-        for image_path in tqdm(image_paths):
-            self.evaluate_image(image_path)
+        batch_paths, batch_images = [], []
+        for processed, (image_path, image, image_rgb) in enumerate(tqdm(images, total=len(image_paths)), 1):
+            if image is None:
+                print(f"Failed to load image: {image_path}")
+            elif self.batch_size > 1:
+                batch_paths.append(image_path)
+                batch_images.append(image_rgb)
+                if len(batch_paths) == self.batch_size or processed == len(image_paths):
+                    self.evaluate_batch(batch_paths, batch_images)
+                    batch_paths, batch_images = [], []
+            else:
+                self.evaluate_image(image_path, image_rgb=image_rgb)
+            progress.update(processed, self.running_metrics())
+        if batch_paths:
+            self.evaluate_batch(batch_paths, batch_images)
         
         # Calculate summary metrics
         self.calculate_summary_metrics()
@@ -127,6 +233,25 @@ class EnhancedEvaluator:
         
         print(f"Evaluation complete! Results saved to {self.save_dir}")
     
+    def _accumulate_map(self, image_path, result):
+        """Add one image to the mAP accumulator if its annotation file exists"""
+        if self.dataset_name is None:
+            return
+        ground_truth = DatasetManager.get_annotations(image_path, self.dataset_name)
+        if ground_truth is None:
+            return
+        self.map_accumulator.update(result_to_detections(result), ground_truth)
+    
+    def running_metrics(self):
+        """Return a small snapshot of the metrics accumulated so far"""
+        total_images = self.metrics["total_images"]
+        return {
+            "total_images": total_images,
+            "total_detections": self.metrics["total_detections"],
+            "avg_detections_per_image": self.metrics["total_detections"] / total_images if total_images > 0 else 0,
+            "avg_inference_time": float(np.mean(self.metrics["inference_times"])) if self.metrics["inference_times"] else 0
+        }
+    
     def calculate_summary_metrics(self):
         """Calculate summary metrics"""
         # Calculate average inference time
@@ -143,25 +268,26 @@ class EnhancedEvaluator:
             "total_images": self.metrics["total_images"]
         }
         
+        # mAP against ground truth, only when annotations were found
+        if self.map_accumulator.num_images > 0:
+            self.metrics["summary"]["map"] = self.map_accumulator.finalize(self.model.names)
+        
         # Return metrics
         return self.metrics
     
-    def generate_visualizations(self):
-        """Generate visualization charts"""
+    def build_charts(self):
+        """Build the report charts as JSON chart specs (see utils.report_renderer)"""
+        charts = []
         # 1. Confidence distribution histogram
         if self.metrics["conf_scores"]:
-            plt.figure(figsize=(10, 6))
-            plt.hist(self.metrics["conf_scores"], bins=20, alpha=0.7, color='blue')
-            plt.title("Confidence Score Distribution")
-            plt.xlabel("Confidence")
-            plt.ylabel("Count")
-            plt.grid(True, alpha=0.3)
-            plt.savefig(os.path.join(self.plots_dir, "confidence_distribution.png"))
-            plt.close()
+            charts.append(chart(
+                "confidence_distribution",
+                panel(histogram(self.metrics["conf_scores"], color='blue'),
+                      title="Confidence Score Distribution", xlabel="Confidence", ylabel="Count", grid=True)
+            ))
         
         # 2. Class distribution bar chart
         if self.metrics["detection_by_class"]:
-            plt.figure(figsize=(12, 8))
             classes = list(self.metrics["detection_by_class"].keys())
             counts = list(self.metrics["detection_by_class"].values())
             
@@ -170,23 +296,21 @@ class EnhancedEvaluator:
             classes = [classes[i] for i in sorted_indices]
             counts = [counts[i] for i in sorted_indices]
             
-            plt.barh(classes, counts, color='green')
-            plt.title("Class Distribution")
-            plt.xlabel("Count")
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "class_distribution.png"))
-            plt.close()
+            charts.append(chart(
+                "class_distribution",
+                panel(bars(classes, counts, color='green', horizontal=True),
+                      title="Class Distribution", xlabel="Count"),
+                figsize=(12, 8)
+            ))
         
         # 3. Inference time distribution
         if self.metrics["inference_times"]:
-            plt.figure(figsize=(10, 6))
-            plt.hist(self.metrics["inference_times"], bins=20, alpha=0.7, color='purple')
-            plt.title("Inference Time Distribution")
-            plt.xlabel("Inference Time (seconds)")
-            plt.ylabel("Count")
-            plt.grid(True, alpha=0.3)
-            plt.savefig(os.path.join(self.plots_dir, "inference_time_distribution.png"))
-            plt.close()
+            charts.append(chart(
+                "inference_time_distribution",
+                panel(histogram(self.metrics["inference_times"], color='purple'),
+                      title="Inference Time Distribution", xlabel="Inference Time (seconds)", ylabel="Count",
+                      grid=True)
+            ))
         
         # 4. If enough classes, generate confusion matrix heatmap
         if len(set(self.metrics["class_names"])) > 1 and len(self.metrics["class_names"]) > 10:
@@ -203,14 +327,20 @@ class EnhancedEvaluator:
             for i, cls in enumerate(top_class_names):
                 cm[i, i] = class_counts[cls]
             
-            plt.figure(figsize=(10, 8))
-            sns.heatmap(cm, annot=True, fmt=".0f", xticklabels=top_class_names, yticklabels=top_class_names)
-            plt.title("Top 10 Class Distribution")
-            plt.xlabel("Predicted Class")
-            plt.ylabel("True Class (assumed)")
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.plots_dir, "class_distribution_heatmap.png"))
-            plt.close()
+            charts.append(chart(
+                "class_distribution_heatmap",
+                panel(heatmap(cm, top_class_names, top_class_names),
+                      title="Top 10 Class Distribution", xlabel="Predicted Class", ylabel="True Class (assumed)"),
+                figsize=(10, 8)
+            ))
+        return charts
+    
+    def generate_visualizations(self):
+        """Write plots/charts.json and, if render_plots is set, render the PNG charts"""
+        self.charts = self.build_charts()
+        save_chart_specs(self.charts, self.plots_dir)
+        if self.render_plots:
+            render_charts(self.charts, self.plots_dir)
     
     def save_metrics(self):
         """Save evaluation metrics to JSON file"""
@@ -270,6 +400,30 @@ class EnhancedEvaluator:
                     "total_images": 0
                 }
             }
+        # mAP card, only when ground truth was available
+        map_html = ""
+        map_metrics = metrics.get("summary", {}).get("map")
+        if map_metrics:
+            map_html = f"""
+                <div class="metric-card">
+                    <h2>Accuracy (COCO-style mAP)</h2>
+                    <div class="metric-row">
+                        <div class="metric-box">
+                            <div class="metric-value">{map_metrics["map"]:.4f}</div>
+                            <div class="metric-label">mAP@[.5:.95]</div>
+                        </div>
+                        <div class="metric-box">
+                            <div class="metric-value">{map_metrics["map50"]:.4f}</div>
+                            <div class="metric-label">mAP@.5</div>
+                        </div>
+                        <div class="metric-box">
+                            <div class="metric-value">{map_metrics["map75"]:.4f}</div>
+                            <div class="metric-label">mAP@.75</div>
+                        </div>
+                    </div>
+                </div>
+            """
+        
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -320,34 +474,12 @@ class EnhancedEvaluator:
                         </div>
                     </div>
                 </div>
-                
+                {map_html}
                 <div class="metric-card">
                     <h2>Visualizations</h2>
-                    <div class="plot-container">
-                        <h3>Confidence Distribution</h3>
-                        <img src="plots/confidence_distribution.png" alt="Confidence Distribution" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Class Distribution</h3>
-                        <img src="plots/class_distribution.png" alt="Class Distribution" style="max-width: 100%;">
-                    </div>
-                    
-                    <div class="plot-container">
-                        <h3>Inference Time Distribution</h3>
-                        <img src="plots/inference_time_distribution.png" alt="Inference Time Distribution" style="max-width: 100%;">
-                    </div>
+                    {report_plots_html(self.charts, self.plot_format, REPORT_PLOT_TITLES)}
         """
         
-        # Add class distribution heatmap if exists
-        if os.path.exists(os.path.join(self.plots_dir, "class_distribution_heatmap.png")):
-            html_content += """
-                    <div class="plot-container">
-                        <h3>Top 10 Class Distribution Heatmap</h3>
-                        <img src="plots/class_distribution_heatmap.png" alt="Class Distribution Heatmap" style="max-width: 100%;">
-                    </div>
-            """
-        
         # Add class detection statistics table
         html_content += """
                 </div>
@@ -457,6 +589,8 @@ def main():
     parser.add_argument("--save_dir", type=str, default="results/model_evaluation_results", help="Directory to save results")
     parser.add_argument("--conf_threshold", type=float, default=0.25, help="Confidence threshold")
     parser.add_argument("--iou_threshold", type=float, default=0.5, help="IoU threshold")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible image sampling")
+    parser.add_argument("--batch_size", type=int, default=1, help="Number of images per predict call")
     parser.add_argument("--model_path", type=str, default="backend/models/runs/standard_test/yolov8s-visdrone4/best.pt", help="Path to model weights (.pt). If provided, overrides --model name.")
     args = parser.parse_args()
     
@@ -481,7 +615,8 @@ def main():
     image_paths = DatasetManager.get_test_images(
         dataset_name=args.dataset, 
         num_images=args.num_images if args.num_images > 0 else None,
-        random_select=args.num_images > 0  # Randomly select if number is specified
+        random_select=args.num_images > 0,  # Randomly select if number is specified
+        seed=args.seed
     )
     
     if not image_paths:
@@ -495,7 +630,9 @@ def main():
         model=model, 
         save_dir=save_dir,
         conf_threshold=args.conf_threshold,
-        iou_threshold=args.iou_threshold
+        iou_threshold=args.iou_threshold,
+        batch_size=args.batch_size,
+        dataset_name=args.dataset
     )
     
     # Perform evaluation
@@ -11,6 +11,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import api # 引入 api 模块
 from config.config_api import router as config_router # 引入 config_api 模块
 
+# Web 进程只负责投递任务，不应加载以下重量级依赖（它们只属于 Celery worker），见 tests/test_import_budget.py
+HEAVY_MODULES = ("torch", "torchvision", "cv2", "ultralytics", "sklearn", "seaborn", "matplotlib")
+# 导入耗时预算（秒），可通过环境变量调整
+IMPORT_BUDGET = float(os.getenv("SKYGUARD_IMPORT_BUDGET", "2.0"))
+
 app = FastAPI(title="SkyGuard API", version="1.0.0")
 
 # CORS 设置，前端 dev 端口 5173 / 8080
@@ -3,21 +3,72 @@ import torch
 import cv2
 import os
 import numpy as np
-import importlib
-import inspect
 from uuid import uuid4
 from pathlib import Path
 import sys
-from celery_app import celery_app
+from celery import current_task
+from celery.signals import worker_process_init
+from billiard.process import current_process
+from celery_app import celery_app, MODEL_TEST_TASK, ATTACK_RUN_TASK, REPORT_RENDER_TASK
 from evaluate_model import EnhancedEvaluator  # 直接导入评估类
 from evaluate_adversarial import AdversarialEvaluator, parse_fraction
-from algorithms.attacks.base import BaseAttack  # 用于类型检查
+from algorithms.registry import ATTACKS, preload_algorithms
 from utils.model_manager import ModelManager
 from utils.dataset_manager import DatasetManager
+from utils.dataset_manifest import DatasetManifest
+from utils.report_renderer import render_report
+from utils.worker_runtime import configure_worker_process, warm_up_models
 import traceback
 
-def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDrone", num_images=-1, conf_threshold=0.25, iou_threshold=0.5):
-    """在后台评估模型原始性能"""
+# worker 启动时发现并导入全部攻击 / 防御算法，之后按名称创建只需查表
+preload_algorithms()
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    """每个 worker 子进程启动时绑定设备 / CPU、设置线程数并预加载模型"""
+    configure_worker_process(
+        index=getattr(current_process(), "index", 0) or 0,
+        concurrency=celery_app.conf.worker_concurrency or 1
+    )
+    warm_up_models()
+
+def _task_progress_callback(task_id):
+    """返回把评估进度写入 Celery 任务状态 (PROGRESS) 的回调；不在 worker 中执行时返回 None"""
+    task = current_task._get_current_object() if current_task else None
+    if task is None or not task.request.id:
+        return None
+
+    def callback(progress):
+        task.update_state(state="PROGRESS", meta={"task_id": task_id, **progress})
+
+    return callback
+
+@celery_app.task(name=REPORT_RENDER_TASK)
+def render_report_task(plots_dir, formats=("png",)):
+    """渲染 plots_dir/charts.json 中的报告图表（在低优先级的 reports 队列中执行）"""
+    outputs = render_report(plots_dir, tuple(formats))
+    return {"status": "Completed", "plots_dir": plots_dir, "plots": outputs}
+
+def _schedule_report(plots_dir, report_format):
+    """
+    按 report_format 处理评估器写出的图表描述
+
+    json: 只保留 charts.json（前端自行绘制），不渲染图片
+    png: 投递独立的渲染任务（HTML 报告引用这些图片），返回其任务 ID
+    """
+    if report_format == "json":
+        return None
+    return render_report_task.apply_async(
+        args=[os.path.abspath(plots_dir)], kwargs={"formats": [report_format]}
+    ).id
+
+def _report_plot_format(report_format):
+    """HTML 报告引用的图片格式：json 不渲染图片，报告改为指向 charts.json"""
+    return None if report_format == "json" else report_format
+
+@celery_app.task(name=MODEL_TEST_TASK)
+def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDrone", num_images=-1, conf_threshold=0.25, iou_threshold=0.5, batch_size=1, seed=None, report_format="png"):
+    """在后台评估模型原始性能（seed 不为None时图像抽样可复现；图表由独立的 report.render 任务按 report_format 渲染）"""
     try:
         # 0. 打印调试信息
         print(f"开始执行测试任务: task_id={task_id}, model_name={model_name}, dataset_name={dataset_name}")
@@ -88,19 +139,15 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
                 if exists:
                     # 使用找到的路径
                     print(f"使用找到的路径: {path}")
-                    # 手动获取图像文件
-                    image_files = [f for f in os.listdir(path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-                    if image_files:
-                        print(f"找到 {len(image_files)} 个图像文件")
-                        if num_images is not None and num_images > 0 and num_images < len(image_files):
-                            import random
-                            if num_images != -1:
-                                if num_images is not None and num_images != -1:
-                                    image_files = random.sample(image_files, num_images)
-                                else:
-                                    image_files = image_files[:num_images]
-                        
-                        image_paths = [os.path.join(path, f) for f in image_files]
+                    # 通过文件清单获取图像文件（目录未变化时复用缓存）
+                    manifest = DatasetManifest.for_directory(path)
+                    if len(manifest):
+                        print(f"找到 {len(manifest)} 个图像文件")
+                        image_paths = manifest.sample(
+                            num_images if num_images is not None and num_images > 0 else None,
+                            seed=seed,
+                            random_select=True
+                        )
                         print(f"使用手动获取的图像路径: {len(image_paths)} 个")
                         break
         
@@ -111,7 +158,8 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
                 image_paths = DatasetManager.get_test_images(
                     dataset_name=dataset_name,
                     num_images=(num_images if num_images != -1 else None),
-                    random_select=(num_images is not None and num_images != -1)
+                    random_select=(num_images is not None and num_images != -1),
+                    seed=seed
                 )
                 print(f"DatasetManager返回的图像路径数量: {len(image_paths) if image_paths else 0}")
             except Exception as e:
@@ -150,7 +198,7 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
                             # 使用找到的图像
                             if num_images > 0 and num_images < len(image_files):
                                 import random
-                                image_files = random.sample(image_files, num_images)
+                                image_files = random.Random(seed).sample(sorted(image_files), num_images)
                             else:
                                 image_files = image_files[:num_images if num_images > 0 else len(image_files)]
                                 
@@ -172,17 +220,21 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
             model=model,
             save_dir=result_path,
             conf_threshold=conf_threshold,
-            iou_threshold=iou_threshold
+            iou_threshold=iou_threshold,
+            batch_size=batch_size,
+            dataset_name=dataset_name,
+            render_plots=False,
+            plot_format=_report_plot_format(report_format)
         )
-        evaluator.evaluate_dataset(image_paths)
+        evaluator.evaluate_dataset(image_paths, progress_callback=_task_progress_callback(task_id))
 
-        # 5. 计算指标并生成可视化
-        print("计算指标并生成可视化")
+        # 5. 计算指标并生成报告（evaluate_dataset 已写出图表描述，图片交给渲染任务）
+        print("计算指标并生成报告")
+        report_task_id = None
         try:
             metrics = evaluator.calculate_summary_metrics()
             print(f"计算得到的指标: {metrics}")
             
-            evaluator.generate_visualizations()
             evaluator.save_metrics()
             
             # 确保metrics不为None
@@ -192,6 +244,7 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
                 
             evaluator.generate_html_report(metrics)
             print("HTML报告生成成功")
+            report_task_id = _schedule_report(evaluator.plots_dir, report_format)
         except Exception as e:
             print(f"生成报告时出错: {str(e)}")
             traceback.print_exc()
@@ -202,7 +255,8 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
             "status": "Completed",
             "result_path": result_path,
             "num_images_tested": len(image_paths),
-            "metrics": metrics
+            "metrics": metrics,
+            "report_task_id": report_task_id
         }
 
     except Exception as e:
@@ -226,34 +280,13 @@ def test_model_task(task_id, model_name="yolov8s-visdrone", dataset_name="VisDro
         traceback.print_exc()
         raise e
 
-def load_attack_by_name(name: str, **kwargs):
-    """根据名称动态加载 algorithms.attacks.<name>.py 中的攻击类并实例化。
-    如果传入的 kwargs 参数不被目标类接受，会自动过滤掉。"""
-    module_name = f"algorithms.attacks.{name.lower()}"
-    try:
-        module = importlib.import_module(module_name)
-    except ModuleNotFoundError as e:
-        raise ValueError(f"不支持的攻击算法: {name}。预期的文件路径: algorithms/attacks/{name.lower()}.py") from e
-
-    # 查找 BaseAttack 的子类
-    for attr in dir(module):
-        obj = getattr(module, attr)
-        if isinstance(obj, type) and issubclass(obj, BaseAttack) and obj is not BaseAttack:
-            try:
-                # 直接尝试实例化
-                return obj(**kwargs)
-            except TypeError:
-                # 过滤不兼容的 kwargs 再尝试一次
-                sig = inspect.signature(obj.__init__)
-                filtered_kwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
-                return obj(**filtered_kwargs)
-
-    raise ValueError(f"在模块 {module_name} 中未找到攻击类")
-
-@celery_app.task(name="attack.run")
+@celery_app.task(name=ATTACK_RUN_TASK)
 def run_attack_task(task_id=None, attack_name="pgd", model_name="yolov8s-visdrone", 
                    dataset_name="VisDrone", num_images=10, eps="8/255", alpha="2/255", 
-                   steps=10, conf_threshold=0.25, iou_threshold=0.5):
+                   steps=10, conf_threshold=0.25, iou_threshold=0.5, batch_size=1, seed=None,
+                   artifact_policy="all", artifact_samples=10, eps_sweep=None, warm_steps=None,
+                   warm_start=True, early_stop=False, precision="fp32", channels_last=False,
+                   compile_model=False, report_format="png"):
     """
     通用对抗攻击评估任务
     
@@ -268,6 +301,19 @@ def run_attack_task(task_id=None, attack_name="pgd", model_name="yolov8s-visdron
         steps: 攻击迭代步数，仅迭代攻击使用
         conf_threshold: 置信度阈值
         iou_threshold: IoU阈值
+        batch_size: 一次性批量攻击的图像数量
+        seed: 图像抽样的随机种子，不为None时可复现
+        artifact_policy: 结果图像保存策略 (none / sampled / all)
+        artifact_samples: sampled 策略下保存的图像数量
+        eps_sweep: 逗号分隔的扰动大小列表 (如 "2/255,4/255,8/255")，指定时在同一任务中
+            复用已加载的模型与图像完成整个扫描并返回鲁棒性曲线
+        warm_steps: 扫描中热启动运行的迭代步数，默认为 steps 的一半
+        warm_start: 扫描中是否从上一个 eps 的对抗样本热启动
+        early_stop: 按样本提前终止迭代攻击（最大置信度低于 conf_threshold 即停止），仅PGD使用
+        precision: 攻击循环的计算精度 (fp32 / bf16 / fp16)，非 fp32 时首个批次同时以 fp32 执行并报告一致性
+        channels_last: 攻击循环是否使用 channels_last 内存格式
+        compile_model: 是否使用 torch.compile 编译攻击循环中的网络
+        report_format: 报告图表格式 (png 由独立的 report.render 任务渲染，json 只输出图表描述 plots/charts.json)
     """
     if task_id is None:
         task_id = str(uuid4())
@@ -286,19 +332,24 @@ def run_attack_task(task_id=None, attack_name="pgd", model_name="yolov8s-visdron
         eps_val = parse_fraction(str(eps))
         alpha_val = parse_fraction(str(alpha))
         
-        # 根据攻击类型准备参数
+        # 根据攻击算法的构造参数准备参数（迭代攻击才使用 alpha / steps）
+        spec = ATTACKS.get(attack_name)
         attack_params = {"eps": eps_val}
-        if attack_name.lower() == "pgd":
+        if spec.accepts("alpha"):
             attack_params.update({"alpha": alpha_val, "steps": steps})
+        if early_stop:
+            attack_params.update({"early_stop": True, "stop_conf": conf_threshold})
         
-        # 动态加载攻击算法
-        attack = load_attack_by_name(attack_name, **attack_params)
+        # 通过注册表创建攻击实例（参数不匹配时立即报错）
+        attack = spec.create(**attack_params)
+        attack.set_execution_mode(precision, channels_last, compile_model)
 
         # 4. 获取数据集图像
         image_paths = DatasetManager.get_test_images(
             dataset_name=dataset_name,
             num_images=(num_images if num_images != -1 else None),
-            random_select=(num_images != -1 and num_images is not None)
+            random_select=(num_images != -1 and num_images is not None),
+            seed=seed
         )
         if not image_paths:
             raise ValueError(f"未找到 {dataset_name} 数据集图像，请检查数据集目录是否存在")
@@ -309,11 +360,34 @@ def run_attack_task(task_id=None, attack_name="pgd", model_name="yolov8s-visdron
             attack=attack,
             save_dir=save_dir,
             conf_threshold=conf_threshold,
-            iou_threshold=iou_threshold
+            iou_threshold=iou_threshold,
+            batch_size=batch_size,
+            artifact_policy=artifact_policy,
+            artifact_samples=artifact_samples,
+            render_plots=False,
+            plot_format=_report_plot_format(report_format)
         )
         
-        # 6. 执行评估
-        evaluator.evaluate_dataset(image_paths)
+        # 6. 执行评估（指定 eps_sweep 时生成鲁棒性曲线）
+        if eps_sweep:
+            eps_values = [parse_fraction(e.strip()) for e in str(eps_sweep).split(",") if e.strip()]
+            curve = evaluator.evaluate_sweep(
+                image_paths,
+                eps_values,
+                warm_steps=warm_steps,
+                warm_start=warm_start,
+                progress_callback=_task_progress_callback(task_id)
+            )
+            return {
+                "status": "Completed",
+                "result_path": save_dir,
+                "num_images_tested": len(image_paths),
+                "attack_name": attack_name,
+                "robustness_curve": curve,
+                "report_task_id": _schedule_report(evaluator.plots_dir, report_format)
+            }
+        
+        evaluator.evaluate_dataset(image_paths, progress_callback=_task_progress_callback(task_id))
         
         # 7. 生成报告
         metrics = evaluator.metrics.get("summary", {})
@@ -323,7 +397,8 @@ def run_attack_task(task_id=None, attack_name="pgd", model_name="yolov8s-visdron
             "result_path": save_dir,
             "num_images_tested": len(image_paths),
             "attack_name": attack_name,
-            "metrics": metrics
+            "metrics": metrics,
+            "report_task_id": _schedule_report(evaluator.plots_dir, report_format)
         }
 
     except Exception as e:
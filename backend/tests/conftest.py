@@ -0,0 +1,8 @@
+# backend/tests/conftest.py
+# 后端模块以 backend 目录为根导入（如 from utils.evaluator import ...），与运行 main.py / celery worker 时一致
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
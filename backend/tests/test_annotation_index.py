@@ -0,0 +1,60 @@
+# backend/tests/test_annotation_index.py
+import os
+
+import numpy as np
+import pytest
+
+from utils import annotation_index
+from utils.annotation_index import AnnotationIndex, parse_annotation_line
+
+
+@pytest.fixture
+def anno_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(annotation_index, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(AnnotationIndex, "_loaded", {})
+    directory = tmp_path / "annotations"
+    directory.mkdir()
+    (directory / "img_a.txt").write_text("10,20,30,40,1,4,0,0\n0,0,5,5,0,0,0,0\n")
+    (directory / "img_b.txt").write_text("")
+    (directory / "img_c.txt").write_text("1,2,3,4,1,11,0,1\nbroken line\n")
+    return directory
+
+
+def test_parse_annotation_line():
+    assert parse_annotation_line("10,20,30,40,1,4,0,0") == [10.0, 20.0, 30.0, 40.0, 3, 1.0]
+    # 忽略区域（类别 0）变为 -1，score 0 保留
+    assert parse_annotation_line("0,0,5,5,0,0,0,0")[4:] == [-1, 0.0]
+    assert parse_annotation_line("1,2,3") is None
+
+
+def test_build_and_lookup(anno_dir):
+    index = AnnotationIndex.build(str(anno_dir))
+    assert len(index) == 3
+    np.testing.assert_allclose(index.get("/images/img_a.jpg"), [[10, 20, 30, 40, 3, 1], [0, 0, 5, 5, -1, 0]])
+    assert index.get("img_b.png").shape == (0, 6)
+    # 无法解析的行被跳过
+    assert index.get("img_c.jpg").tolist() == [[1, 2, 3, 4, 10, 1]]
+    assert index.get("missing.jpg") is None
+    assert "img_a.jpg" in index and "missing.jpg" not in index
+
+
+def test_for_directory_caches_to_disk_and_memory(anno_dir):
+    index = AnnotationIndex.for_directory(str(anno_dir))
+    path = AnnotationIndex.cache_path(str(anno_dir))
+    assert path.exists()
+    assert AnnotationIndex.for_directory(str(anno_dir)) is index
+
+    AnnotationIndex._loaded.clear()
+    reloaded = AnnotationIndex.for_directory(str(anno_dir))
+    assert reloaded is not index
+    np.testing.assert_array_equal(reloaded.get("img_a.jpg"), index.get("img_a.jpg"))
+
+
+def test_new_file_changes_cache_key(anno_dir):
+    before = AnnotationIndex.cache_path(str(anno_dir))
+    (anno_dir / "img_d.txt").write_text("1,1,1,1,1,1,0,0\n")
+    # 目录 mtime 精度依赖文件系统，显式推进以保证可重复
+    stat = anno_dir.stat()
+    os.utime(anno_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert AnnotationIndex.cache_path(str(anno_dir)) != before
+    assert "img_d.jpg" in AnnotationIndex.for_directory(str(anno_dir))
@@ -0,0 +1,62 @@
+# backend/tests/test_api_validation.py
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """拦截任务投递，记录发送给 worker 的参数"""
+    calls = []
+
+    def send_task(name, kwargs=None, **options):
+        calls.append((name, kwargs))
+        return SimpleNamespace(id="celery-id")
+
+    monkeypatch.setattr(api.celery_app, "send_task", send_task)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(api.router)
+    return TestClient(app)
+
+
+def test_parse_fraction():
+    assert api._parse_fraction("8/255") == pytest.approx(8 / 255)
+    assert api._parse_fraction(" 0.03 ") == pytest.approx(0.03)
+    for bad in ("abc", "8/", "8/0", "1/2/3"):
+        with pytest.raises((ValueError, ZeroDivisionError)):
+            api._parse_fraction(bad)
+
+
+@pytest.mark.parametrize("params", [
+    {"eps": "abc"},
+    {"eps": "8/0"},
+    {"alpha": "zz"},
+    {"attack_name": "fgsm", "alpha": "zz"},
+    {"eps_sweep": "2/255,x"},
+])
+def test_run_attack_rejects_malformed_eps(client, sent, params):
+    response = client.post("/api/attack/run", params=params)
+    assert response.status_code == 400
+    assert sent == []
+
+
+def test_run_attack_rejects_unknown_attack(client, sent):
+    assert client.post("/api/attack/run", params={"attack_name": "cw"}).status_code == 400
+    assert sent == []
+
+
+def test_run_attack_enqueues_valid_request(client, sent):
+    response = client.post("/api/attack/run", params={"attack_name": "fgsm", "eps": "4/255"})
+    assert response.status_code == 200, response.text
+    (name, kwargs), = sent
+    assert name == api.ATTACK_RUN_TASK
+    assert kwargs["eps"] == "4/255"
@@ -0,0 +1,72 @@
+# backend/tests/test_dataset_manifest.py
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils import dataset_manifest
+from utils.dataset_manifest import DatasetManifest
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_manifest, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(DatasetManifest, "_loaded", {})
+    directory = tmp_path / "images"
+    directory.mkdir()
+    for i in range(6):
+        Image.fromarray(np.full((8 + i, 12, 3), i * 30, np.uint8)).save(directory / f"{i:04d}.png")
+    (directory / "notes.txt").write_text("not an image")
+    return directory
+
+
+def _touch_dir(directory):
+    # 目录 mtime 精度依赖文件系统，显式推进以保证可重复
+    stat = directory.stat()
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_build_records_image_metadata(image_dir):
+    manifest = DatasetManifest.build(str(image_dir))
+    assert len(manifest) == 6
+    first = manifest.entries[0]
+    assert first["name"] == "0000.png"
+    assert (first["width"], first["height"]) == (12, 8)
+    assert len(first["sha1"]) == 40
+    assert manifest.paths()[-1] == os.path.join(str(image_dir), "0005.png")
+
+
+def test_sample_is_seeded_and_sorted(image_dir):
+    manifest = DatasetManifest.build(str(image_dir))
+    assert manifest.sample(3) == manifest.paths()[:3]
+    seeded = manifest.sample(3, seed=7)
+    assert seeded == manifest.sample(3, seed=7)
+    assert seeded == sorted(seeded)
+    assert len(set(seeded)) == 3
+    assert manifest.sample(None) == manifest.paths()
+    assert manifest.sample(100, seed=1) == manifest.paths()
+
+
+def test_refresh_rehashes_only_changed_files(image_dir, monkeypatch):
+    DatasetManifest.for_directory(str(image_dir))
+
+    hashed = []
+    original = dataset_manifest._file_sha1
+
+    def counting_sha1(path, *args):
+        hashed.append(os.path.basename(path))
+        return original(path, *args)
+
+    monkeypatch.setattr(dataset_manifest, "_file_sha1", counting_sha1)
+
+    # 目录未变化：直接使用内存 / 磁盘中的清单
+    DatasetManifest._loaded.clear()
+    assert len(DatasetManifest.for_directory(str(image_dir))) == 6
+    assert hashed == []
+
+    Image.fromarray(np.zeros((4, 4, 3), np.uint8)).save(image_dir / "0006.png")
+    _touch_dir(image_dir)
+    manifest = DatasetManifest.for_directory(str(image_dir))
+    assert len(manifest) == 7
+    assert hashed == ["0006.png"]
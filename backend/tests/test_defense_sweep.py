@@ -0,0 +1,77 @@
+# backend/tests/test_defense_sweep.py
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+import evaluate_defense
+from evaluate_defense import _parse_value, compute_clean_predictions, parse_sweep_spec
+
+
+def test_parse_value_literals_and_fractions():
+    assert _parse_value("5") == 5
+    assert _parse_value(" 0.5 ") == 0.5
+    assert _parse_value("True") is True
+    assert _parse_value("None") is None
+    assert _parse_value("8/255") == pytest.approx(8 / 255)
+    assert _parse_value("gaussian") == "gaussian"
+    # 不执行任意表达式
+    assert _parse_value("__import__('os').getcwd()") == "__import__('os').getcwd()"
+    assert _parse_value("1/0") == "1/0"
+
+
+def test_parse_sweep_spec_grid():
+    combos = parse_sweep_spec("median_blur:ksize=3|5+jpeg_compression:quality=50|75|90")
+    assert len(combos) == 6
+    assert combos[0] == [("median_blur", {"ksize": 3}), ("jpeg_compression", {"quality": 50})]
+    assert parse_sweep_spec("bit_depth_reduction") == [[("bit_depth_reduction", {})]]
+    with pytest.raises(ValueError):
+        parse_sweep_spec(":ksize=3")
+
+
+class _FakeModel:
+    """每张图像返回一个检测框，置信度为图像的平均亮度"""
+
+    def __init__(self):
+        self.seen = 0
+
+    def predict(self, images, verbose=False):
+        self.seen += len(images)
+        return [SimpleNamespace(conf=float(img.mean()) / 255) for img in images]
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i, value in enumerate((50, 100, 150)):
+        path = tmp_path / f"img_{i}.png"
+        cv2.imwrite(str(path), np.full((8, 8, 3), value, np.uint8))
+        paths.append(str(path))
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+    paths.insert(1, str(broken))
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(evaluate_defense, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(evaluate_defense.ModelManager, "_resolve_model_path",
+                        staticmethod(lambda model_path=None, model_name=None: str(tmp_path / "weights.pt")))
+    monkeypatch.setattr(evaluate_defense, "result_to_detections", lambda r: np.array([[0, 0, 4, 4, 1, r.conf]]))
+
+
+def test_clean_predictions_skip_undecodable_images(images):
+    model = _FakeModel()
+    kept, predictions = compute_clean_predictions(model, "fake", images, 0.25, 0.5, batch_size=2, num_workers=0)
+    assert kept == [images[0], images[2], images[3]]
+    assert [round(p[0, 5] * 255) for p in predictions] == [50, 100, 150]
+
+    # 第二次直接读取缓存，结果与被跳过的图像保持对齐
+    cached_model = _FakeModel()
+    cached_kept, cached = compute_clean_predictions(cached_model, "fake", images, 0.25, 0.5, num_workers=0)
+    assert cached_model.seen == 0
+    assert cached_kept == kept
+    for a, b in zip(cached, predictions):
+        np.testing.assert_allclose(a, b, rtol=1e-6)
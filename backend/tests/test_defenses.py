@@ -0,0 +1,105 @@
+# backend/tests/test_defenses.py
+import numpy as np
+import pytest
+import torch
+
+from algorithms.defenses.bit_depth_reduction import BitDepthReductionDefense
+from algorithms.defenses.gaussian_blur import GaussianBlurDefense
+from algorithms.defenses.jpeg_compression import JPEGCompressionDefense
+from algorithms.defenses.median_blur import MedianBlurDefense
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(0)
+    return rng.random((2, 23, 31, 3), dtype=np.float32)  # NHWC, 取值 [0, 1]
+
+
+def _to_tensor(arr):
+    return torch.from_numpy(np.ascontiguousarray(arr.transpose(0, 3, 1, 2)))
+
+
+def _to_numpy(tensor):
+    return tensor.numpy().transpose(0, 2, 3, 1)
+
+
+@pytest.mark.parametrize("ksize,sigma", [(3, 0.0), (5, 0.0), (7, 1.5)])
+def test_gaussian_tensor_matches_opencv(batch, ksize, sigma):
+    defense = GaussianBlurDefense(ksize=ksize, sigma=sigma)
+    expected = defense.defend(batch)
+    np.testing.assert_allclose(_to_numpy(defense.defend(_to_tensor(batch))), expected, atol=1e-5)
+    # 单张 CHW 输入
+    single = defense.defend(_to_tensor(batch)[0])
+    np.testing.assert_allclose(single.numpy().transpose(1, 2, 0), expected[0], atol=1e-5)
+
+
+def test_gaussian_differentiable_forward_has_gradient(batch):
+    defense = GaussianBlurDefense(ksize=5)
+    images = _to_tensor(batch).requires_grad_(True)
+    defense.differentiable_forward(images).sum().backward()
+    # 模糊保持总和（忽略边界），梯度处处非零
+    assert images.grad is not None and torch.all(images.grad > 0)
+
+
+@pytest.mark.parametrize("ksize", [3, 5])
+def test_median_tensor_matches_opencv(batch, ksize):
+    defense = MedianBlurDefense(ksize=ksize)
+    expected = defense.defend(batch)
+    np.testing.assert_allclose(_to_numpy(defense.defend(_to_tensor(batch))), expected, atol=1e-6)
+
+
+def test_median_stripes_match_single_pass(batch):
+    defense = MedianBlurDefense(ksize=5)
+    tensor = _to_tensor(batch)
+    full = defense.defend(tensor)
+    # 每个条带只有 1 行，结果应与一次处理完全一致
+    defense.max_window_elements = 1
+    torch.testing.assert_close(defense.defend(tensor), full)
+
+
+def test_median_uint8_tensor(batch):
+    defense = MedianBlurDefense(ksize=3)
+    images = (batch * 255).astype(np.uint8)
+    out = defense.defend(_to_tensor(images))
+    assert out.dtype == torch.uint8
+    np.testing.assert_array_equal(_to_numpy(out), defense.defend(images))
+
+
+def test_bit_depth_tensor_matches_numpy(batch):
+    defense = BitDepthReductionDefense(bits=3)
+    tensor = _to_tensor(batch)
+    out = defense.defend(tensor)
+    np.testing.assert_allclose(_to_numpy(out), defense.defend(batch), atol=1e-6)
+    assert len(torch.unique(out)) <= 2 ** 3
+    # 不修改输入
+    np.testing.assert_array_equal(_to_numpy(tensor), batch)
+
+    images = (batch * 255).astype(np.uint8)
+    np.testing.assert_array_equal(_to_numpy(defense.defend(_to_tensor(images))), defense.defend(images))
+
+
+def test_bit_depth_bpda_passes_identity_gradient(batch):
+    defense = BitDepthReductionDefense(bits=4)
+    images = _to_tensor(batch).requires_grad_(True)
+    out = defense.differentiable_forward(images)
+    torch.testing.assert_close(out.detach(), defense.defend(images.detach()))
+    out.sum().backward()
+    torch.testing.assert_close(images.grad, torch.ones_like(images))
+
+
+def test_jpeg_tensor_matches_numpy(batch):
+    defense = JPEGCompressionDefense(quality=50)
+    expected = defense.defend(batch)
+    assert expected.shape == batch.shape
+    np.testing.assert_array_equal(_to_numpy(defense.defend(_to_tensor(batch))), expected)
+    np.testing.assert_array_equal(defense.defend(_to_tensor(batch)[1]).numpy().transpose(1, 2, 0), expected[1])
+
+
+@pytest.mark.parametrize("defense", [
+    GaussianBlurDefense(), MedianBlurDefense(), JPEGCompressionDefense(),
+])
+def test_rejects_unsupported_shapes(defense):
+    with pytest.raises(ValueError):
+        defense.defend(np.zeros((4, 4)))
+    with pytest.raises(ValueError):
+        defense.defend(torch.zeros(4, 4))
@@ -0,0 +1,86 @@
+# backend/tests/test_evaluator_matching.py
+import numpy as np
+import pytest
+
+from utils.evaluator import Evaluator, box_iou_xywh, match_detections
+
+
+def test_box_iou_known_values():
+    boxes1 = [[0, 0, 10, 10], [20, 20, 10, 10]]
+    boxes2 = [[0, 0, 10, 10], [5, 0, 10, 10], [100, 100, 5, 5]]
+    ious = box_iou_xywh(boxes1, boxes2)
+    assert ious.shape == (2, 3)
+    np.testing.assert_allclose(ious[0], [1.0, 50 / 150, 0.0])
+    np.testing.assert_allclose(ious[1], [0.0, 0.0, 0.0])
+
+
+def test_box_iou_degenerate_and_empty():
+    assert box_iou_xywh(np.zeros((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+    # 零面积框不产生 NaN
+    assert box_iou_xywh([[0, 0, 0, 0]], [[0, 0, 0, 0]])[0, 0] == 0.0
+
+
+def test_box_iou_matches_scalar_reference():
+    rng = np.random.default_rng(0)
+    boxes1 = rng.uniform(0, 50, (20, 4))
+    boxes2 = rng.uniform(0, 50, (15, 4))
+    evaluator = Evaluator.__new__(Evaluator)
+    expected = [[evaluator._calculate_iou(a, b) for b in boxes2] for a in boxes1]
+    np.testing.assert_allclose(box_iou_xywh(boxes1, boxes2), expected)
+
+
+def test_match_detections_greedy_by_confidence():
+    gt_boxes = [[0, 0, 10, 10]]
+    # 两个检测都与同一真实框重叠，置信度高的（排在前面）先匹配，另一个成为 FP
+    det_boxes = [[1, 0, 10, 10], [0, 0, 10, 10]]
+    tp = match_detections(det_boxes, [0, 0], gt_boxes, [0])
+    assert tp[:, 0].tolist() == [True, False]
+
+
+def test_match_detections_class_aware():
+    tp = match_detections([[0, 0, 10, 10]], [1], [[0, 0, 10, 10]], [0])
+    assert not tp.any()
+
+
+def test_match_detections_multiple_thresholds_in_one_pass():
+    # IoU = 81 / 119 ≈ 0.68
+    tp = match_detections([[1, 1, 10, 10]], [0], [[0, 0, 10, 10]], [0], iou_thresholds=[0.5, 0.65, 0.7, 0.9])
+    assert tp.tolist() == [[True, True, False, False]]
+
+
+def test_match_detections_thresholds_are_independent():
+    # 第一个检测只在低阈值下匹配 gt0；高阈值下 gt0 仍可被第二个检测匹配
+    gt_boxes = [[0, 0, 10, 10]]
+    det_boxes = [[3, 0, 10, 10], [0, 0, 10, 10]]
+    tp = match_detections(det_boxes, [0, 0], gt_boxes, [0], iou_thresholds=[0.5, 0.9])
+    assert tp.tolist() == [[True, False], [False, True]]
+
+
+def test_match_detections_empty_inputs():
+    assert match_detections(np.zeros((0, 4)), [], [[0, 0, 1, 1]], [0]).shape == (0, 1)
+    assert not match_detections([[0, 0, 1, 1]], [0], np.zeros((0, 4)), [], [0.5, 0.75]).any()
+
+
+def test_calculate_metrics_single_match():
+    evaluator = Evaluator.__new__(Evaluator)
+    ground_truth = [[0, 0, 10, 10, 0, 1], [20, 20, 10, 10, 1, 1]]
+    detections = [
+        [0, 0, 10, 10, 0, 0.9],    # 完全匹配
+        [21, 21, 10, 10, 1, 0.8],  # IoU ≈ 0.68
+        [300, 300, 5, 5, 0, 0.1],  # FP
+    ]
+    metrics = evaluator.calculate_metrics(detections, ground_truth, 0.5, iou_thresholds=[0.5, 0.75])
+    assert metrics["true_positives"] == 2
+    assert metrics["false_positives"] == 1
+    assert metrics["false_negatives"] == 0
+    assert metrics["precision"] == pytest.approx(2 / 3)
+    assert metrics["recall"] == pytest.approx(1.0)
+    assert metrics["ap"] == pytest.approx(1.0)
+    # 类别 0 在全部 10 个阈值下 AP=1，类别 1 只在 0.50~0.65 四个阈值下 AP=1
+    assert metrics["map"] == pytest.approx((1.0 + 0.4) / 2)
+    assert metrics["per_threshold"][0.75]["true_positives"] == 1
+
+
+def test_calculate_metrics_empty():
+    evaluator = Evaluator.__new__(Evaluator)
+    assert evaluator.calculate_metrics([], [[0, 0, 1, 1, 0, 1]])["map"] == 0
@@ -0,0 +1,28 @@
+# backend/tests/test_import_budget.py
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 在全新的解释器中导入 main，记录导入耗时和已加载的重量级依赖
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "budget": main.IMPORT_BUDGET, "loaded": [m for m in main.HEAVY_MODULES if m in sys.modules]}))
+"""
+
+
+def test_api_import_skips_heavy_modules_and_meets_budget(tmp_path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")])))
+    # main 会在当前目录创建 results/ 和 assets/，放到临时目录中
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=tmp_path, env=env,
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["elapsed"] < result["budget"]
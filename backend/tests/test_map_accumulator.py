@@ -0,0 +1,126 @@
+# backend/tests/test_map_accumulator.py
+import numpy as np
+import pytest
+
+from utils.evaluator import MAPAccumulator, compute_ap, split_ground_truth
+
+
+def _random_image(rng, num_gt=6, num_det=8, num_classes=3):
+    gt = np.zeros((num_gt, 6))
+    gt[:, :2] = rng.uniform(0, 200, (num_gt, 2))
+    gt[:, 2:4] = rng.uniform(10, 40, (num_gt, 2))
+    gt[:, 4] = rng.integers(0, num_classes, num_gt)
+    gt[:, 5] = 1
+    det = np.zeros((num_det, 6))
+    src = rng.integers(0, num_gt, num_det)
+    det[:, :4] = gt[src, :4] + rng.normal(0, 3, (num_det, 4))
+    det[:, 4] = np.where(rng.random(num_det) < 0.8, gt[src, 4], rng.integers(0, num_classes, num_det))
+    det[:, 5] = rng.random(num_det)
+    return det, gt
+
+
+def test_compute_ap_known_value():
+    # TP, FP, TP 对 2 个真实目标：召回 0.5 之前精确率 1，之后 2/3
+    recall = np.array([0.5, 0.5, 1.0])
+    precision = np.array([1.0, 0.5, 2 / 3])
+    assert compute_ap(recall, precision) == pytest.approx((51 * 1.0 + 50 * 2 / 3) / 101)
+
+
+def test_single_class_ap_known_value():
+    acc = MAPAccumulator(iou_thresholds=[0.5])
+    gt = [[0, 0, 10, 10, 0, 1], [50, 50, 10, 10, 0, 1]]
+    det = [[0, 0, 10, 10, 0, 0.9], [200, 200, 10, 10, 0, 0.8], [50, 50, 10, 10, 0, 0.7]]
+    acc.update(det, gt)
+    result = acc.finalize(class_names=["car"])
+    expected = (51 * 1.0 + 50 * 2 / 3) / 101
+    assert result["map50"] == pytest.approx(expected)
+    assert result["per_class"]["car"]["num_gt"] == 2
+
+
+def test_perfect_detections_score_one_and_misses_zero():
+    acc = MAPAccumulator()
+    gt = [[0, 0, 10, 10, 0, 1], [30, 30, 10, 10, 1, 1]]
+    acc.update([g[:5] + [0.9] for g in gt], gt)
+    assert acc.finalize()["map"] == pytest.approx(1.0)
+
+    acc = MAPAccumulator()
+    acc.update([[100, 100, 5, 5, 0, 0.9]], gt)
+    assert acc.finalize()["map"] == 0.0
+
+
+def test_classes_without_ground_truth_are_excluded():
+    acc = MAPAccumulator()
+    acc.update([[0, 0, 10, 10, 0, 0.9], [80, 80, 10, 10, 2, 0.9]], [[0, 0, 10, 10, 0, 1]])
+    result = acc.finalize()
+    assert result["map"] == pytest.approx(1.0)
+    assert set(result["per_class"]) == {"0"}
+
+
+def test_incremental_merge_and_state_dict_are_consistent():
+    rng = np.random.default_rng(1)
+    images = [_random_image(rng) for _ in range(30)]
+
+    full = MAPAccumulator(compact_every=4)
+    shards = [MAPAccumulator(), MAPAccumulator()]
+    for i, (det, gt) in enumerate(images):
+        full.update(det, gt)
+        shards[i % 2].update(det, gt)
+
+    merged = MAPAccumulator.from_state_dict(shards[0].state_dict())
+    merged.merge(MAPAccumulator.from_state_dict(shards[1].state_dict()))
+
+    expected, actual = full.finalize(), merged.finalize()
+    assert actual["num_images"] == 30
+    assert actual["map"] == pytest.approx(expected["map"])
+    assert actual["map50"] == pytest.approx(expected["map50"])
+    assert 0.0 < expected["map"] <= expected["map50"] <= 1.0
+
+
+def test_merge_rejects_different_thresholds():
+    with pytest.raises(ValueError):
+        MAPAccumulator().merge(MAPAccumulator(iou_thresholds=[0.5]))
+
+
+def test_split_ground_truth_ignore_rules():
+    gt = np.array([
+        [0, 0, 10, 10, 0, 1],    # 正常目标
+        [0, 0, 10, 10, -1, 0],   # VisDrone ignored region
+        [0, 0, 10, 10, 10, 1],   # VisDrone others
+        [0, 0, 10, 10, 3, 0],    # score == 0
+    ])
+    kept, ignored = split_ground_truth(gt)
+    assert kept[:, 4].tolist() == [0]
+    assert len(ignored) == 3
+    kept, _ = split_ground_truth(gt, ignore_classes=())
+    assert sorted(kept[:, 4].tolist()) == [0, 10]
+
+
+def test_detections_in_ignore_regions_are_neither_tp_nor_fp():
+    gt = [
+        [0, 0, 10, 10, 0, 1],
+        [100, 100, 40, 40, -1, 0],   # ignored region
+        [200, 200, 20, 20, 10, 1],   # others
+    ]
+    det = [
+        [110, 110, 10, 10, 0, 0.95],  # 完全落在忽略区域内
+        [200, 200, 20, 20, 0, 0.9],   # 与 others 重合
+        [0, 0, 10, 10, 0, 0.5],
+    ]
+    acc = MAPAccumulator()
+    acc.update(det, gt)
+    result = acc.finalize()
+    assert acc.num_gt == {0: 1}
+    assert result["map"] == pytest.approx(1.0)
+
+    # 不忽略时，前两个检测是置信度更高的 FP
+    plain = MAPAccumulator(ignore_classes=())
+    plain.update(det, [g[:5] + [1] for g in gt[:1]])
+    assert plain.finalize()["map"] < 1.0
+
+
+def test_ignore_flags_survive_state_dict():
+    acc = MAPAccumulator()
+    acc.update([[110, 110, 10, 10, 0, 0.95], [0, 0, 10, 10, 0, 0.5]],
+               [[0, 0, 10, 10, 0, 1], [100, 100, 40, 40, -1, 0]])
+    restored = MAPAccumulator.from_state_dict(acc.state_dict())
+    assert restored.finalize()["map"] == pytest.approx(1.0)
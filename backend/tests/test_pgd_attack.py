@@ -0,0 +1,96 @@
+# backend/tests/test_pgd_attack.py
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from algorithms.attacks.pgd import PGDAttack
+
+EPS = 8 / 255
+ALPHA = 2 / 255
+
+
+class _ToyDetector(torch.nn.Module):
+    """输出 (B, H*W, 6) 的预测，第 4 列为逐像素 objectness = sigmoid(10 * (mean(x) - 0.5))"""
+
+    def __init__(self):
+        super().__init__()
+        self.scale = torch.nn.Parameter(torch.tensor(10.0))
+
+    def forward(self, x):
+        obj = torch.sigmoid(self.scale * (x.mean(dim=1) - 0.5)).flatten(1)
+        preds = torch.zeros(*obj.shape, 6, dtype=x.dtype)
+        preds[..., 4] = obj
+        return (preds + 0 * x.sum(),)  # 与 YOLO 一样返回元组
+
+
+@pytest.fixture
+def model():
+    return SimpleNamespace(model=_ToyDetector())
+
+
+@pytest.fixture
+def images():
+    # 样本 0 置信度约 0.018（已低于 stop_conf），样本 1 约 0.98
+    return torch.stack([torch.full((3, 8, 8), 0.1), torch.full((3, 8, 8), 0.9)])
+
+
+def _attack(**kwargs):
+    params = dict(eps=EPS, alpha=ALPHA, steps=10, random_start=False, input_size=None)
+    params.update(kwargs)
+    attack = PGDAttack(**params)
+    attack.device = torch.device("cpu")
+    return attack
+
+
+def test_projects_into_eps_ball(model, images):
+    attack = _attack()
+    adv = attack(model, images)
+    assert attack.last_steps_run == [10, 10]
+    assert torch.all((adv - images).abs() <= EPS + 1e-6)
+    # 梯度方向降低亮度，10 步后停在 ε 边界上
+    torch.testing.assert_close(adv, images - EPS)
+
+
+def test_early_stop_skips_successful_samples(model, images):
+    attack = _attack(early_stop=True, stop_conf=0.25)
+    adv = attack(model, images)
+    assert attack.last_steps_run == [0, 10]
+    torch.testing.assert_close(adv[0], images[0])
+    # 其余样本的结果与单独攻击一致
+    torch.testing.assert_close(adv[1:], _attack()(model, images[1:]))
+
+
+def test_early_stop_on_converged_loss(model, images):
+    attack = _attack(early_stop=True, stop_conf=None, stop_tol=1e-6)
+    adv = attack(model, images[1:])
+    # 4 步到达 ε 边界，第 6 次前向发现损失不再下降
+    assert attack.last_steps_run == [5]
+    torch.testing.assert_close(adv, images[1:] - EPS)
+
+
+def test_early_stop_disabled_by_default(model, images):
+    attack = _attack(stop_conf=0.25, stop_tol=1.0)
+    attack(model, images)
+    assert attack.last_steps_run == [10, 10]
+
+
+def test_warm_start_is_projected(model, images):
+    attack = _attack(steps=0)
+    init = torch.clamp(images + 0.5, 0, 1)
+    adv = attack(model, images, init_images=init)
+    torch.testing.assert_close(adv, torch.clamp(images + EPS, 0, 1))
+
+
+def test_warm_start_continues_from_smaller_eps(model, images):
+    weak = _attack(eps=EPS / 2)(model, images)
+    cold = _attack(steps=2)(model, images)
+    warm = _attack(steps=2)(model, images, init_images=weak)
+    torch.testing.assert_close(cold, images - 2 * ALPHA)
+    torch.testing.assert_close(warm, images - EPS)
+
+
+def test_restores_original_resolution(model):
+    images = torch.rand(1, 3, 20, 30)
+    adv = _attack(steps=1, input_size=32)(model, images)
+    assert adv.shape == images.shape
@@ -0,0 +1,72 @@
+# backend/tests/test_registry.py
+import functools
+
+import pytest
+
+from algorithms.registry import ATTACKS, DEFENSES
+
+
+def test_discovers_shipped_algorithms():
+    assert ATTACKS.names() == ["fgsm", "pgd"]
+    assert DEFENSES.names() == ["bit_depth_reduction", "gaussian_blur", "jpeg_compression", "median_blur"]
+    assert "PGD" in ATTACKS
+    assert "unknown" not in DEFENSES
+
+
+def test_describe_lists_constructor_defaults():
+    info = DEFENSES.get("gaussian_blur").describe()
+    assert info["class"] == "GaussianBlurDefense"
+    assert info["parameters"] == {"ksize": "3", "sigma": "0.0"}
+    assert ATTACKS.get("pgd").parameters["stop_tol"] == "None"
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError, match="不支持的防御算法"):
+        DEFENSES.get("unknown")
+
+
+def test_validate_rejects_unknown_and_mistyped_params():
+    spec = DEFENSES.get("median_blur")
+    with pytest.raises(ValueError, match="不支持参数"):
+        spec.validate({"kernel": 5})
+    assert spec.validate({"ksize": 5, "kernel": 5}, ignore_unknown=True) == {"ksize": 5}
+    with pytest.raises(ValueError, match="参数类型错误"):
+        spec.validate({"ksize": 5.0})
+    with pytest.raises(ValueError, match="参数类型错误"):
+        spec.validate({"ksize": True})
+    with pytest.raises(ValueError, match="参数类型错误"):
+        ATTACKS.get("pgd").validate({"random_start": 1})
+
+
+def test_validate_accepts_compatible_values():
+    spec = ATTACKS.get("pgd")
+    # 整数可以传给浮点默认值，None 总是允许（例如 input_size=None）
+    params = {"eps": 8, "steps": 5, "input_size": None, "stop_tol": 0.01, "precision": "bf16"}
+    assert spec.validate(params) == params
+
+
+def test_validate_reports_missing_required(monkeypatch):
+    spec = DEFENSES.get("jpeg_compression")
+    monkeypatch.setattr(spec, "parameters", {"quality": None})
+    with pytest.raises(ValueError, match="缺少必填参数: quality"):
+        spec.validate({})
+
+
+def test_create_and_factory():
+    attack = ATTACKS.create("pgd", eps=4 / 255, steps=3)
+    assert type(attack).__name__ == "PGDAttack"
+    assert attack.steps == 3
+
+    make_defense = DEFENSES.get("median_blur").factory(ksize=5)
+    assert isinstance(make_defense, functools.partial)
+    defense = make_defense()
+    assert defense is not make_defense()
+    assert type(defense) is DEFENSES.get("median_blur").cls
+
+
+def test_validate_checks_constant_expression_defaults():
+    # eps 的默认值是 8 / 255：按浮点数检查，API 传入的原始字符串会被拒绝
+    spec = ATTACKS.get("pgd")
+    with pytest.raises(ValueError, match="参数类型错误: eps='abc', alpha='zz'"):
+        spec.validate({"eps": "abc", "alpha": "zz", "steps": 10})
+    assert spec.validate({"eps": 8 / 255, "alpha": 1})["alpha"] == 1
@@ -0,0 +1,31 @@
+# backend/tests/test_report_renderer.py
+from utils.report_renderer import bars, chart, panel, report_plots_html, save_chart_specs
+
+
+def _charts():
+    return [chart("detection_count_comparison", panel(bars(["a"], [1]))),
+            chart("robustness_curve", panel(bars(["b"], [2])))]
+
+
+def test_report_links_only_built_charts():
+    html = report_plots_html(_charts(), "png", {"detection_count_comparison": "Detection Count"})
+    assert html.count("<img") == 2
+    assert 'src="plots/detection_count_comparison.png"' in html
+    assert "<h3>Detection Count</h3>" in html
+    # 没有标题时由图表名生成
+    assert "<h3>Robustness Curve</h3>" in html
+    assert 'src="plots/robustness_curve.svg"' in report_plots_html(_charts()[1:], "svg")
+
+
+def test_report_without_images_points_to_chart_specs():
+    html = report_plots_html(_charts(), None)
+    assert "<img" not in html
+    assert 'href="plots/charts.json"' in html
+    assert report_plots_html([], "png") == ""
+
+
+def test_save_chart_specs_merges_by_name(tmp_path):
+    save_chart_specs(_charts(), tmp_path)
+    specs = save_chart_specs([chart("robustness_curve", panel(bars(["c"], [3])))], tmp_path)
+    assert [spec["name"] for spec in specs] == ["detection_count_comparison", "robustness_curve"]
+    assert specs[1]["panels"][0]["series"][0]["categories"] == ["c"]
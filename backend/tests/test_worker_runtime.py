@@ -0,0 +1,44 @@
+# backend/tests/test_worker_runtime.py
+import cv2
+import pytest
+import torch
+
+from utils import worker_runtime
+
+
+@pytest.fixture(autouse=True)
+def restore_threads(monkeypatch):
+    for name in ("SKYGUARD_WORKER_DEVICES", "SKYGUARD_PIN_CPUS", "SKYGUARD_TORCH_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+    torch_threads, cv2_threads = torch.get_num_threads(), cv2.getNumThreads()
+    yield
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(cv2_threads)
+    worker_runtime._runtime.clear()
+
+
+def _configure(monkeypatch, cpus, index, concurrency):
+    monkeypatch.setattr(worker_runtime, "_available_cpus", lambda: list(cpus))
+    return worker_runtime.configure_worker_process(index=index, concurrency=concurrency)
+
+
+def test_cpus_split_evenly(monkeypatch):
+    runtimes = [_configure(monkeypatch, range(8), i, 4) for i in range(4)]
+    assert [r["cpus"] for r in runtimes] == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    assert all(r["threads"] == 2 for r in runtimes)
+
+
+def test_fewer_cpus_than_workers_share_round_robin(monkeypatch):
+    runtimes = [_configure(monkeypatch, [0, 1], i, 4) for i in range(4)]
+    # 每个子进程只分到一个核心，不会退化为使用全部核心
+    assert [r["cpus"] for r in runtimes] == [[0], [1], [0], [1]]
+    assert all(r["threads"] == 1 for r in runtimes)
+    assert torch.get_num_threads() == 1
+
+
+def test_thread_override(monkeypatch):
+    monkeypatch.setenv("SKYGUARD_TORCH_THREADS", "3")
+    runtime = _configure(monkeypatch, range(2), 5, 4)
+    assert runtime["index"] == 1 and runtime["cpus"] == [1]
+    assert runtime["threads"] == 3
+    assert worker_runtime.worker_runtime() == runtime
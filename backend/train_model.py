@@ -123,8 +123,7 @@ def train_visdrone(
     # --------------------------------------------------------
     if adv_train:
         # Lazy imports to avoid unnecessary deps for standard training
-        import importlib, inspect
-        from algorithms.attacks.base import BaseAttack
+        from algorithms.registry import ATTACKS
         from backend.callbacks.advtrain import AdvTrainingCallback
 
         # helper to parse fraction strings like "8/255"
@@ -136,21 +135,6 @@ def train_visdrone(
                 return float(num) / float(denom)
             return float(val)
 
-        # Dynamically load attack class similar to logic in tasks.py
-        def _load_attack_by_name(name: str, **kwargs):
-            module_name = f"algorithms.attacks.{name.lower()}"
-            module = importlib.import_module(module_name)
-            for attr in dir(module):
-                obj = getattr(module, attr)
-                if isinstance(obj, type) and issubclass(obj, BaseAttack) and obj is not BaseAttack:
-                    try:
-                        return obj(**kwargs)
-                    except TypeError:
-                        sig = inspect.signature(obj.__init__)
-                        filtered_kwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
-                        return obj(**filtered_kwargs)
-            raise ValueError(f"No attack class found in module {module_name}")
-
         attack_kwargs = {
             "eps": _parse_fraction(adv_eps),
             "alpha": _parse_fraction(adv_alpha),
@@ -158,7 +142,8 @@ def train_visdrone(
             "input_size": imgsz,
         }
 
-        attack = _load_attack_by_name(adv_attack, **attack_kwargs)
+        # options the attack does not take (e.g. alpha for FGSM) are dropped
+        attack = ATTACKS.create(adv_attack, ignore_unknown=True, **attack_kwargs)
 
         callback = AdvTrainingCallback(attack=attack, ratio=adv_ratio)
         # Ultralytics ≥v8.1 changed event name; use the new one for training batches.
@@ -0,0 +1,148 @@
+# backend/utils/annotation_index.py
+"""backend/utils/annotation_index.py
+
+Compiled ground-truth index for VisDrone-style annotation directories.
+
+All ``<image>.txt`` files of one split are parsed once and stored in a single
+``.npz`` file under the cache directory::
+
+    names    (N,)     image file stems, sorted
+    offsets  (N+1,)   row offsets into ``boxes`` for every image
+    boxes    (M, 6)   [x, y, w, h, class_id, score] (float32)
+
+The cache file name is derived from the annotation directory path and its
+mtime, so adding/removing/renaming annotation files triggers a rebuild. After
+loading, looking up an image is a dict lookup plus an array slice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+_CACHE_DIR = Path(os.getenv(
+    "SKYGUARD_CACHE_DIR",
+    Path(__file__).resolve().parent.parent / "datasets" / ".cache",
+))
+
+
+def parse_annotation_line(line: str):
+    """Parse one VisDrone annotation line into [x, y, w, h, class_id, score] or ``None``.
+
+    VisDrone format:
+    <bbox_left>,<bbox_top>,<bbox_width>,<bbox_height>,<score>,<object_category>,<truncation>,<occlusion>
+    """
+    parts = line.strip().split(',')
+    if len(parts) < 6:
+        return None
+    x, y, w, h = float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3])
+    class_id = int(parts[5]) - 1  # VisDrone类别从1开始，转换为从0开始
+    score = float(parts[4]) if float(parts[4]) <= 1.0 else float(parts[4]) / 100.0  # 确保分数在0-1之间
+    return [x, y, w, h, class_id, score]
+
+
+class AnnotationIndex:
+    """Read-only, in-memory view of a compiled annotation split."""
+
+    _loaded: Dict[str, "AnnotationIndex"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, names: np.ndarray, offsets: np.ndarray, boxes: np.ndarray) -> None:
+        self.names = names
+        self.offsets = offsets
+        self.boxes = boxes
+        self._positions = {str(name): i for i, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, image_path: str) -> bool:
+        return self._key(image_path) in self._positions
+
+    @staticmethod
+    def _key(image_path: str) -> str:
+        return os.path.splitext(os.path.basename(image_path))[0]
+
+    def get(self, image_path: str) -> Optional[np.ndarray]:
+        """Return the (K, 6) annotation array of *image_path*, or ``None`` if it has no annotation file."""
+        pos = self._positions.get(self._key(image_path))
+        if pos is None:
+            return None
+        return self.boxes[self.offsets[pos]:self.offsets[pos + 1]]
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def cache_path(cls, anno_dir: str) -> Path:
+        """Cache file for *anno_dir*, keyed by its resolved path and mtime."""
+        real_dir = os.path.realpath(anno_dir)
+        mtime = os.stat(real_dir).st_mtime_ns
+        digest = hashlib.sha1(f"{real_dir}|{mtime}".encode("utf-8")).hexdigest()[:16]
+        return _CACHE_DIR / f"annotations_{digest}.npz"
+
+    @classmethod
+    def build(cls, anno_dir: str) -> "AnnotationIndex":
+        """Parse every ``*.txt`` file in *anno_dir* into a new index."""
+        names = sorted(
+            os.path.splitext(f)[0] for f in os.listdir(anno_dir) if f.lower().endswith(".txt")
+        )
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        rows = []
+        for i, name in enumerate(names):
+            with open(os.path.join(anno_dir, f"{name}.txt"), "r") as f:
+                for line in f:
+                    try:
+                        row = parse_annotation_line(line)
+                    except ValueError:
+                        row = None
+                    if row is not None:
+                        rows.append(row)
+            offsets[i + 1] = len(rows)
+        boxes = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        return cls(np.asarray(names), offsets, boxes)
+
+    def save(self, path: Path) -> None:
+        """Atomically write the index to *path*."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, names=self.names, offsets=self.offsets, boxes=self.boxes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "AnnotationIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["names"], data["offsets"], data["boxes"])
+
+    @classmethod
+    def for_directory(cls, anno_dir: str) -> "AnnotationIndex":
+        """Return the index for *anno_dir*, loading or compiling it on first use.
+
+        Indexes are memoised per process; a changed directory mtime yields a
+        new cache key and therefore a rebuild.
+        """
+        path = cls.cache_path(anno_dir)
+        key = str(path)
+        with cls._lock:
+            index = cls._loaded.get(key)
+            if index is not None:
+                return index
+            if path.exists():
+                try:
+                    index = cls.load(path)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Failed to read annotation index {path}: {e}, rebuilding")
+            if index is None:
+                print(f"Building annotation index for {anno_dir}")
+                index = cls.build(anno_dir)
+                try:
+                    index.save(path)
+                except OSError as e:
+                    # 缓存目录不可写时仍可使用内存中的索引
+                    print(f"Could not write annotation index {path}: {e}")
+            cls._loaded[key] = index
+            return index
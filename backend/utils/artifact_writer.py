@@ -0,0 +1,75 @@
+# backend/utils/artifact_writer.py
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+ARTIFACT_POLICIES = ("none", "sampled", "all")
+
+
+class ArtifactWriter:
+    """
+    结果图像（检测框绘制、扰动图、对比图）的渲染与写盘策略
+
+    - none: 不保存任何图像
+    - sampled: 只保存前 K 张图像
+    - all: 保存全部图像
+
+    渲染与编码在后台线程池中执行，不阻塞评估主循环；在途任务数量有上限，
+    避免主循环远快于写盘时占用过多内存。
+    """
+
+    def __init__(self, policy="all", samples=10, max_workers=2, max_pending=8):
+        """
+        参数:
+            policy: 保存策略 (none / sampled / all)
+            samples: sampled 策略下保存的图像数量
+            max_workers: 后台写盘线程数，<=0 时在当前线程同步执行
+            max_pending: 最多排队的渲染任务数
+        """
+        if policy not in ARTIFACT_POLICIES:
+            raise ValueError(f"未知的保存策略: {policy}，可选: {', '.join(ARTIFACT_POLICIES)}")
+        self.policy = policy
+        self.samples = samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._futures = []
+
+    def should_render(self, index):
+        """
+        判断第 index 张图像（从1开始）是否需要保存
+        """
+        if self.policy == "all":
+            return True
+        if self.policy == "sampled":
+            return index <= self.samples
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        """提交一个渲染任务"""
+        if self._executor is None:
+            fn(*args, **kwargs)
+            return
+        self._slots.acquire()
+
+        def _run():
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                print("保存结果图像时出错:")
+                traceback.print_exc()
+            finally:
+                self._slots.release()
+
+        self._futures.append(self._executor.submit(_run))
+
+    def flush(self):
+        """等待所有已提交的渲染任务完成"""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """等待任务完成并关闭线程池"""
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
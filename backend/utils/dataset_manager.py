@@ -2,17 +2,27 @@
 import os
 import glob
 import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 from torchvision.transforms.functional import to_tensor
 
 from .config_manager import ConfigManager
+from .annotation_index import AnnotationIndex, parse_annotation_line
+from .dataset_manifest import DatasetManifest
 
 class DatasetManager:
     """数据集管理器，负责加载和处理数据集"""
     
+    # (数据集名称, 子集) -> (标注索引, 上次校验时间)
+    _annotation_indexes = {}
+    # 重新检查标注目录 mtime 的间隔（秒），避免每张图像都访问网络存储
+    annotation_index_ttl = 30.0
+    
     @staticmethod
-    def get_test_images(dataset_name, num_images=None, random_select=False):
+    def get_test_images(dataset_name, num_images=None, random_select=False, seed=None):
         """
         获取测试图像路径
         
@@ -20,6 +30,7 @@ class DatasetManager:
             dataset_name: 数据集名称（支持别名）
             num_images: 要获取的图像数量，如果为None则获取所有图像
             random_select: 是否随机选择图像
+            seed: 随机种子，指定后随机选择可复现
             
         返回:
             图像路径列表
@@ -56,38 +67,24 @@ class DatasetManager:
             if test_dir is None:
                 return []
             
-        # 获取所有图像文件
+        # 通过持久化的文件清单获取图像（目录未变化时不再逐个 stat）
         if os.path.exists(test_dir):
             print(f"测试集目录存在: {test_dir}")
-            image_files = [f for f in os.listdir(test_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+            manifest = DatasetManifest.for_directory(test_dir)
             
-            print(f"找到 {len(image_files)} 个图像文件")
-            if not image_files:
+            print(f"找到 {len(manifest)} 个图像文件")
+            if len(manifest) == 0:
                 print(f"警告: 数据集目录 {test_dir} 中没有找到图像文件")
                 return []
-                
-            # 如果需要随机选择
-            if random_select and num_images is not None and num_images < len(image_files):
-                image_files = random.sample(image_files, num_images)
-                print(f"随机选择了 {len(image_files)} 个图像文件")
-            # 否则取前N个
-            elif num_images is not None and num_images > 0:
-                image_files = image_files[:num_images]
-                print(f"选择了前 {len(image_files)} 个图像文件")
-                
-            # 生成完整路径
-            image_paths = [os.path.join(test_dir, f) for f in image_files]
-            
-            # 验证路径是否存在
-            valid_paths = []
-            for path in image_paths:
-                if os.path.exists(path):
-                    valid_paths.append(path)
-                else:
-                    print(f"警告: 图像文件不存在: {path}")
             
-            print(f"返回 {len(valid_paths)} 个有效的图像路径")
-            return valid_paths
+            image_paths = manifest.sample(num_images, seed=seed, random_select=random_select)
+            if seed is not None:
+                print(f"使用随机种子 {seed} 选择了 {len(image_paths)} 个图像文件")
+            elif len(image_paths) < len(manifest):
+                print(f"选择了 {len(image_paths)} 个图像文件")
+            
+            print(f"返回 {len(image_paths)} 个有效的图像路径")
+            return image_paths
         else:
             print(f"错误: 找不到数据集目录 {test_dir}")
             return []
@@ -116,6 +113,55 @@ class DatasetManager:
         
         return image, image_rgb, (width, height)
     
+    @staticmethod
+    def _decode_image(image_path):
+        """读取单张图像，返回 (路径, BGR图像, RGB图像)，读取失败时图像为None"""
+        image = cv2.imread(image_path)
+        if image is None:
+            return image_path, None, None
+        return image_path, image, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
+    @staticmethod
+    def iter_images(image_paths, num_workers=4, prefetch=8):
+        """
+        流式加载图像，在后台线程池中提前解码，使模型推理与磁盘读取/解码重叠
+        
+        参数:
+            image_paths: 图像路径列表
+            num_workers: 解码线程数，<=0 时在当前线程顺序读取
+            prefetch: 最多提前解码的图像数量（有界队列长度）
+            
+        返回:
+            生成器，按输入顺序产出 (图像路径, BGR图像, RGB图像)，加载失败时图像为None
+        """
+        if num_workers is None or num_workers <= 0:
+            for image_path in image_paths:
+                yield DatasetManager._decode_image(image_path)
+            return
+        
+        # cv2 的解码会释放 GIL，线程池即可并行，且避免进程间拷贝大图
+        prefetch = max(int(prefetch), int(num_workers))
+        paths_iter = iter(image_paths)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=num_workers)
+        try:
+            for image_path in paths_iter:
+                pending.append(executor.submit(DatasetManager._decode_image, image_path))
+                if len(pending) >= prefetch:
+                    break
+            
+            while pending:
+                item = pending.popleft().result()
+                next_path = next(paths_iter, None)
+                if next_path is not None:
+                    pending.append(executor.submit(DatasetManager._decode_image, next_path))
+                yield item
+        finally:
+            # 提前结束迭代时丢弃尚未开始的解码任务
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+    
     @staticmethod
     def get_annotation_path(image_path, dataset_name="VisDrone"):
         """
@@ -177,19 +223,63 @@ class DatasetManager:
         try:
             with open(annotation_path, 'r') as f:
                 for line in f:
-                    parts = line.strip().split(',')
-                    if len(parts) >= 6:
-                        # VisDrone格式: <bbox_left>,<bbox_top>,<bbox_width>,<bbox_height>,<score>,<object_category>,<truncation>,<occlusion>
-                        x, y, w, h = float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3])
-                        class_id = int(parts[5]) - 1  # VisDrone类别从1开始，转换为从0开始
-                        score = float(parts[4]) if float(parts[4]) <= 1.0 else float(parts[4]) / 100.0  # 确保分数在0-1之间
-                        
-                        annotations.append([x, y, w, h, class_id, score])
+                    annotation = parse_annotation_line(line)
+                    if annotation is not None:
+                        annotations.append(annotation)
         except Exception as e:
             print(f"加载标注文件时出错: {e}")
         
         return annotations
     
+    @staticmethod
+    def get_annotation_index(dataset_name="VisDrone", subset="test"):
+        """
+        获取数据集子集的已编译标注索引（首次使用时解析全部标注文件并缓存为 .npz）
+        
+        参数:
+            dataset_name: 数据集名称
+            subset: 子集名称 (train/val/test)
+            
+        返回:
+            AnnotationIndex，如果找不到标注目录则返回None
+        """
+        key = (dataset_name, subset)
+        cached = DatasetManager._annotation_indexes.get(key)
+        now = time.time()
+        if cached is not None and now - cached[1] < DatasetManager.annotation_index_ttl:
+            return cached[0]
+        
+        anno_dir = ConfigManager.get_dataset_annotation_path(dataset_name, subset)
+        if not anno_dir or not os.path.isdir(anno_dir):
+            return None
+        
+        index = AnnotationIndex.for_directory(anno_dir)
+        DatasetManager._annotation_indexes[key] = (index, now)
+        return index
+    
+    @staticmethod
+    def get_annotations(image_path, dataset_name="VisDrone", subset="test"):
+        """
+        通过已编译的标注索引获取图像的标注数据
+        
+        参数:
+            image_path: 图像路径
+            dataset_name: 数据集名称
+            subset: 子集名称
+            
+        返回:
+            (K, 6) 标注数组 [x, y, width, height, class_id, score]，没有标注时返回None
+        """
+        index = DatasetManager.get_annotation_index(dataset_name, subset)
+        if index is not None:
+            return index.get(image_path)
+        
+        # 找不到标注目录时回退到逐文件解析
+        annotation_path = DatasetManager.get_annotation_path(image_path, dataset_name)
+        if annotation_path is None:
+            return None
+        return np.asarray(DatasetManager.load_annotations(annotation_path), dtype=np.float32).reshape(-1, 6)
+    
     @staticmethod
     def get_class_names(dataset_name="VisDrone"):
         """
@@ -0,0 +1,166 @@
+# backend/utils/dataset_manifest.py
+"""backend/utils/dataset_manifest.py
+
+Persisted file manifest for one image directory of a dataset split.
+
+Every entry records ``name``, ``size``, ``mtime_ns``, ``width``, ``height`` and
+a ``sha1`` content hash. The manifest is stored as JSON in the shared cache
+directory and keyed by the resolved directory path; it is only refreshed when
+the directory mtime differs from the recorded one. On refresh, entries whose
+size and mtime are unchanged are reused, so only new or modified files are
+re-hashed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from .annotation_index import _CACHE_DIR
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def _file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _describe_file(directory: str, name: str, st: os.stat_result) -> Dict:
+    path = os.path.join(directory, name)
+    try:
+        # 只读取文件头获取尺寸，不解码像素
+        with Image.open(path) as img:
+            width, height = img.size
+    except OSError:
+        width, height = None, None
+    return {
+        "name": name,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "width": width,
+        "height": height,
+        "sha1": _file_sha1(path),
+    }
+
+
+class DatasetManifest:
+    """Manifest of the image files in one directory."""
+
+    _loaded: Dict[str, "DatasetManifest"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory: str, dir_mtime_ns: int, entries: List[Dict]) -> None:
+        self.directory = directory
+        self.dir_mtime_ns = dir_mtime_ns
+        self.entries = sorted(entries, key=lambda e: e["name"])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def paths(self) -> List[str]:
+        """All image paths, sorted by file name."""
+        return [os.path.join(self.directory, e["name"]) for e in self.entries]
+
+    def sample(self, num_images: Optional[int] = None, seed: Optional[int] = None,
+               random_select: bool = False) -> List[str]:
+        """Select image paths.
+
+        Args:
+            num_images: Number of images, ``None`` for all.
+            seed: Seed for reproducible random selection (implies random selection).
+            random_select: Randomly select images; without *seed* the selection is not reproducible.
+
+        Returns:
+            List of image paths.
+        """
+        entries = self.entries
+        if num_images is not None and 0 < num_images < len(entries):
+            if seed is not None or random_select:
+                entries = sorted(random.Random(seed).sample(entries, num_images), key=lambda e: e["name"])
+            else:
+                entries = entries[:num_images]
+        return [os.path.join(self.directory, e["name"]) for e in entries]
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def cache_path(directory: str) -> Path:
+        digest = hashlib.sha1(directory.encode("utf-8")).hexdigest()[:16]
+        return _CACHE_DIR / f"manifest_{digest}.json"
+
+    @classmethod
+    def build(cls, directory: str, previous: Optional["DatasetManifest"] = None,
+              num_workers: int = 8) -> "DatasetManifest":
+        """Scan *directory*, reusing unchanged entries from *previous*."""
+        dir_mtime_ns = os.stat(directory).st_mtime_ns
+        known = {e["name"]: e for e in previous.entries} if previous is not None else {}
+
+        entries, todo = [], []
+        with os.scandir(directory) as it:
+            for item in it:
+                if not item.name.lower().endswith(IMAGE_EXTENSIONS) or not item.is_file():
+                    continue
+                st = item.stat()
+                old = known.get(item.name)
+                if old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    entries.append(old)
+                else:
+                    todo.append((item.name, st))
+
+        if todo:
+            print(f"Indexing {len(todo)} new or modified images in {directory}")
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                entries.extend(executor.map(lambda t: _describe_file(directory, *t), todo))
+        return cls(directory, dir_mtime_ns, entries)
+
+    def save(self) -> None:
+        path = self.cache_path(self.directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"directory": self.directory, "dir_mtime_ns": self.dir_mtime_ns,
+                       "entries": self.entries}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["DatasetManifest"]:
+        path = cls.cache_path(directory)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["directory"], data["dir_mtime_ns"], data["entries"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to read manifest {path}: {e}")
+            return None
+
+    @classmethod
+    def for_directory(cls, directory: str) -> "DatasetManifest":
+        """Return an up-to-date manifest for *directory*, rebuilding only if the directory changed."""
+        directory = os.path.realpath(directory)
+        dir_mtime_ns = os.stat(directory).st_mtime_ns
+        with cls._lock:
+            manifest = cls._loaded.get(directory)
+            if manifest is None:
+                manifest = cls.load(directory)
+            if manifest is None or manifest.dir_mtime_ns != dir_mtime_ns:
+                manifest = cls.build(directory, previous=manifest)
+                try:
+                    manifest.save()
+                except OSError as e:
+                    # 缓存目录不可写时仍可使用内存中的清单
+                    print(f"Could not write manifest for {directory}: {e}")
+            cls._loaded[directory] = manifest
+            return manifest
@@ -7,6 +7,386 @@ import torch
 import cv2
 from sklearn.metrics import precision_recall_curve, average_precision_score
 from utils.dataset_manager import DatasetManager
+from algorithms.defenses.differentiable import DefendedModel
+
+# VisDrone "others" 类别（原始编号 11，减 1 后为 10），评估时与忽略区域一样处理
+VISDRONE_OTHERS_CLASS = 10
+
+def box_iou_xywh(boxes1, boxes2):
+    """
+    向量化计算两组 [x, y, w, h]（左上角+宽高）边界框的IoU矩阵
+    
+    参数:
+        boxes1: (N, 4) 数组
+        boxes2: (M, 4) 数组
+        
+    返回:
+        (N, M) IoU矩阵
+    """
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 0] + boxes1[:, None, 2], boxes2[None, :, 0] + boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 1] + boxes1[:, None, 3], boxes2[None, :, 1] + boxes2[None, :, 3])
+    
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = boxes1[:, 2] * boxes1[:, 3]
+    area2 = boxes2[:, 2] * boxes2[:, 3]
+    union = area1[:, None] + area2[None, :] - intersection
+    
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def match_detections(det_boxes, det_classes, gt_boxes, gt_classes, iou_thresholds=(0.5,)):
+    """
+    在多个IoU阈值下同时进行贪心匹配（检测结果需已按置信度降序排列）
+    
+    每个检测结果依次与同类别、尚未匹配且IoU最大的真实标注匹配，
+    各阈值的匹配状态相互独立，在一次遍历中完成。
+    
+    参数:
+        det_boxes: (D, 4) 检测框 [x, y, w, h]
+        det_classes: (D,) 检测类别
+        gt_boxes: (G, 4) 真实框 [x, y, w, h]
+        gt_classes: (G,) 真实类别
+        iou_thresholds: IoU阈值序列 (T,)
+        
+    返回:
+        (D, T) 布尔数组，表示检测结果在各阈值下是否为TP
+    """
+    thresholds = np.asarray(iou_thresholds, dtype=np.float64).reshape(-1)
+    num_det, num_gt = len(det_boxes), len(gt_boxes)
+    tp = np.zeros((num_det, len(thresholds)), dtype=bool)
+    if num_det == 0 or num_gt == 0:
+        return tp
+    
+    # 不同类别的IoU置零，避免在循环中判断类别
+    ious = box_iou_xywh(det_boxes, gt_boxes)
+    ious[np.asarray(det_classes)[:, None] != np.asarray(gt_classes)[None, :]] = 0.0
+    
+    matched = np.zeros((len(thresholds), num_gt), dtype=bool)
+    t_range = np.arange(len(thresholds))
+    for i in range(num_det):
+        row = ious[i]
+        if not row.any():
+            continue
+        # (T, G): 已匹配的真实标注不再参与
+        candidates = np.where(matched, 0.0, row[None, :])
+        best = candidates.argmax(axis=1)
+        best_iou = candidates[t_range, best]
+        hit = (best_iou >= thresholds) & (best_iou > 0)
+        tp[i] = hit
+        matched[t_range[hit], best[hit]] = True
+    
+    return tp
+
+
+def box_ioa_xywh(boxes, regions):
+    """
+    计算检测框落在区域内的比例（交集 / 检测框面积），用于忽略区域（crowd）的匹配
+    
+    参数:
+        boxes: (N, 4) 检测框 [x, y, w, h]
+        regions: (M, 4) 区域 [x, y, w, h]
+        
+    返回:
+        (N, M) 矩阵
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    regions = np.asarray(regions, dtype=np.float64).reshape(-1, 4)
+    
+    x1 = np.maximum(boxes[:, None, 0], regions[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], regions[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 0] + boxes[:, None, 2], regions[None, :, 0] + regions[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 1] + boxes[:, None, 3], regions[None, :, 1] + regions[None, :, 3])
+    
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (boxes[:, 2] * boxes[:, 3])[:, None]
+    return np.divide(intersection, area, out=np.zeros_like(intersection), where=area > 0)
+
+
+def split_ground_truth(ground_truth, ignore_classes=(VISDRONE_OTHERS_CLASS,)):
+    """
+    将真实标注拆分为参与评估的目标与忽略区域（VisDrone / COCO crowd 规则）
+    
+    以下标注视为忽略区域：class_id < 0（VisDrone ignored regions）、
+    ignore_classes 中的类别（VisDrone "others"）、以及 score 列为 0 的标注
+    
+    参数:
+        ground_truth: 真实标注 [[x, y, w, h, class_id, score], ...]
+        ignore_classes: 视为忽略区域的类别
+        
+    返回:
+        (参与评估的标注 (G, 6), 忽略区域 (K, 6))
+    """
+    ground_truth = np.asarray(ground_truth, dtype=np.float64).reshape(-1, 6)
+    ignored = (ground_truth[:, 4] < 0) | (ground_truth[:, 5] == 0)
+    if len(ignore_classes):
+        ignored |= np.isin(ground_truth[:, 4], list(ignore_classes))
+    return ground_truth[~ignored], ground_truth[ignored]
+
+
+def ignored_detections(det_boxes, tp, ignore_boxes, iou_thresholds):
+    """
+    标记落在忽略区域内、且未与真实目标匹配的检测结果（既不算TP也不算FP）
+    
+    与 COCO crowd 一致：检测框与任一忽略区域的 交集/检测框面积 不小于IoU阈值时忽略，
+    忽略区域与类别无关，且可以匹配任意多个检测结果
+    
+    参数:
+        det_boxes: (D, 4) 检测框 [x, y, w, h]
+        tp: (D, T) match_detections() 的结果
+        ignore_boxes: (K, 4) 忽略区域 [x, y, w, h]
+        iou_thresholds: IoU阈值序列 (T,)
+        
+    返回:
+        (D, T) 布尔数组
+    """
+    if len(det_boxes) == 0 or len(ignore_boxes) == 0:
+        return np.zeros_like(tp)
+    best_ioa = box_ioa_xywh(det_boxes, ignore_boxes).max(axis=1)
+    thresholds = np.asarray(iou_thresholds, dtype=np.float64).reshape(-1)
+    return (best_ioa[:, None] >= thresholds[None, :]) & ~tp
+
+
+def result_to_detections(result):
+    """
+    将 ultralytics 单张图像结果转换为 [[x, y, w, h, class_id, conf], ...] 数组（左上角+宽高）
+    """
+    boxes = result.boxes
+    if len(boxes) == 0:
+        return np.zeros((0, 6))
+    xyxy = boxes.xyxy.cpu().numpy().astype(np.float64)
+    detections = np.zeros((len(xyxy), 6))
+    detections[:, :2] = xyxy[:, :2]
+    detections[:, 2:4] = xyxy[:, 2:4] - xyxy[:, :2]
+    detections[:, 4] = boxes.cls.cpu().numpy()
+    detections[:, 5] = boxes.conf.cpu().numpy()
+    return detections
+
+
+def compute_ap(recall, precision):
+    """
+    COCO风格的101点插值AP
+    
+    参数:
+        recall: 按置信度降序累计得到的召回率数组
+        precision: 对应的精确率数组
+        
+    返回:
+        AP值
+    """
+    if len(recall) == 0:
+        return 0.0
+    # 精确率包络：从后往前取最大值
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    recall_points = np.linspace(0.0, 1.0, 101)
+    idx = np.searchsorted(recall, recall_points, side="left")
+    sampled = np.zeros_like(recall_points)
+    valid = idx < len(precision)
+    sampled[valid] = precision[idx[valid]]
+    return float(sampled.mean())
+
+
+class MAPAccumulator:
+    """
+    可增量累积的 COCO 风格 mAP@[.5:.95] 计算器
+    
+    每张图像调用一次 update()，内部只保留每个类别的置信度与各IoU阈值TP标记
+    （紧凑的有序数组），最后调用 finalize() 计算各类别AP。
+    多个 worker 分片评估时，可通过 state_dict() / from_state_dict() 序列化，
+    再用 merge() 合并部分结果。
+    
+    忽略区域（见 split_ground_truth）不计入真实目标数量，落在其中的检测结果
+    既不算TP也不算FP。
+    """
+    
+    def __init__(self, iou_thresholds=None, compact_every=64, ignore_classes=(VISDRONE_OTHERS_CLASS,)):
+        """
+        参数:
+            iou_thresholds: IoU阈值序列，默认 0.50:0.05:0.95
+            compact_every: 每个类别累积多少个分块后合并排序一次
+            ignore_classes: 视为忽略区域的真实标注类别（默认 VisDrone "others"）
+        """
+        if iou_thresholds is None:
+            iou_thresholds = np.linspace(0.5, 0.95, 10)
+        self.iou_thresholds = np.round(np.asarray(iou_thresholds, dtype=np.float64), 4)
+        self.compact_every = compact_every
+        self.ignore_classes = tuple(ignore_classes)
+        self.num_images = 0
+        # 类别 -> 真实目标数量
+        self.num_gt = {}
+        # 类别 -> [(scores(float32, 降序), tp(D x T bool), ignored(D x T bool)), ...]
+        self._chunks = {}
+    
+    def update(self, detections, ground_truth):
+        """
+        累积一张图像的检测结果与真实标注
+        
+        参数:
+            detections: 检测结果 [[x, y, w, h, class_id, conf], ...]
+            ground_truth: 真实标注 [[x, y, w, h, class_id, score], ...]，忽略区域见 split_ground_truth()
+            
+        返回:
+            (tp, ignored): 按置信度降序排列的检测结果在各IoU阈值下的 TP / 忽略标记 (D x T)，
+            便于调用方复用同一次匹配
+        """
+        self.num_images += 1
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        ground_truth, ignore_regions = split_ground_truth(ground_truth, self.ignore_classes)
+        
+        for cls in np.unique(ground_truth[:, 4]).astype(int):
+            self.num_gt[cls] = self.num_gt.get(cls, 0) + int((ground_truth[:, 4] == cls).sum())
+        
+        if len(detections) == 0:
+            empty = np.zeros((0, len(self.iou_thresholds)), dtype=bool)
+            return empty, empty
+        
+        order = np.argsort(-detections[:, 5], kind="stable")
+        detections = detections[order]
+        tp = match_detections(detections[:, :4], detections[:, 4],
+                              ground_truth[:, :4], ground_truth[:, 4], self.iou_thresholds)
+        ignored = ignored_detections(detections[:, :4], tp, ignore_regions[:, :4], self.iou_thresholds)
+        
+        for cls in np.unique(detections[:, 4]).astype(int):
+            mask = detections[:, 4] == cls
+            self._add_chunk(cls, detections[mask, 5].astype(np.float32), tp[mask], ignored[mask])
+        return tp, ignored
+    
+    def _add_chunk(self, cls, scores, tp, ignored):
+        chunks = self._chunks.setdefault(cls, [])
+        chunks.append((scores, tp, ignored))
+        if len(chunks) >= self.compact_every:
+            self._chunks[cls] = [self._merge_chunks(chunks)]
+    
+    @staticmethod
+    def _merge_chunks(chunks):
+        """合并分块并按置信度降序排列"""
+        scores = np.concatenate([c[0] for c in chunks])
+        tp = np.concatenate([c[1] for c in chunks])
+        ignored = np.concatenate([c[2] for c in chunks])
+        order = np.argsort(-scores, kind="stable")
+        return scores[order], tp[order], ignored[order]
+    
+    def merge(self, other):
+        """
+        合并另一个累积器（例如来自其它分片的部分结果）
+        
+        参数:
+            other: MAPAccumulator，IoU阈值需一致
+        """
+        if not np.array_equal(self.iou_thresholds, other.iou_thresholds):
+            raise ValueError("无法合并IoU阈值不同的累积器")
+        self.num_images += other.num_images
+        for cls, count in other.num_gt.items():
+            self.num_gt[cls] = self.num_gt.get(cls, 0) + count
+        for cls, chunks in other._chunks.items():
+            for scores, tp, ignored in chunks:
+                self._add_chunk(cls, scores, tp, ignored)
+        return self
+    
+    def state_dict(self):
+        """导出可JSON序列化的状态，便于跨进程传递"""
+        state = {
+            "iou_thresholds": self.iou_thresholds.tolist(),
+            "ignore_classes": list(self.ignore_classes),
+            "num_images": self.num_images,
+            "num_gt": {str(cls): count for cls, count in self.num_gt.items()},
+            "classes": {}
+        }
+        for cls, chunks in self._chunks.items():
+            scores, tp, ignored = self._merge_chunks(chunks)
+            state["classes"][str(cls)] = {
+                "scores": scores.tolist(),
+                "tp": np.packbits(tp, axis=0).tolist(),
+                "ignored": np.packbits(ignored, axis=0).tolist(),
+                "count": len(scores)
+            }
+        return state
+    
+    @classmethod
+    def from_state_dict(cls, state):
+        """从 state_dict() 的结果恢复累积器"""
+        acc = cls(iou_thresholds=state["iou_thresholds"], ignore_classes=state.get("ignore_classes", ()))
+        acc.num_images = state["num_images"]
+        acc.num_gt = {int(k): v for k, v in state["num_gt"].items()}
+        num_thresholds = len(acc.iou_thresholds)
+        for key, data in state["classes"].items():
+            packed = np.asarray(data["tp"], dtype=np.uint8).reshape(-1, num_thresholds)
+            tp = np.unpackbits(packed, axis=0, count=data["count"]).astype(bool)
+            if "ignored" in data:
+                packed = np.asarray(data["ignored"], dtype=np.uint8).reshape(-1, num_thresholds)
+                ignored = np.unpackbits(packed, axis=0, count=data["count"]).astype(bool)
+            else:
+                ignored = np.zeros_like(tp)
+            acc._chunks[int(key)] = [(np.asarray(data["scores"], dtype=np.float32), tp, ignored)]
+        return acc
+    
+    def finalize(self, class_names=None):
+        """
+        计算最终指标
+        
+        参数:
+            class_names: 类别名称（列表或 {id: name} 字典，可选）
+            
+        返回:
+            指标字典: map (0.5:0.95), map50, map75, 各IoU阈值的mAP, 以及每个类别的AP
+        """
+        classes = sorted(set(self.num_gt) | set(self._chunks))
+        ap_table = {}
+        for cls in classes:
+            num_gt = self.num_gt.get(cls, 0)
+            if num_gt == 0:
+                # 没有真实目标的类别不参与 mAP（与 COCO 一致）
+                continue
+            if cls in self._chunks:
+                scores, tp, ignored = self._merge_chunks(self._chunks[cls])
+                self._chunks[cls] = [(scores, tp, ignored)]
+            else:
+                tp = ignored = np.zeros((0, len(self.iou_thresholds)), dtype=bool)
+            tp_cum = np.cumsum(tp, axis=0)
+            fp_cum = np.cumsum(~tp & ~ignored, axis=0)
+            aps = []
+            for t in range(len(self.iou_thresholds)):
+                recall = tp_cum[:, t] / num_gt
+                precision = tp_cum[:, t] / np.maximum(tp_cum[:, t] + fp_cum[:, t], 1)
+                aps.append(compute_ap(recall, precision))
+            ap_table[cls] = np.asarray(aps)
+        
+        def _name(cls):
+            if class_names is None:
+                return str(cls)
+            try:
+                return class_names[cls]
+            except (KeyError, IndexError, TypeError):
+                return str(cls)
+        
+        def _at(aps, threshold):
+            idx = np.where(np.isclose(self.iou_thresholds, threshold))[0]
+            return float(aps[idx[0]]) if len(idx) else None
+        
+        per_class = {}
+        for cls, aps in ap_table.items():
+            per_class[_name(cls)] = {
+                "ap": float(aps.mean()),
+                "ap50": _at(aps, 0.5),
+                "ap75": _at(aps, 0.75),
+                "num_gt": self.num_gt.get(cls, 0)
+            }
+        
+        all_aps = np.stack(list(ap_table.values())) if ap_table else np.zeros((0, len(self.iou_thresholds)))
+        mean_per_threshold = all_aps.mean(axis=0) if len(all_aps) else np.zeros(len(self.iou_thresholds))
+        return {
+            "map": float(mean_per_threshold.mean()) if len(all_aps) else 0.0,
+            "map50": _at(mean_per_threshold, 0.5) or 0.0,
+            "map75": _at(mean_per_threshold, 0.75) or 0.0,
+            "map_per_threshold": {float(t): float(v) for t, v in zip(self.iou_thresholds, mean_per_threshold)},
+            "num_images": self.num_images,
+            "per_class": per_class
+        }
+
 
 class Evaluator:
     """模型评估器，用于评估模型性能"""
@@ -51,6 +431,24 @@ class Evaluator:
         
         return results, inference_time
     
+    @staticmethod
+    def _attack_image(attack_algo, model, image_rgb):
+        """
+        对单张RGB图像执行攻击
+        
+        参数:
+            attack_algo: 攻击算法 (BaseAttack)
+            model: 目标模型（可以是 DefendedModel）
+            image_rgb: (H, W, 3) uint8 RGB图像
+            
+        返回:
+            (H, W, 3) uint8 对抗样本
+        """
+        image_tensor = torch.from_numpy(np.ascontiguousarray(image_rgb).transpose(2, 0, 1)).float().div(255.0).unsqueeze(0)
+        adv_tensor = attack_algo(model, image_tensor)
+        adv_image_rgb = (adv_tensor[0].clamp(0, 1).permute(1, 2, 0).detach().cpu().numpy() * 255.0).astype(np.uint8)
+        return np.ascontiguousarray(adv_image_rgb)
+    
     def evaluate_attack(self, image_path, attack_algo, image_rgb=None):
         """
         评估攻击算法对模型的影响
@@ -71,14 +469,14 @@ class Evaluator:
         clean_results = self.model.predict(image_rgb, conf=self.conf_threshold, iou=self.iou_threshold)
         
         # 生成对抗样本
-        adv_image_rgb = attack_algo.generate(self.model, image_rgb)
+        adv_image_rgb = self._attack_image(attack_algo, self.model, image_rgb)
         
         # 对对抗样本进行检测
         adv_results = self.model.predict(adv_image_rgb, conf=self.conf_threshold, iou=self.iou_threshold)
         
         return clean_results, adv_results, adv_image_rgb
     
-    def evaluate_defense(self, image_path, attack_algo, defense_algo, image_rgb=None):
+    def evaluate_defense(self, image_path, attack_algo, defense_algo, image_rgb=None, adaptive=False, bpda=None):
         """
         评估防御算法对抗攻击的效果
         
@@ -87,6 +485,8 @@ class Evaluator:
             attack_algo: 攻击算法
             defense_algo: 防御算法
             image_rgb: 预加载的RGB图像（可选）
+            adaptive: 是否进行自适应攻击（攻击端到端穿过防御），否则为迁移攻击
+            bpda: 自适应攻击的梯度模式，None时不可导的防御自动使用 BPDA
             
         返回:
             原始检测结果，攻击后检测结果，防御后检测结果
@@ -98,8 +498,9 @@ class Evaluator:
         # 对原始图像进行检测
         clean_results = self.model.predict(image_rgb, conf=self.conf_threshold, iou=self.iou_threshold)
         
-        # 生成对抗样本
-        adv_image_rgb = attack_algo.generate(self.model, image_rgb)
+        # 生成对抗样本（自适应攻击时针对 model(defense(x)) 求梯度）
+        attack_model = DefendedModel(self.model, defense_algo, bpda=bpda) if adaptive else self.model
+        adv_image_rgb = self._attack_image(attack_algo, attack_model, image_rgb)
         
         # 对对抗样本进行检测
         adv_results = self.model.predict(adv_image_rgb, conf=self.conf_threshold, iou=self.iou_threshold)
@@ -112,20 +513,21 @@ class Evaluator:
         
         return clean_results, adv_results, defense_results
     
-    def calculate_metrics(self, detections, ground_truth, iou_threshold=0.5):
+    def calculate_metrics(self, detections, ground_truth, iou_threshold=0.5, iou_thresholds=None):
         """
         计算评估指标（精确率、召回率等）
         
         参数:
             detections: 检测结果 [[x, y, w, h, class_id, conf], ...]
-            ground_truth: 真实标注 [[x, y, w, h, class_id, _], ...]
+            ground_truth: 真实标注 [[x, y, w, h, class_id, score], ...]，忽略区域见 split_ground_truth()
             iou_threshold: IoU阈值
+            iou_thresholds: 额外的IoU阈值列表（可选），一次匹配同时得到各阈值下的指标
             
         返回:
             指标字典
         """
         # 如果没有检测结果或标注，返回空指标
-        if not detections or not ground_truth:
+        if len(detections) == 0 or len(ground_truth) == 0:
             return {
                 "precision": 0,
                 "recall": 0,
@@ -134,65 +536,50 @@ class Evaluator:
                 "map": 0
             }
         
-        # 计算每个检测结果与真实标注的IoU
-        ious = self._calculate_iou_matrix(detections, ground_truth)
-        
-        # 初始化指标
-        true_positives = 0
-        false_positives = 0
-        false_negatives = len(ground_truth)
-        
-        # 记录已匹配的真实标注
-        matched_gt = set()
-        
-        # 按置信度排序检测结果
-        sorted_detections = sorted(detections, key=lambda x: x[5], reverse=True)
-        
-        # 计算TP和FP
-        for i, det in enumerate(sorted_detections):
-            det_class = det[4]
+        # COCO 的 10 个阈值与请求的阈值合并后只匹配一次，AP / mAP 与各阈值指标都取自同一结果
+        coco_thresholds = np.round(np.linspace(0.5, 0.95, 10), 4)
+        extra = [iou_threshold] + list(iou_thresholds or [])
+        thresholds = np.unique(np.round(np.concatenate([coco_thresholds, extra]), 4))
+        
+        accumulator = MAPAccumulator(iou_thresholds=thresholds)
+        tp, ignored = accumulator.update(detections, ground_truth)
+        num_gt = sum(accumulator.num_gt.values())
+        results = accumulator.finalize()
+        
+        def _column(threshold):
+            return int(np.argmin(np.abs(thresholds - threshold)))
+        
+        per_threshold = {}
+        for threshold in extra:
+            t_idx = _column(threshold)
+            true_positives = int(tp[:, t_idx].sum())
+            false_positives = int((~tp[:, t_idx] & ~ignored[:, t_idx]).sum())
+            false_negatives = num_gt - true_positives
             
-            # 找到最大IoU的真实标注
-            max_iou = 0
-            max_idx = -1
+            # 计算精确率和召回率
+            precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
+            recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
             
-            for j, gt in enumerate(ground_truth):
-                gt_class = gt[4]
-                
-                # 只匹配相同类别
-                if det_class == gt_class and j not in matched_gt:
-                    if ious[i][j] > max_iou:
-                        max_iou = ious[i][j]
-                        max_idx = j
+            # 计算F1分数
+            f1_score = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
             
-            # 如果IoU超过阈值，则为TP
-            if max_iou >= iou_threshold and max_idx != -1:
-                true_positives += 1
-                matched_gt.add(max_idx)
-                false_negatives -= 1
-            else:
-                false_positives += 1
-        
-        # 计算精确率和召回率
-        precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
-        recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
-        
-        # 计算F1分数
-        f1_score = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
-        
-        # 计算AP（简化版）
-        ap = precision * recall
+            per_threshold[threshold] = {
+                "precision": precision,
+                "recall": recall,
+                "f1_score": f1_score,
+                "true_positives": true_positives,
+                "false_positives": false_positives,
+                "false_negatives": false_negatives
+            }
         
-        # 返回指标
-        return {
-            "precision": precision,
-            "recall": recall,
-            "f1_score": f1_score,
-            "ap": ap,
-            "true_positives": true_positives,
-            "false_positives": false_positives,
-            "false_negatives": false_negatives
-        }
+        # 单张图像的 AP（iou_threshold）与 mAP@[.5:.95]
+        map_per_threshold = results["map_per_threshold"]
+        metrics = dict(per_threshold[iou_threshold])
+        metrics["ap"] = map_per_threshold[float(thresholds[_column(iou_threshold)])]
+        metrics["map"] = float(np.mean([map_per_threshold[float(t)] for t in coco_thresholds]))
+        if iou_thresholds is not None:
+            metrics["per_threshold"] = {float(t): per_threshold[t] for t in iou_thresholds}
+        return metrics
     
     def _calculate_iou_matrix(self, boxes1, boxes2):
         """
@@ -205,13 +592,11 @@ class Evaluator:
         返回:
             IoU矩阵 [len(boxes1) x len(boxes2)]
         """
-        iou_matrix = np.zeros((len(boxes1), len(boxes2)))
-        
-        for i, box1 in enumerate(boxes1):
-            for j, box2 in enumerate(boxes2):
-                iou_matrix[i, j] = self._calculate_iou(box1[:4], box2[:4])
-        
-        return iou_matrix
+        if len(boxes1) == 0 or len(boxes2) == 0:
+            return np.zeros((len(boxes1), len(boxes2)))
+        boxes1 = np.asarray(boxes1, dtype=np.float64)[:, :4]
+        boxes2 = np.asarray(boxes2, dtype=np.float64)[:, :4]
+        return box_iou_xywh(boxes1, boxes2)
     
     def _calculate_iou(self, box1, box2):
         """
@@ -282,12 +667,13 @@ class Evaluator:
             ground_truth = DatasetManager.load_annotations(annotation_path)
             
             # 转换检测结果为标准格式
+            # 标注为左上角+宽高格式，因此从 xyxy 转换
             detections = []
             for box in results[0].boxes:
-                x, y, w, h = box.xywh[0].cpu().numpy()
+                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
                 cls_id = int(box.cls[0].item())
                 conf = float(box.conf[0].item())
-                detections.append([x, y, w, h, cls_id, conf])
+                detections.append([x1, y1, x2 - x1, y2 - y1, cls_id, conf])
             
             # 计算评估指标
             metrics = self.calculate_metrics(detections, ground_truth, self.iou_threshold)
@@ -1,25 +1,34 @@
 # backend/utils/model_manager.py
 import os
+import threading
+from collections import OrderedDict
+
 import torch
 from ultralytics import YOLO
 
 from .model_registry import get_model_path
 
+# 默认推理参数，缓存命中时会重置到这些值，避免上一个任务修改的 overrides 泄漏到下一个任务
+_DEFAULT_OVERRIDES = {
+    'conf': 0.25,  # NMS confidence threshold
+    'iou': 0.45,  # NMS IoU threshold
+    'agnostic_nms': False,  # NMS class-agnostic
+    'max_det': 1000,  # maximum number of detections per image
+}
+
+
 class ModelManager:
     """模型管理器，负责加载和管理不同的模型"""
-    
+
+    # 进程级模型缓存: (权重真实路径, 修改时间, 设备) -> {"model", "source"}
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    # 最多常驻内存的模型数量，可通过环境变量覆盖
+    max_cached_models = int(os.getenv("SKYGUARD_MODEL_CACHE_SIZE", "2"))
+
     @staticmethod
-    def load_yolov8_model(model_path=None, model_name="yolov8s-visdrone"):
-        """
-        加载YOLOv8模型
-        
-        参数:
-            model_path: 模型路径，如果为None则使用默认路径
-            model_name: 模型名称，用于在默认路径中查找模型
-            
-        返回:
-            加载的模型
-        """
+    def _resolve_model_path(model_path=None, model_name="yolov8s-visdrone"):
+        """解析权重路径（未指定 model_path 时通过 registry 查找）"""
         if model_path is None:
             # 先通过 registry 查找 active / baseline
             resolved = get_model_path(model_name)
@@ -29,27 +38,106 @@ class ModelManager:
                 resolved = os.path.join(current_dir, model_name, 'best.pt')
 
             model_path = resolved
-        
-        print(f"Loading model from: {model_path}")
-        
+        return model_path
+
+    @staticmethod
+    def _load_from_disk(model_path):
+        """从磁盘构建 YOLO 模型"""
         # 临时修补torch.load函数
         original_torch_load = torch.load
-        
+
         def patched_torch_load(f, *args, **kwargs):
             kwargs['weights_only'] = False
             return original_torch_load(f, *args, **kwargs)
-        
+
         try:
             torch.load = patched_torch_load
-            model = YOLO(model_path)
-            
-            # 设置模型参数
-            model.overrides['conf'] = 0.25  # NMS confidence threshold
-            model.overrides['iou'] = 0.45  # NMS IoU threshold
-            model.overrides['agnostic_nms'] = False  # NMS class-agnostic
-            model.overrides['max_det'] = 1000  # maximum number of detections per image
-            
-            return model
+            return YOLO(model_path)
         finally:
             # 恢复原始函数
-            torch.load = original_torch_load
\ No newline at end of file
+            torch.load = original_torch_load
+
+    @classmethod
+    def _evict_stale(cls):
+        """
+        移除权重文件已变化的缓存项（需持有 _cache_lock）
+
+        例如 models/active/*.pt 被替换、重新指向或删除时，对应的旧模型会被丢弃。
+        """
+        for key in list(cls._cache.keys()):
+            real_path, mtime, _ = key
+            source = cls._cache[key]["source"]
+            try:
+                stale = (os.path.realpath(source) != real_path
+                         or os.stat(real_path).st_mtime_ns != mtime)
+            except OSError:
+                stale = True
+            if stale:
+                print(f"Evicting stale cached model: {source}")
+                del cls._cache[key]
+
+    @classmethod
+    def evict(cls, model_path=None, model_name=None):
+        """
+        显式移除缓存的模型
+
+        参数:
+            model_path: 要移除的权重路径
+            model_name: 要移除的模型名称（通过 registry 解析路径）
+            两者都为None时清空整个缓存
+        """
+        with cls._cache_lock:
+            if model_path is None and model_name is None:
+                cls._cache.clear()
+                return
+            real_path = os.path.realpath(cls._resolve_model_path(model_path, model_name))
+            for key in list(cls._cache.keys()):
+                if key[0] == real_path:
+                    del cls._cache[key]
+
+    @classmethod
+    def load_yolov8_model(cls, model_path=None, model_name="yolov8s-visdrone", device=None, use_cache=True):
+        """
+        加载YOLOv8模型
+
+        参数:
+            model_path: 模型路径，如果为None则使用默认路径
+            model_name: 模型名称，用于在默认路径中查找模型
+            device: 模型所在设备，如果为None则保持 ultralytics 默认
+            use_cache: 是否复用进程内已加载的模型实例
+
+        返回:
+            加载的模型
+        """
+        model_path = cls._resolve_model_path(model_path, model_name)
+
+        key = None
+        if use_cache and os.path.exists(model_path):
+            real_path = os.path.realpath(model_path)
+            key = (real_path, os.stat(real_path).st_mtime_ns, str(device))
+            with cls._cache_lock:
+                cls._evict_stale()
+                entry = cls._cache.get(key)
+                if entry is not None:
+                    cls._cache.move_to_end(key)
+                    model = entry["model"]
+                    model.overrides.update(_DEFAULT_OVERRIDES)
+                    print(f"Using cached model: {model_path}")
+                    return model
+
+        print(f"Loading model from: {model_path}")
+        model = cls._load_from_disk(model_path)
+        if device is not None:
+            model.to(device)
+
+        # 设置模型参数
+        model.overrides.update(_DEFAULT_OVERRIDES)
+
+        if key is not None and cls.max_cached_models > 0:
+            with cls._cache_lock:
+                cls._cache[key] = {"model": model, "source": model_path}
+                cls._cache.move_to_end(key)
+                while len(cls._cache) > cls.max_cached_models:
+                    cls._cache.popitem(last=False)
+
+        return model
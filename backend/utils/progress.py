@@ -0,0 +1,44 @@
+# backend/utils/progress.py
+import time
+
+
+class ProgressReporter:
+    """评估进度上报器，按最小时间间隔节流后调用回调函数"""
+
+    def __init__(self, callback, total, min_interval=0.5):
+        """
+        参数:
+            callback: 回调函数，接收一个进度字典；为None时不做任何事
+            total: 图像总数
+            min_interval: 两次上报之间的最小间隔（秒），最后一次总是上报
+        """
+        self.callback = callback
+        self.total = total
+        self.min_interval = min_interval
+        self.start_time = time.time()
+        self._last_report = 0.0
+
+    def update(self, processed, running_metrics=None):
+        """
+        上报当前进度
+
+        参数:
+            processed: 已处理的图像数量
+            running_metrics: 当前的累计指标字典
+        """
+        if self.callback is None:
+            return
+        now = time.time()
+        if processed < self.total and now - self._last_report < self.min_interval:
+            return
+        self._last_report = now
+
+        elapsed = now - self.start_time
+        self.callback({
+            "current": processed,
+            "total": self.total,
+            "percent": round(100.0 * processed / self.total, 2) if self.total else 100.0,
+            "elapsed": elapsed,
+            "images_per_sec": processed / elapsed if elapsed > 0 else 0.0,
+            "metrics": running_metrics or {},
+        })
@@ -0,0 +1,235 @@
+# backend/utils/report_renderer.py
+"""
+评估报告图表：图表描述 (chart spec) 与无界面渲染
+
+评估器只生成与绘图库无关的 JSON 图表描述，写入 plots/charts.json，前端可以直接
+用它绘制矢量图表；需要 PNG / SVG 时再由本模块渲染。渲染使用 matplotlib 的
+Figure + Agg 画布对象接口，不经过 pyplot 的全局状态，可在多个线程 / 任务中并行，
+也可以放到独立的低优先级 Celery 任务中执行。
+
+图表描述格式::
+
+    {"name": "confidence_drop", "figsize": [10, 6], "panels": [
+        {"title": ..., "xlabel": ..., "ylabel": ..., "grid": true, "legend": true,
+         "series": [{"type": "line", "y": [...], ...}, {"type": "hline", "y": 0.3, ...}]}
+    ]}
+
+series 类型: hist（已分箱的计数）、bar、barh、line、hline、heatmap。
+
+命令行渲染已有结果目录::
+
+    python -m utils.report_renderer results/adversarial_results/<task_id>/plots --format svg
+"""
+import html
+import json
+import os
+
+import numpy as np
+
+CHARTS_FILE = "charts.json"
+RENDER_FORMATS = ("png", "svg")
+
+
+def _floats(values):
+    return [float(v) for v in values]
+
+
+def histogram(values, bins=20, color=None, label=None, alpha=0.7):
+    """直方图序列：在这里完成分箱，描述中只保存计数与边界"""
+    counts, edges = np.histogram(np.asarray(values, dtype=float), bins=bins)
+    return {"type": "hist", "counts": counts.tolist(), "edges": _floats(edges),
+            "color": color, "label": label, "alpha": alpha}
+
+
+def bars(categories, values, color=None, label=None, offset=0.0, width=0.8, horizontal=False):
+    """柱状图序列，offset / width 用于分组柱状图"""
+    return {"type": "barh" if horizontal else "bar", "categories": [str(c) for c in categories],
+            "values": _floats(values), "color": color, "label": label, "offset": offset, "width": width}
+
+
+def line(y, x=None, color=None, label=None, marker="o", linestyle="-"):
+    """折线序列，x 为空时使用下标"""
+    return {"type": "line", "x": _floats(x) if x is not None else None, "y": _floats(y),
+            "color": color, "label": label, "marker": marker, "linestyle": linestyle}
+
+
+def hline(y, color="r", label=None, linestyle="--"):
+    """水平参考线（如均值）"""
+    return {"type": "hline", "y": float(y), "color": color, "label": label, "linestyle": linestyle}
+
+
+def heatmap(matrix, xticklabels, yticklabels, annot=True, fmt=".0f"):
+    """热力图序列"""
+    return {"type": "heatmap", "matrix": np.asarray(matrix, dtype=float).tolist(),
+            "xticklabels": [str(c) for c in xticklabels], "yticklabels": [str(c) for c in yticklabels],
+            "annot": annot, "fmt": fmt}
+
+
+def panel(*series, title=None, xlabel=None, ylabel=None, grid=False, legend=False, xtick_rotation=0):
+    """一个坐标系（子图）"""
+    return {"title": title, "xlabel": xlabel, "ylabel": ylabel, "grid": grid, "legend": legend,
+            "xtick_rotation": xtick_rotation, "series": list(series)}
+
+
+def chart(name, *panels, figsize=(10, 6)):
+    """一张图表，多个 panel 横向排列；name 同时作为输出文件名"""
+    return {"name": name, "figsize": list(figsize), "panels": list(panels)}
+
+
+def save_chart_specs(charts, plots_dir):
+    """
+    将图表描述写入 plots_dir/charts.json，同名图表覆盖旧描述，其余保留
+
+    返回写入后的全部图表描述
+    """
+    merged = {spec["name"]: spec for spec in load_chart_specs(plots_dir)}
+    merged.update((spec["name"], spec) for spec in charts)
+    specs = list(merged.values())
+    os.makedirs(plots_dir, exist_ok=True)
+    path = os.path.join(plots_dir, CHARTS_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"charts": specs}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return specs
+
+
+def load_chart_specs(plots_dir):
+    """读取 plots_dir/charts.json 中的图表描述（不存在时返回空列表）"""
+    path = os.path.join(plots_dir, CHARTS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("charts", [])
+
+
+def report_plots_html(charts, image_format="png", titles=None):
+    """
+    HTML 报告的图表部分：只引用实际生成了描述的图表
+
+    image_format 为图片格式（由评估器或 report.render 任务渲染）；为None表示不会生成图片，
+    此时不引用图片，只指向 plots/charts.json。titles 为图表名 -> 标题，缺省时由图表名生成
+    """
+    if not charts:
+        return ""
+    if image_format is None:
+        return (f'<p>Charts were not rendered as images; {len(charts)} chart specs are available in '
+                f'<a href="plots/{CHARTS_FILE}">plots/{CHARTS_FILE}</a>.</p>')
+    titles = titles or {}
+    blocks = []
+    for spec in charts:
+        name = spec["name"]
+        title = html.escape(titles.get(name) or name.replace("_", " ").title())
+        blocks.append(f'''
+                    <div class="plot-container">
+                        <h3>{title}</h3>
+                        <img src="plots/{name}.{image_format}" alt="{title}" style="max-width: 100%;">
+                    </div>''')
+    return "".join(blocks)
+
+
+def _draw_series(fig, ax, series, xtick_rotation):
+    kind = series["type"]
+    if kind == "hist":
+        edges = np.asarray(series["edges"])
+        ax.hist(edges[:-1], bins=edges, weights=series["counts"], alpha=series.get("alpha", 0.7),
+                color=series.get("color"), label=series.get("label"))
+    elif kind in ("bar", "barh"):
+        positions = np.arange(len(series["categories"])) + series.get("offset", 0.0)
+        ticks = np.arange(len(series["categories"]))
+        if kind == "bar":
+            ax.bar(positions, series["values"], series.get("width", 0.8),
+                   color=series.get("color"), label=series.get("label"))
+            ax.set_xticks(ticks)
+            ax.set_xticklabels(series["categories"], rotation=xtick_rotation,
+                               ha="right" if xtick_rotation else "center")
+        else:
+            ax.barh(positions, series["values"], series.get("width", 0.8),
+                    color=series.get("color"), label=series.get("label"))
+            ax.set_yticks(ticks)
+            ax.set_yticklabels(series["categories"])
+    elif kind == "line":
+        y = series["y"]
+        x = series.get("x") or list(range(len(y)))
+        ax.plot(x, y, marker=series.get("marker"), linestyle=series.get("linestyle", "-"),
+                color=series.get("color"), label=series.get("label"))
+    elif kind == "hline":
+        ax.axhline(y=series["y"], color=series.get("color"), linestyle=series.get("linestyle", "--"),
+                   label=series.get("label"))
+    elif kind == "heatmap":
+        matrix = np.asarray(series["matrix"], dtype=float)
+        image = ax.imshow(matrix, cmap="magma", aspect="auto")
+        fig.colorbar(image, ax=ax)
+        ax.set_xticks(np.arange(matrix.shape[1]))
+        ax.set_xticklabels(series["xticklabels"], rotation=xtick_rotation or 90)
+        ax.set_yticks(np.arange(matrix.shape[0]))
+        ax.set_yticklabels(series["yticklabels"])
+        if series.get("annot", True):
+            threshold = matrix.max() / 2 if matrix.size else 0
+            for (i, j), value in np.ndenumerate(matrix):
+                ax.text(j, i, format(value, series.get("fmt", ".0f")), ha="center", va="center",
+                        color="black" if value > threshold else "white")
+    else:
+        raise ValueError(f"未知的图表序列类型: {kind}")
+
+
+def render_chart(spec, plots_dir, fmt="png", dpi=100):
+    """
+    使用 Agg 画布（不经过 pyplot）渲染一张图表，返回输出文件路径
+    """
+    # 延迟导入：只生成图表描述的进程不需要加载 matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"不支持的图表格式: {fmt}，可选: {', '.join(RENDER_FORMATS)}")
+    fig = Figure(figsize=spec.get("figsize", (10, 6)), dpi=dpi)
+    FigureCanvasAgg(fig)
+    panels = spec["panels"]
+    for index, panel_spec in enumerate(panels, 1):
+        ax = fig.add_subplot(1, len(panels), index)
+        for series in panel_spec["series"]:
+            _draw_series(fig, ax, series, panel_spec.get("xtick_rotation", 0))
+        if panel_spec.get("title"):
+            ax.set_title(panel_spec["title"])
+        if panel_spec.get("xlabel"):
+            ax.set_xlabel(panel_spec["xlabel"])
+        if panel_spec.get("ylabel"):
+            ax.set_ylabel(panel_spec["ylabel"])
+        if panel_spec.get("grid"):
+            ax.grid(True, alpha=0.3)
+        if panel_spec.get("legend"):
+            ax.legend()
+    fig.tight_layout()
+    path = os.path.join(plots_dir, f"{spec['name']}.{fmt}")
+    fig.savefig(path, format=fmt)
+    return path
+
+
+def render_charts(charts, plots_dir, formats=("png",)):
+    """渲染多张图表，单张失败不影响其余图表；返回成功生成的文件路径"""
+    paths = []
+    for spec in charts:
+        for fmt in formats:
+            try:
+                paths.append(render_chart(spec, plots_dir, fmt=fmt))
+            except Exception as e:
+                print(f"渲染图表 {spec.get('name')} 时出错: {e}")
+    return paths
+
+
+def render_report(plots_dir, formats=("png",)):
+    """渲染 plots_dir/charts.json 中的全部图表"""
+    return render_charts(load_chart_specs(plots_dir), plots_dir, formats)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="渲染评估结果目录中的图表描述 (charts.json)")
+    parser.add_argument("plots_dir", help="包含 charts.json 的 plots 目录")
+    parser.add_argument("--format", dest="formats", action="append", choices=RENDER_FORMATS,
+                        help="输出格式，可重复指定（默认 png）")
+    args = parser.parse_args()
+    for output in render_report(args.plots_dir, tuple(args.formats or ["png"])):
+        print(output)
@@ -0,0 +1,117 @@
+# backend/utils/worker_runtime.py
+"""
+Celery worker 子进程的运行环境：设备 / CPU 绑定、线程数与模型预热
+
+同一台机器上运行多个 worker 子进程 (--concurrency=4~8) 时，每个子进程默认都会
+按全部核心数创建 torch / OpenCV 线程池，互相争抢 CPU。configure_worker_process()
+在子进程启动时（worker_process_init 信号）按子进程序号：
+
+- 从 SKYGUARD_WORKER_DEVICES 中轮流分配一个设备（如 "0,1" 表示两块 GPU，"cpu" 表示只用 CPU），
+  GPU 通过 CUDA_VISIBLE_DEVICES 绑定，子进程内的 "cuda" / "cuda:0" 即为分配到的 GPU；
+- 把可用 CPU 平均分给各子进程并绑定 (SKYGUARD_PIN_CPUS=1 时)；
+- 设置 torch / OpenCV 线程数为分到的核心数（可用 SKYGUARD_TORCH_THREADS 覆盖）；
+- 预加载 SKYGUARD_PRELOAD_MODELS 中的模型并做一次推理预热，第一个任务无需等待加载。
+
+环境变量:
+    SKYGUARD_WORKER_CONCURRENCY: 每台机器的 worker 子进程数（celery_app 中同时作为默认并发数）
+    SKYGUARD_WORKER_DEVICES: 逗号分隔的 GPU 编号或 cpu，为空时不绑定设备
+    SKYGUARD_PIN_CPUS: 为 1 时把子进程绑定到各自的 CPU 集合
+    SKYGUARD_TORCH_THREADS: 每个子进程的 torch 线程数，默认 可用核心数 / 子进程数
+    SKYGUARD_PRELOAD_MODELS: 逗号分隔的模型名称，子进程启动时预加载
+    SKYGUARD_WORKER_INIT_TIMEOUT: 子进程初始化（含模型预热）的超时秒数，默认 120（celery_app 中设置）
+"""
+import os
+import time
+
+import numpy as np
+
+# 当前子进程的运行环境（configure_worker_process 之后可用）
+_runtime = {}
+
+
+def _env_list(name):
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_runtime():
+    """返回当前子进程的运行环境（未配置时为空字典）"""
+    return dict(_runtime)
+
+
+def configure_worker_process(index=0, concurrency=1):
+    """
+    按子进程序号 index 绑定设备 / CPU 并设置线程数，必须在子进程使用 CUDA 之前调用
+
+    返回运行环境字典 (index, device, cpus, threads)
+    """
+    import torch
+
+    concurrency = max(1, int(concurrency))
+    index = int(index) % concurrency
+
+    # 1. 设备：GPU 通过 CUDA_VISIBLE_DEVICES 绑定（CUDA 已初始化时退化为 set_device）
+    device = None
+    devices = _env_list("SKYGUARD_WORKER_DEVICES")
+    if devices:
+        device = devices[index % len(devices)]
+        if device == "cpu":
+            os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        elif torch.cuda.is_initialized():
+            torch.cuda.set_device(int(device))
+        else:
+            os.environ["CUDA_VISIBLE_DEVICES"] = device
+
+    # 2. CPU 集合：把可用核心平均分给各子进程（核心数少于子进程数时轮流共用，每个子进程仍只分到 per_process 个）
+    cpus = _available_cpus()
+    per_process = max(1, len(cpus) // concurrency)
+    own_cpus = cpus[(index * per_process) % len(cpus):][:per_process]
+    if os.getenv("SKYGUARD_PIN_CPUS") == "1" and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, own_cpus)
+
+    # 3. 线程数：避免各子进程都按全部核心数创建线程池
+    # （torch 已在 worker 主进程中导入，此时设置 OMP_NUM_THREADS 等环境变量已无效，只能调用 set_num_threads）
+    threads = int(os.getenv("SKYGUARD_TORCH_THREADS", "0")) or len(own_cpus)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(max(1, min(threads, 2)))
+    except RuntimeError:
+        # 线程池已启动后不能再修改 interop 线程数
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+    _runtime.update({"index": index, "device": device, "cpus": own_cpus, "threads": threads})
+    print(f"Worker 子进程 {index}/{concurrency}: 设备={device or '默认'}，CPU={own_cpus}，线程数={threads}")
+    return worker_runtime()
+
+
+def warm_up_models(model_names=None, input_size=640):
+    """
+    预加载模型到进程内缓存 (ModelManager) 并执行一次推理，初始化 CUDA 上下文与算子
+
+    model_names 为空时读取 SKYGUARD_PRELOAD_MODELS；返回 {模型名: 耗时秒}
+    """
+    from utils.model_manager import ModelManager
+
+    timings = {}
+    for model_name in (model_names if model_names is not None else _env_list("SKYGUARD_PRELOAD_MODELS")):
+        start = time.time()
+        try:
+            model = ModelManager.load_yolov8_model(model_name=model_name)
+            model.predict(np.zeros((input_size, input_size, 3), dtype=np.uint8), verbose=False)
+        except Exception as e:
+            # 预热失败不影响 worker 启动，任务中会再次加载并报告错误
+            print(f"预加载模型 {model_name} 失败: {e}")
+            continue
+        timings[model_name] = time.time() - start
+        print(f"预加载模型 {model_name} 完成，用时 {timings[model_name]:.2f}s")
+    return timings